@@ -1,5 +1,6 @@
 from backend.database import SessionLocal, Base, engine
 from backend.aggregator import aggregate_usage
+from backend import occupancy, online_update, tsstore
 import argparse
 
 
@@ -9,6 +10,12 @@ def main():
     parser.add_argument('--weeks', type=int, default=12, help='Lookback weeks for weekly aggregation (default: 12)')
     parser.add_argument('--series-daily', default='seat_usage_daily', help='Series name for daily aggregation')
     parser.add_argument('--series-weekly', default='seat_usage_weekly', help='Series name for weekly aggregation')
+    parser.add_argument('--backfill-store', action='store_true', help='Also copy existing timeseries rows into the chunked store (tsstore)')
+    parser.add_argument('--update-model', default=None, metavar='BUNDLE',
+                        help='Fold new daily points into this *.portable.json without refitting (see online_update.py)')
+    parser.add_argument('--occupancy-slot-minutes', type=int, default=None, choices=(15, 30, 60),
+                        help='Also write per-room/seat-type occupancy series at this slot size into the chunked store')
+    parser.add_argument('--occupancy-days', type=int, default=7, help='Lookback days for occupancy series (default: 7)')
     args = parser.parse_args()
 
     Base.metadata.create_all(bind=engine)
@@ -16,6 +23,17 @@ def main():
     try:
         d, w = aggregate_usage(db, lookback_days=args.days, lookback_weeks=args.weeks, series_daily=args.series_daily, series_weekly=args.series_weekly)
         print(f"Aggregated: daily_inserted={d}, weekly_inserted={w}")
+        if args.backfill_store:
+            copied = {name: tsstore.backfill_from_rows(db, name) for name in (args.series_daily, args.series_weekly)}
+            db.commit()
+            print(f"Backfilled chunked store: {copied}")
+        if args.occupancy_slot_minutes:
+            n = occupancy.aggregate_occupancy(db, lookback_days=args.occupancy_days, slot_minutes=args.occupancy_slot_minutes)
+            print(f"Occupancy: {n} points written ({args.occupancy_slot_minutes}-minute slots)")
+        if args.update_model:
+            res = online_update.update_from_store(db, args.update_model, args.series_daily)
+            print(f"Model update: appended={res.appended} nobs={res.nobs} in {res.seconds * 1000:.1f} ms"
+                  + (f"; refit due: {res.reason}" if res.refit_due else ""))
     finally:
         db.close()
 
@@ -1,8 +1,9 @@
 from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from collections import defaultdict
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from . import models
+from . import archive, models, tsstore
 
 # Helpers
 
@@ -20,24 +21,29 @@ def aggregate_daily(db: Session, lookback_days: int = 60, series_name: str = 'se
     """Aggregate reservations by start_date over the past N days into timeseries."""
     end = _floor_to_day(datetime.now())
     start = end - timedelta(days=lookback_days)
-    # Load reservations within window by start_time
-    q = db.query(models.Reservation).filter(models.Reservation.start_time >= start, models.Reservation.start_time < end + timedelta(days=1))
-    rows = q.all()
+    # Load reservations (hot and archived) within window by start_time
+    h = archive.history()
+    rows = db.execute(select(h.c.start_time, h.c.created_at).where(h.c.start_time >= start, h.c.start_time < end + timedelta(days=1))).all()
     bucket = defaultdict(int)
     for r in rows:
         d = _floor_to_day(r.start_time or r.created_at)
         bucket[d] += 1
     # Upsert into timeseries
     inserted = 0
+    days, values = [], []
     for i in range(lookback_days):
         day = start + timedelta(days=i)
         val = bucket.get(day, 0)
+        days.append(day)
+        values.append(float(val))
         existing = db.query(models.TimeSeriesPoint).filter(models.TimeSeriesPoint.series_name==series_name, models.TimeSeriesPoint.ts==day).first()
         if existing:
             existing.value = float(val)
         else:
             db.add(models.TimeSeriesPoint(series_name=series_name, ts=day, value=float(val)))
             inserted += 1
+    # Window ends yesterday, so every day is complete: the chunked store only needs the new tail.
+    tsstore.append(db, series_name, days, values, skip_existing=True)
     db.commit()
     return inserted
 
@@ -47,23 +53,27 @@ def aggregate_weekly(db: Session, lookback_weeks: int = 12, series_name: str = '
     today = _floor_to_day(datetime.now())
     this_monday = _monday_of_week(today)
     start_monday = this_monday - timedelta(weeks=lookback_weeks)
-    # Load reservations within window
-    q = db.query(models.Reservation).filter(models.Reservation.start_time >= start_monday, models.Reservation.start_time < this_monday + timedelta(days=7))
-    rows = q.all()
+    # Load reservations (hot and archived) within window
+    h = archive.history()
+    rows = db.execute(select(h.c.start_time, h.c.created_at).where(h.c.start_time >= start_monday, h.c.start_time < this_monday + timedelta(days=7))).all()
     bucket = defaultdict(int)
     for r in rows:
         d = _monday_of_week(r.start_time or r.created_at)
         bucket[d] += 1
     inserted = 0
+    weeks, values = [], []
     for w in range(lookback_weeks):
         wk = start_monday + timedelta(weeks=w)
         val = bucket.get(wk, 0)
+        weeks.append(wk)
+        values.append(float(val))
         existing = db.query(models.TimeSeriesPoint).filter(models.TimeSeriesPoint.series_name==series_name, models.TimeSeriesPoint.ts==wk).first()
         if existing:
             existing.value = float(val)
         else:
             db.add(models.TimeSeriesPoint(series_name=series_name, ts=wk, value=float(val)))
             inserted += 1
+    tsstore.append(db, series_name, weeks, values, skip_existing=True)  # completed weeks only, as above
     db.commit()
     return inserted
 
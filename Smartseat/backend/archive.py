@@ -0,0 +1,113 @@
+"""Reservation history archival: finished reservations move out of the hot table in batches.
+
+`reservations` only needs the rows bookings and releases work on (active ones,
+plus recent history for /api/reservations/mine). Completed and cancelled rows
+that ended more than ARCHIVE_AFTER_DAYS ago are copied into
+`reservations_archive` (original ids kept in `id`, a surrogate key of its own,
+no foreign keys) and deleted from `reservations`, ARCHIVE_BATCH rows per
+transaction so the writer lock is only held briefly. Nothing is lost: history() is the union of both tables and is
+what aggregation and occupancy analytics read.
+
+Environment:
+  ARCHIVE_AFTER_DAYS=30        age (by end time, else start time) before a finished reservation is archived
+  ARCHIVE_INTERVAL_S=3600      how often the background archiver runs (0 = disabled)
+  ARCHIVE_BATCH=1000           rows moved per transaction
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.orm import Session
+
+from . import models
+
+log = logging.getLogger("smartseat.archive")
+
+ARCHIVE_AFTER = timedelta(days=float(os.getenv("ARCHIVE_AFTER_DAYS", "30")))
+ARCHIVE_INTERVAL_S = float(os.getenv("ARCHIVE_INTERVAL_S", "3600"))
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", "1000"))
+
+COLUMNS = ("id", "user_id", "seat_id", "start_time", "end_time", "status", "created_at")
+FINISHED = (models.ReservationStatus.completed, models.ReservationStatus.cancelled)
+
+
+def _archivable(cutoff: datetime):
+    R = models.Reservation
+    return (R.status.in_(FINISHED), func.coalesce(R.end_time, R.start_time) < cutoff)
+
+
+def archive_old(db: Session, older_than: timedelta = ARCHIVE_AFTER, batch_size: int = ARCHIVE_BATCH,
+                max_batches: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """Move finished reservations older than `older_than` into the archive; returns rows moved."""
+    R, A = models.Reservation, models.ReservationArchive
+    cutoff = (now or datetime.now(timezone.utc)) - older_than
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        ids = db.execute(select(R.id).where(*_archivable(cutoff)).order_by(R.id).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        try:
+            db.execute(insert(A).from_select(COLUMNS, select(*(getattr(R, c) for c in COLUMNS)).where(R.id.in_(ids))))
+            db.execute(delete(R).where(R.id.in_(ids)))
+            db.commit()
+        except Exception:
+            db.rollback()  # the batch stays in `reservations`; the session is usable again
+            raise
+        total += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+def history():
+    """Subquery over every reservation, hot and archived, with the columns of both tables."""
+    R, A = models.Reservation, models.ReservationArchive
+    return union_all(
+        select(*(getattr(R, c) for c in COLUMNS)),
+        select(*(getattr(A, c) for c in COLUMNS)),
+    ).subquery("reservation_history")
+
+
+class Archiver:
+    """Daemon thread that runs archive_old every `interval` seconds."""
+
+    def __init__(self, session_factory, interval: float = ARCHIVE_INTERVAL_S, batch_size: int = ARCHIVE_BATCH):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        db = self.session_factory()
+        try:
+            return archive_old(db, batch_size=self.batch_size)
+        finally:
+            db.close()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                n = self.run_once()
+                if n:
+                    log.info("archived %d reservations", n)
+            except Exception:
+                log.exception("reservation archival failed")
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="reservation-archiver", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -0,0 +1,224 @@
+"""Rolling-origin backtests of portable SARIMAX bundles.
+
+For each origin t (initial, initial+step, ...) the model forecasts 1..horizon
+steps ahead from the first t observations, and the forecasts are scored against
+what actually happened. The bundle's params stay fixed: the state-space filter
+is run once on the first `initial` observations and then carried forward with
+results.extend(), which filters only the `step` new observations, instead of
+refitting (or even refiltering from the start) at every origin. mode="refit"
+does the naive refit-per-origin for comparison.
+
+Scores per horizon h: MAE, MAPE (over non-zero actuals) and the coverage of the
+(1 - alpha) prediction interval. Several bundles run in parallel on a process pool;
+API requests share one pool of BACKTEST_WORKERS processes (shared_pool()), so
+concurrent requests queue for CPUs instead of each starting their own.
+
+CLI:  python backtest.py sarimax_model.portable.json --horizon 6 --initial 60
+API:  POST /api/backtest with bundle names from MODEL_DIR (default: this directory)
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import numpy as np
+
+try:
+    from .train_dummy_sarimax import portable_model, portable_read  # imported as backend.backtest
+except ImportError:
+    from train_dummy_sarimax import portable_model, portable_read  # run as a script from backend/
+
+MODES = ("extend", "refit")
+MODEL_DIR = os.getenv("MODEL_DIR", os.path.dirname(os.path.abspath(__file__)))
+WORKERS = int(os.getenv("BACKTEST_WORKERS", "0")) or (os.cpu_count() or 1)
+
+
+@dataclass
+class HorizonScore:
+    h: int
+    n: int
+    mae: Optional[float]
+    mape: Optional[float]  # percent
+    coverage: Optional[float]  # share of actuals inside the interval
+
+
+@dataclass
+class BacktestReport:
+    model: str
+    mode: str
+    nobs: int
+    initial: int
+    step: int
+    horizon: int
+    alpha: float
+    origins: int
+    seconds: float
+    ms_per_origin: float
+    per_horizon: list[HorizonScore] = field(default_factory=list)
+    error: Optional[str] = None
+
+
+def _scores(errors: np.ndarray, actuals: np.ndarray, covered: np.ndarray) -> list[HorizonScore]:
+    out = []
+    for h in range(errors.shape[1]):
+        ok = ~np.isnan(errors[:, h])
+        n = int(ok.sum())
+        if not n:
+            out.append(HorizonScore(h + 1, 0, None, None, None))
+            continue
+        e, a = errors[ok, h], actuals[ok, h]
+        nz = a != 0
+        out.append(HorizonScore(
+            h=h + 1, n=n,
+            mae=round(float(np.mean(np.abs(e))), 4),
+            mape=round(float(np.mean(np.abs(e[nz] / a[nz])) * 100), 3) if nz.any() else None,
+            coverage=round(float(np.mean(covered[ok, h])), 4),
+        ))
+    return out
+
+
+def backtest_bundle(path: str, horizon: int = 6, initial: Optional[int] = None, step: int = 1,
+                    alpha: float = 0.05, mode: str = "extend", max_origins: Optional[int] = None) -> BacktestReport:
+    """Backtest one bundle on its own training series. Never raises; failures land in .error.
+
+    With `max_origins`, a run that would score more origins fails up front instead.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    name = os.path.basename(path).replace(".portable.json", "")
+    t0 = time.perf_counter()
+    try:
+        series, meta = portable_read(path)
+        y = series.to_numpy(dtype=float)
+        n = len(y)
+        initial = initial or max(n // 2, 1)
+        if not 1 <= initial < n:
+            raise ValueError(f"initial={initial} must be between 1 and nobs-1 ({n - 1})")
+        params = np.asarray(meta["params"])
+        origins = list(range(initial, n, step))
+        if max_origins is not None and len(origins) > max_origins:
+            raise ValueError(f"{len(origins)} origins exceed the limit of {max_origins}; raise step or initial")
+        errors = np.full((len(origins), horizon), np.nan)
+        actuals = np.full_like(errors, np.nan)
+        covered = np.zeros(errors.shape, dtype=bool)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            res = None
+            for i, t in enumerate(origins):
+                if mode == "refit":
+                    res = portable_model(y[:t], meta).fit(start_params=params, disp=False)
+                elif res is None:
+                    res = portable_model(y[:t], meta).filter(params)
+                else:
+                    res = res.extend(y[t - step:t])
+                fc = res.get_forecast(horizon)
+                mean = np.asarray(fc.predicted_mean)
+                ci = np.asarray(fc.conf_int(alpha=alpha))
+                k = min(horizon, n - t)
+                actual = y[t:t + k]
+                errors[i, :k] = mean[:k] - actual
+                actuals[i, :k] = actual
+                covered[i, :k] = (ci[:k, 0] <= actual) & (actual <= ci[:k, 1])
+
+        seconds = time.perf_counter() - t0
+        return BacktestReport(
+            model=name, mode=mode, nobs=n, initial=initial, step=step, horizon=horizon, alpha=alpha,
+            origins=len(origins), seconds=round(seconds, 4),
+            ms_per_origin=round(seconds * 1000 / max(len(origins), 1), 3),
+            per_horizon=_scores(errors, actuals, covered),
+        )
+    except Exception as e:
+        return BacktestReport(
+            model=name, mode=mode, nobs=0, initial=initial or 0, step=step, horizon=horizon, alpha=alpha,
+            origins=0, seconds=round(time.perf_counter() - t0, 4), ms_per_origin=0.0,
+            error=f"{type(e).__name__}: {e}",
+        )
+
+
+def bundle_path(name: str) -> Optional[str]:
+    """MODEL_DIR/<name>.portable.json if it exists; names are plain file stems, never paths."""
+    if not name or name != os.path.basename(name) or name.startswith("."):
+        return None
+    path = os.path.join(MODEL_DIR, f"{name}.portable.json")
+    return path if os.path.isfile(path) else None
+
+
+def list_bundles() -> list[str]:
+    return sorted(f[:-len(".portable.json")] for f in os.listdir(MODEL_DIR) if f.endswith(".portable.json"))
+
+
+def backtest_many(paths: list[str], workers: int = 1, **kwargs) -> list[BacktestReport]:
+    """backtest_bundle over several bundles, one process per bundle up to `workers`."""
+    if workers <= 1 or len(paths) <= 1:
+        return [backtest_bundle(p, **kwargs) for p in paths]
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+        futures = [pool.submit(backtest_bundle, p, **kwargs) for p in paths]
+        return [f.result() for f in futures]
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def shared_pool() -> ProcessPoolExecutor:
+    """The process pool API backtests share, started on first use with WORKERS processes."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=WORKERS)
+        return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(cancel_futures=True)
+
+
+def format_report(r: BacktestReport) -> str:
+    if r.error:
+        return f"{r.model}: FAILED {r.error}"
+    lines = [f"{r.model} [{r.mode}] nobs={r.nobs} origins={r.origins} "
+             f"time={r.seconds:.3f}s ({r.ms_per_origin:.2f} ms/origin)",
+             f"  {'h':>3} {'n':>4} {'MAE':>9} {'MAPE%':>8} {'cover':>6}"]
+    def fmt(v, spec):
+        return format(v, spec) if v is not None else "-"
+    for s in r.per_horizon:
+        lines.append(f"  {s.h:>3} {s.n:>4} {fmt(s.mae, '9.3f'):>9} {fmt(s.mape, '8.2f'):>8} {fmt(s.coverage, '6.2f'):>6}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling-origin backtest of portable SARIMAX bundles.")
+    parser.add_argument("bundles", nargs="+", help="*.portable.json files")
+    parser.add_argument("--horizon", type=int, default=6, help="steps ahead to score (default: 6)")
+    parser.add_argument("--initial", type=int, default=None, help="observations before the first origin (default: half)")
+    parser.add_argument("--step", type=int, default=1, help="observations between origins (default: 1)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="prediction interval level 1-alpha (default: 0.05)")
+    parser.add_argument("--mode", choices=MODES, default="extend", help="extend (fixed params) or refit per origin")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="parallel bundles (default: BACKTEST_WORKERS or CPU count)")
+    parser.add_argument("--json", action="store_true", help="print the reports as JSON")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    reports = backtest_many(args.bundles, workers=args.workers, horizon=args.horizon, initial=args.initial,
+                            step=args.step, alpha=args.alpha, mode=args.mode)
+    if args.json:
+        print(json.dumps([asdict(r) for r in reports], indent=2))
+    else:
+        for r in reports:
+            print(format_report(r))
+        print(f"{len(reports)} bundle(s) in {time.perf_counter() - t0:.2f}s on {min(args.workers, len(reports))} worker(s)")
+
+
+if __name__ == "__main__":
+    main()
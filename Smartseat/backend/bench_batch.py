@@ -0,0 +1,67 @@
+# Benchmark: a dashboard load (/api/auth/me, /api/seats, /api/reservations/mine) as separate calls vs one /api/batch.
+# Run: python bench_batch.py --loads 200 --rtt-ms 0 20
+# --rtt-ms adds a simulated network round trip per HTTP call (the test client is in-process).
+import sys
+import pathlib
+import argparse
+import time
+import uuid
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import statements
+
+DASHBOARD = ["/api/auth/me", "/api/seats", "/api/reservations/mine"]
+
+
+def login(client) -> dict:
+    email = f"bench+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "bench", "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def separate(client, headers, rtt):
+    for path in DASHBOARD:
+        time.sleep(rtt)
+        client.get(path, headers=headers).raise_for_status()
+
+
+def batched(client, headers, rtt):
+    time.sleep(rtt)
+    r = client.post("/api/batch", json={"requests": [{"path": p} for p in DASHBOARD]}, headers=headers)
+    if r.status_code != 200 or any(x["status"] != 200 for x in r.json()["responses"]):
+        raise RuntimeError(r.text[:200])
+
+
+def measure(fn, client, headers, rtt, loads):
+    lat = []
+    token = statements.REGISTRY["token_by_value"]
+    before = token.executions
+    for _ in range(loads):
+        t0 = time.perf_counter()
+        fn(client, headers, rtt)
+        lat.append((time.perf_counter() - t0) * 1000)
+    return np.asarray(lat), (token.executions - before) / loads
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--loads", type=int, default=200, help="dashboard loads per variant")
+    parser.add_argument("--rtt-ms", type=float, nargs="+", default=[0, 20], help="simulated round trip per HTTP call")
+    args = parser.parse_args()
+    client = TestClient(app)
+    headers = login(client)
+    batched(client, headers, 0)  # warm caches and compiled statements
+    print(f"{args.loads} dashboard loads of {len(DASHBOARD)} calls")
+    for rtt in args.rtt_ms:
+        for label, fn in (("separate", separate), ("batch", batched)):
+            lat, lookups = measure(fn, client, headers, rtt / 1000, args.loads)
+            print(f"  rtt {rtt:>4g} ms  {label:<8}  p50 {np.percentile(lat, 50):>7.2f} ms  p99 {np.percentile(lat, 99):>7.2f} ms"
+                  f"  token lookups/load {lookups:.0f}")
+
+
+if __name__ == "__main__":
+    main()
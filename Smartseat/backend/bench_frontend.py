@@ -0,0 +1,68 @@
+# Benchmark: bytes on the wire for a page flow served from /app, cold vs repeat visit, against the raw files.
+# Run: python bench_frontend.py [--flow A01_signin_credentials.html B01_location.html ...]
+import sys
+import pathlib
+import argparse
+import re
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import static_assets
+
+FLOW = ["A01_signin_credentials.html", "B02_home.html", "B01_location.html", "B06_room_selection.html",
+        "B03_seat_selection.html", "B05_success.html", "B04_check_reservations.html"]
+LOCAL_REF = re.compile(r'(?:href|src)="((?!https?:|#|//)[^"]+\.(?:css|js|png|jpe?g|svg))"')
+
+
+def raw_bytes(flow) -> int:
+    """Every page and local asset downloaded in full, uncompressed (what a plain file server sends uncached)."""
+    root, total = static_assets.FRONTEND_DIR, 0
+    for page in flow:
+        html = (root / page).read_text(encoding="utf-8")
+        total += len(html.encode())
+        total += sum((root / ref).stat().st_size for ref in set(LOCAL_REF.findall(html)) if (root / ref).exists())
+    return total
+
+
+def visit(client, flow, cache: dict) -> tuple[int, int]:
+    """Walk the flow like a browser: immutable assets come from `cache`, pages revalidate. Returns (bytes, requests)."""
+    total = requests = 0
+    for page in flow:
+        headers = {"Accept-Encoding": "br, gzip"}
+        if page in cache:
+            headers["If-None-Match"] = cache[page]
+        r = client.get(f"/app/{page}", headers=headers)
+        requests += 1
+        total += int(r.headers.get("content-length", 0))
+        if r.status_code == 200:
+            cache[page] = r.headers["etag"]
+            cache[page + "#refs"] = sorted(set(LOCAL_REF.findall(r.text)))
+        for ref in cache[page + "#refs"]:
+            if ref in cache:
+                continue  # Cache-Control: immutable -> no request at all
+            a = client.get(f"/app/{ref}", headers={"Accept-Encoding": "br, gzip"})
+            requests += 1
+            total += int(a.headers.get("content-length", 0))
+            cache[ref] = a.headers["etag"]
+    return total, requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--flow", nargs="+", default=FLOW)
+    args = parser.parse_args()
+    client = TestClient(app)
+    static_assets.current()
+    cache: dict = {}
+    raw = raw_bytes(args.flow)
+    cold, cold_n = visit(client, args.flow, cache)
+    warm, warm_n = visit(client, args.flow, cache)
+    print(f"{len(args.flow)} pages, brotli {'on' if static_assets.brotli else 'off (gzip only)'}")
+    print(f"  raw files, uncached   {raw / 1024:>9.1f} KiB")
+    print(f"  /app first visit      {cold / 1024:>9.1f} KiB  {cold_n:>3} requests")
+    print(f"  /app repeat visit     {warm / 1024:>9.1f} KiB  {warm_n:>3} requests (pages revalidated, assets cached)")
+
+
+if __name__ == "__main__":
+    main()
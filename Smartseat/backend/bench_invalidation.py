@@ -0,0 +1,88 @@
+# Benchmark: seat-map read latency with N worker processes sharing one DB and the cache bus.
+# Each worker serves cached room seat maps and books/cancels its own seat every few reads;
+# every write invalidates the room in all other workers through CACHE_BUS.
+# Run: python bench_invalidation.py --workers 1 2 4 --seconds 5
+import os
+import sys
+import pathlib
+import argparse
+import multiprocessing as mp
+import tempfile
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+
+def worker(idx: int, seconds: float, write_every: int, out):
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend import invalidation
+
+    with TestClient(app) as client:  # runs the lifespan, so the bus is started
+        email = f"bench{idx}-{os.getpid()}@example.com"
+        client.post("/api/auth/signup", json={"name": "Bench", "email": email, "password": "secret123"})
+        token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        room_id = client.get("/api/campuses/singapore/rooms").json()[0]["id"]
+        seat_code = client.get(f"/api/rooms/{room_id}/seats").json()[idx]["seat_code"]
+
+        lat, writes, booking = [], 0, None
+        deadline = time.perf_counter() + seconds
+        i = 0
+        while time.perf_counter() < deadline:
+            i += 1
+            if i % write_every == 0:
+                if booking is None:
+                    r = client.post("/api/reservations", json={"seat_code": seat_code, "room_id": room_id}, headers=headers)
+                    booking = r.json()["id"] if r.status_code == 200 else None
+                else:
+                    client.delete(f"/api/reservations/{booking}", headers=headers)
+                    booking = None
+                writes += 1
+                continue
+            t0 = time.perf_counter()
+            client.get(f"/api/rooms/{room_id}/seats", params={"status": "available"})
+            lat.append(time.perf_counter() - t0)
+        if booking is not None:
+            client.delete(f"/api/reservations/{booking}", headers=headers)
+        out.put((lat, writes, invalidation.bus.received))
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--write-every", type=int, default=20, help="one booking/cancel per this many requests")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="ss-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ.setdefault("CACHE_BUS", "db")
+    os.environ["RATE_LIMIT"] = "0"
+    os.environ["RELEASE_SCHEDULER"] = "0"
+    from backend import seed
+    seed.run()
+
+    ctx = mp.get_context("spawn")
+    print(f"bus={os.environ['CACHE_BUS']}  {args.seconds:.0f}s per run, 1 write per {args.write_every} requests per worker")
+    print(f"{'workers':>7} {'reads':>8} {'writes':>7} {'recv':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for n in args.workers:
+        out = ctx.Queue()
+        procs = [ctx.Process(target=worker, args=(i, args.seconds, args.write_every, out)) for i in range(n)]
+        for p in procs:
+            p.start()
+        results = [out.get() for _ in procs]
+        for p in procs:
+            p.join()
+        lat = [x for r in results for x in r[0]]
+        writes = sum(r[1] for r in results)
+        received = sum(r[2] for r in results)
+        print(f"{n:>7} {len(lat):>8} {writes:>7} {received:>6} {pct(lat, 0.5):>8.2f} {pct(lat, 0.99):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
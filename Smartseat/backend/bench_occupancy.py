@@ -0,0 +1,57 @@
+# Benchmark: occupancy sweep (mean + instant) over millions of random reservation intervals, grouped by room/seat type.
+# Run: python bench_occupancy.py --intervals 10000000 --slot-minutes 15
+import sys
+import pathlib
+import argparse
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from backend import occupancy
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def naive_instant(starts, ends, t0, slot_s, n_slots):
+    # The per-slot loop the sweep replaces (one vectorized pass per slot, single group).
+    bounds = t0 + slot_s * np.arange(n_slots)
+    return np.array([np.count_nonzero((starts <= b) & (b < ends)) for b in bounds])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--intervals", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--slot-minutes", type=int, default=60)
+    parser.add_argument("--groups", type=int, default=60, help="room x seat type groups")
+    parser.add_argument("--naive-slots", type=int, default=200, help="slots to time the per-slot loop on (0 to skip)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    t0, slot_s = 1_700_000_000, args.slot_minutes * 60
+    n_slots = args.days * 86400 // slot_s
+    starts = t0 + rng.integers(0, args.days * 86400, size=args.intervals)
+    ends = starts + rng.integers(15 * 60, 4 * 3600, size=args.intervals)
+    groups = rng.integers(0, args.groups, size=args.intervals)
+    print(f"{args.intervals:,} intervals, {n_slots:,} slots of {args.slot_minutes} min, {args.groups} groups")
+
+    for how in occupancy.HOWS:
+        secs, grid = timed(lambda: occupancy.sweep(how, starts, ends, t0, slot_s, n_slots, groups=groups, n_groups=args.groups))
+        print(f"  sweep {how:<8} {secs:7.3f}s  ({args.intervals / secs / 1e6:.1f}M intervals/s, peak {grid.max():.1f} seats)")
+    secs, _ = timed(lambda: occupancy.sweep_instant(starts, ends, t0, slot_s, n_slots))
+    print(f"  sweep instant, one group {secs:7.3f}s")
+
+    if args.naive_slots:
+        k = min(args.naive_slots, n_slots)
+        secs, want = timed(lambda: naive_instant(starts, ends, t0, slot_s, k))
+        got = occupancy.sweep_instant(starts, ends, t0, slot_s, n_slots)[0, :k]
+        assert np.array_equal(want, got)
+        print(f"  per-slot loop over {k} slots {secs:7.3f}s -> {secs * n_slots / k:.1f}s estimated for all {n_slots:,} slots")
+
+
+if __name__ == "__main__":
+    main()
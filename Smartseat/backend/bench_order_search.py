@@ -0,0 +1,40 @@
+# Benchmark: wall time of the auto-order grid search vs worker processes (no cache).
+# Run: python bench_order_search.py --workers 1 2 4 --grid "p=0-2,d=0-1,q=0-2,P=0-1,D=0,Q=0-1"
+import sys
+import pathlib
+import argparse
+import os
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from backend import order_search
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--grid", default=order_search.DEFAULT_GRID)
+    parser.add_argument("--n", type=int, default=120, help="monthly observations")
+    parser.add_argument("--criterion", default="aic", choices=list(order_search.CRITERIA))
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    t = np.arange(args.n)
+    y = 10 + 0.05 * t + 2.0 * np.sin(2 * np.pi * t / 12) + 0.5 * rng.standard_normal(args.n)
+    series = pd.Series(y, index=pd.date_range("2000-01-01", periods=args.n, freq="MS"))
+    grid = order_search.parse_grid(args.grid, m=12)
+
+    print(f"{len(grid)} candidates, {args.n} observations, {os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'wall s':>8} {'speedup':>8}  best")
+    base = None
+    for w in args.workers:
+        res = order_search.search(series, [order_search.Candidate(c.order, c.seasonal_order) for c in grid],
+                                  criterion=args.criterion, workers=w, cache_dir=None)
+        base = base or res.elapsed_s
+        best = f"{res.best.order}x{res.best.seasonal_order}" if res.best else "-"
+        print(f"{w:>7} {res.elapsed_s:>8.2f} {base / res.elapsed_s:>7.2f}x  {best}")
+
+
+if __name__ == "__main__":
+    main()
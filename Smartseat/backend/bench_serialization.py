@@ -0,0 +1,80 @@
+# Benchmark: per-row cost of the seat list before/after the column-select + fast JSON path.
+# Run: python bench_serialization.py --rows 5000 --repeat 20
+import sys
+import json
+import pathlib
+import argparse
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from backend.database import Base
+from backend import models, schemas, fastjson
+from backend.routers.seats import SEAT_COLUMNS, seat_rows_to_dicts
+
+seat_list = TypeAdapter(list[schemas.SeatOut])
+
+
+def orm_path(db) -> bytes:
+    """What list_seats used to do: ORM objects -> SeatOut per row -> response_model validation -> json."""
+    out = []
+    for s in db.query(models.Seat).order_by(models.Seat.seat_code).all():
+        stype = s.seat_type.value if hasattr(s.seat_type, "value") else str(s.seat_type)
+        sstatus = s.status.value if hasattr(s.status, "value") else str(s.status)
+        out.append(schemas.SeatOut(id=s.id, seat_code=s.seat_code, seat_type=stype, status=sstatus))
+    validated = seat_list.validate_python(out)
+    return json.dumps(seat_list.dump_python(validated, mode="json")).encode("utf-8")
+
+
+def fast_path(db) -> bytes:
+    rows = db.execute(select(*SEAT_COLUMNS).order_by(models.Seat.seat_code)).all()
+    return fastjson.dumps(seat_rows_to_dicts(rows))
+
+
+def bench(fn, session_factory, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        db = session_factory()
+        try:
+            t0 = time.perf_counter()
+            fn(db)
+            best = min(best, time.perf_counter() - t0)
+        finally:
+            db.close()
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ORM vs column-select seat serialization.")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", future=True)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, future=True)
+    types = list(models.SeatType)
+    with Session() as db:
+        db.add_all(models.Seat(seat_code=f"S{i}", seat_type=types[i % len(types)],
+                               status=models.SeatStatus.booked if i % 3 == 0 else models.SeatStatus.available)
+                   for i in range(args.rows))
+        db.commit()
+
+    with Session() as db:
+        if json.loads(orm_path(db)) != json.loads(fast_path(db)):
+            raise SystemExit("ORM and fast paths disagree")
+
+    encoder = "orjson" if fastjson.orjson is not None else "json (stdlib fallback)"
+    print(f"rows={args.rows} repeat={args.repeat} encoder={encoder}")
+    results = {}
+    for name, fn in (("orm+pydantic", orm_path), ("columns+fastjson", fast_path)):
+        t = bench(fn, Session, args.repeat)
+        results[name] = t
+        print(f"{name:>18}: {t * 1000:8.2f} ms total, {t / args.rows * 1e6:6.2f} us/row")
+    print(f"speedup: {results['orm+pydantic'] / results['columns+fastjson']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# Benchmark: storage profiles (plain vs tuned SQLite, optionally pooled Postgres) on booking, polling and mixed load.
+# Run: python bench_storage.py --seconds 5 --bookers 16 --pollers 16 [--postgres-url postgresql+psycopg://.../scratch]
+# The Postgres URL must point at a scratch database: the benchmark creates and drops the app tables there.
+import os
+import sys
+import pathlib
+import argparse
+import random
+import tempfile
+import threading
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+from backend.database import Base
+from backend import models, storage, write_batcher
+
+SEATS = 400
+
+
+def setup(url: str, profile: str):
+    engine = storage.make_engine(url, profile)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False, future=True)
+    with Session() as db:
+        campus = models.Campus(code="bench", name="Bench")
+        db.add(campus)
+        db.flush()
+        room = models.Room(campus_id=campus.id, block="A", floor=1, code="A1-01")
+        db.add(room)
+        db.flush()
+        db.add_all(models.Seat(seat_code=f"S{i}", room_id=room.id, status=models.SeatStatus.available) for i in range(SEATS))
+        db.add_all(models.User(name=f"u{i}", email=f"u{i}@example.com", password_hash="x") for i in range(64))
+        db.commit()
+        seat_ids = db.execute(select(models.Seat.id)).scalars().all()
+        return engine, Session, room.id, seat_ids
+
+
+class Conflict(Exception):
+    pass
+
+
+def book_and_release(Session, seat_ids, rng, wb):
+    """Two requests: book a random seat (conditional claim + reservation), then release it. Returns False on conflict."""
+    sid, uid = rng.choice(seat_ids), rng.randint(1, 64)
+
+    def book(db):
+        claimed = db.execute(
+            update(models.Seat).where(models.Seat.id == sid, models.Seat.status == models.SeatStatus.available)
+            .values(status=models.SeatStatus.booked)
+        ).rowcount
+        if not claimed:
+            raise Conflict()
+        r = models.Reservation(user_id=uid, seat_id=sid, status=models.ReservationStatus.active)
+        db.add(r)
+        db.flush()
+        return r.id
+
+    def release(rid):
+        def intent(db):
+            db.execute(delete(models.Reservation).where(models.Reservation.id == rid))
+            db.execute(update(models.Seat).where(models.Seat.id == sid).values(status=models.SeatStatus.available))
+        return intent
+
+    with Session() as db:
+        try:
+            rid = write_batcher.execute(db, book, wb)
+        except Conflict:
+            return False
+    with Session() as db:
+        write_batcher.execute(db, release(rid), wb)
+    return True
+
+
+def poll(Session, room_id):
+    with Session() as db:
+        db.execute(
+            select(models.Seat.id, models.Seat.seat_code, models.Seat.status)
+            .where(models.Seat.room_id == room_id).order_by(models.Seat.seat_code)
+        ).all()
+    return True
+
+
+def drive(n_threads: int, seconds: float, op):
+    """Run op() in n_threads threads for `seconds`; returns (ops, latencies_ms, errors, conflicts)."""
+    lat, errors, conflicts, stop = [], [0], [0], time.perf_counter() + seconds
+    lock = threading.Lock()
+
+    def worker(seed):
+        rng = random.Random(seed)
+        mine = []
+        while time.perf_counter() < stop:
+            t0 = time.perf_counter()
+            try:
+                ok = op(rng)
+                mine.append((time.perf_counter() - t0) * 1000)
+                if not ok:
+                    with lock:
+                        conflicts[0] += 1
+            except OperationalError:  # "database is locked", pool timeouts, ...
+                with lock:
+                    errors[0] += 1
+        with lock:
+            lat.extend(mine)
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return len(lat), np.asarray(lat), errors[0], conflicts[0]
+
+
+def report(label, ops, lat, errors, conflicts, seconds):
+    if not ops:
+        print(f"  {label:<9} no successful ops, {errors} errors")
+        return
+    print(f"  {label:<9} {ops / seconds:>9.0f}/s  p50 {np.percentile(lat, 50):>7.2f} ms  p99 {np.percentile(lat, 99):>8.2f} ms"
+          f"  errors {errors:>4}  conflicts {conflicts:>4}")
+
+
+def bench_profile(url, profile, args):
+    engine, Session, room_id, seat_ids = setup(url, profile)
+    print(f"[{profile}] {engine.url.render_as_string(hide_password=True)}")
+    wb = write_batcher.WriteBatcher(write_batcher.dedicated_session_factory(engine), window_ms=args.write_batch_ms)
+    booking = lambda rng: book_and_release(Session, seat_ids, rng, wb)
+    polling = lambda rng: poll(Session, room_id)
+    report("booking", *drive(args.bookers, args.seconds, booking), args.seconds)
+    report("polling", *drive(args.pollers, args.seconds, polling), args.seconds)
+    results = {}
+
+    def run(name, n, op):
+        results[name] = drive(n, args.seconds, op)
+    mixed = [threading.Thread(target=run, args=("booking", args.bookers, booking)),
+             threading.Thread(target=run, args=("polling", args.pollers, polling))]
+    for t in mixed:
+        t.start()
+    for t in mixed:
+        t.join()
+    report("mixed/bk", *results["booking"], args.seconds)
+    report("mixed/pl", *results["polling"], args.seconds)
+    wb.stop()
+    Base.metadata.drop_all(engine)
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each workload")
+    parser.add_argument("--bookers", type=int, default=16, help="threads booking + releasing seats")
+    parser.add_argument("--pollers", type=int, default=16, help="threads polling the room's seat list")
+    parser.add_argument("--profiles", nargs="+", default=["plain", "sqlite"], choices=("plain", "sqlite"))
+    parser.add_argument("--write-batch-ms", type=float, default=0, help="route bookings through group commit (write_batcher)")
+    parser.add_argument("--postgres-url", default=None, help="scratch Postgres DB to also run the postgres profile on")
+    args = parser.parse_args()
+
+    print(f"{args.bookers} bookers, {args.pollers} pollers, {args.seconds:g}s per workload, {SEATS} seats, "
+          f"write batch {args.write_batch_ms:g} ms")
+    for profile in args.profiles:
+        path = os.path.join(tempfile.mkdtemp(prefix="ss-storagebench-"), "bench.db")
+        bench_profile(f"sqlite:///{path}", profile, args)
+    if args.postgres_url:
+        bench_profile(args.postgres_url, "postgres", args)
+
+
+if __name__ == "__main__":
+    main()
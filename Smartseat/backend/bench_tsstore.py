@@ -0,0 +1,113 @@
+# Benchmark: row-per-point timeseries table vs the chunked store (tsstore) for write, range read and size.
+# Run: python bench_tsstore.py --points 200000 --series 3
+import os
+import sys
+import pathlib
+import argparse
+import tempfile
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+from backend.database import Base
+from backend import models, tsstore
+
+
+def make_db(path: str, table):
+    engine = create_engine(f"sqlite:///{path}", future=True)
+    Base.metadata.create_all(engine, tables=[table])
+    return engine, sessionmaker(bind=engine, future=True)
+
+
+def timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return time.perf_counter() - t0, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=200_000, help="hourly points per series")
+    parser.add_argument("--series", type=int, default=3)
+    parser.add_argument("--window-days", type=int, default=90, help="range read length")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="ss-tsbench-")
+    rows_path, chunks_path = os.path.join(tmp, "rows.db"), os.path.join(tmp, "chunks.db")
+    _, RowSession = make_db(rows_path, models.TimeSeriesPoint.__table__)
+    _, ChunkSession = make_db(chunks_path, models.SeriesChunk.__table__)
+    start = np.datetime64("2020-01-01T00:00:00", "s")
+    ts = start + np.arange(args.points) * np.timedelta64(3600, "s")
+    rng = np.random.default_rng(0)
+    names = [f"room_{i}_hourly" for i in range(args.series)]
+    data = {n: rng.poisson(12, size=args.points).astype(float) for n in names}
+    py_ts = ts.astype("datetime64[us]").astype(object)
+
+    def write_rows():
+        with RowSession() as db:
+            for n in names:
+                db.execute(models.TimeSeriesPoint.__table__.insert(),
+                           [{"series_name": n, "ts": t, "value": float(v)} for t, v in zip(py_ts, data[n])])
+            db.commit()
+
+    def write_chunks():
+        with ChunkSession() as db:
+            for n in names:
+                tsstore.append(db, n, ts, data[n])
+            db.commit()
+
+    lo = ts[args.points // 2]
+    hi = lo + np.timedelta64(args.window_days * 86400, "s")
+    lo_dt, hi_dt = lo.astype(object), hi.astype(object)
+
+    def read_rows():
+        with RowSession() as db:
+            rows = db.query(models.TimeSeriesPoint).filter(
+                models.TimeSeriesPoint.series_name == names[0],
+                models.TimeSeriesPoint.ts >= lo_dt, models.TimeSeriesPoint.ts < hi_dt,
+            ).order_by(models.TimeSeriesPoint.ts).all()
+            return pd.Series([r.value for r in rows], index=pd.DatetimeIndex([r.ts for r in rows]))
+
+    def read_chunks():
+        with ChunkSession() as db:
+            return tsstore.read_series(db, names[0], lo, hi)
+
+    def read_full_rows():
+        with RowSession() as db:
+            rows = db.execute(select(models.TimeSeriesPoint.ts, models.TimeSeriesPoint.value)
+                              .where(models.TimeSeriesPoint.series_name == names[0])
+                              .order_by(models.TimeSeriesPoint.ts)).all()
+            return len(rows)
+
+    def read_full_chunks():
+        with ChunkSession() as db:
+            return len(tsstore.read_range(db, names[0])[0])
+
+    w_rows, _ = timed(write_rows)
+    w_chunks, _ = timed(write_chunks)
+    r_rows, s_rows = min((timed(read_rows) for _ in range(5)), key=lambda x: x[0])
+    r_chunks, s_chunks = min((timed(read_chunks) for _ in range(5)), key=lambda x: x[0])
+    f_rows, _ = min(timed(read_full_rows) for _ in range(3))
+    f_chunks, _ = min(timed(read_full_chunks) for _ in range(3))
+    if not (s_rows.index.equals(s_chunks.index) and np.array_equal(s_rows.values, s_chunks.values)):
+        raise SystemExit("range reads disagree")
+    with RowSession() as db:
+        n_rows = db.execute(select(func.count()).select_from(models.TimeSeriesPoint)).scalar()
+    with ChunkSession() as db:
+        n_chunks = db.execute(select(func.count()).select_from(models.SeriesChunk)).scalar()
+
+    total = args.points * args.series
+    print(f"{args.series} series x {args.points} hourly points, chunk={tsstore.CHUNK_SIZE}")
+    print(f"{'':24} {'row per point':>14} {'chunked':>10}")
+    print(f"{'DB rows':24} {n_rows:>14} {n_chunks:>10}")
+    print(f"{'write (µs/point)':24} {w_rows / total * 1e6:>14.2f} {w_chunks / total * 1e6:>10.2f}")
+    print(f"{f'{args.window_days}d range read (ms)':24} {r_rows * 1000:>14.2f} {r_chunks * 1000:>10.2f}")
+    print(f"{'full series read (ms)':24} {f_rows * 1000:>14.2f} {f_chunks * 1000:>10.2f}")
+    print(f"{'DB file (MB)':24} {os.path.getsize(rows_path) / 1e6:>14.2f} {os.path.getsize(chunks_path) / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
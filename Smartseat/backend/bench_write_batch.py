@@ -0,0 +1,94 @@
+# Benchmark: login-token writes/sec and latency with commit-per-request vs group commit at several batch windows.
+# Run: python bench_write_batch.py --threads 16 --writes 200 --windows 0 1 2 5 10 [--journal wal --synchronous normal]
+import os
+import sys
+import pathlib
+import argparse
+import tempfile
+import threading
+import time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from backend.database import Base
+from backend import models, storage, tokens, write_batcher
+
+
+def set_pragmas(journal: str, synchronous: str):
+    @event.listens_for(Engine, "connect")  # every engine, including the batcher's own
+    def pragmas(conn, _):
+        conn.execute(f"PRAGMA journal_mode={journal}")
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+
+
+def make_db(path: str):
+    engine = storage.make_engine(f"sqlite:///{path}", "plain")  # pragmas come from set_pragmas
+
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, future=True)
+    with Session() as db:
+        db.add_all(models.User(name=f"u{i}", email=f"u{i}@example.com", password_hash="x") for i in range(256))
+        db.commit()
+    return engine, Session
+
+
+def run_window(engine, Session, window_ms: float, threads: int, writes: int):
+    wb = write_batcher.WriteBatcher(write_batcher.dedicated_session_factory(engine), window_ms=window_ms)
+    latencies = [[] for _ in range(threads)]
+    errors = []
+    gate = threading.Barrier(threads + 1)
+
+    def worker(i):
+        gate.wait()
+        for _ in range(writes):
+            t0 = time.perf_counter()
+            db = Session()  # one session per request, like get_db
+            try:
+                user = db.get(models.User, i % 256 + 1)
+                write_batcher.execute(db, lambda wdb: tokens.issue_token(wdb, user).token, wb)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close()
+            latencies[i].append(time.perf_counter() - t0)
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in pool:
+        t.start()
+    gate.wait()
+    t0 = time.perf_counter()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    wb.stop()
+    lat = np.concatenate([np.asarray(x) for x in latencies]) * 1000
+    return elapsed, lat, errors, wb.stats
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=16, help="concurrent writers (request threads)")
+    parser.add_argument("--writes", type=int, default=200, help="writes per thread")
+    parser.add_argument("--windows", type=float, nargs="+", default=[0, 1, 2, 5, 10], help="WRITE_BATCH_MS values (0 = commit per request)")
+    parser.add_argument("--journal", default="delete", choices=("delete", "wal"))
+    parser.add_argument("--synchronous", default="full", choices=("full", "normal", "off"))
+    args = parser.parse_args()
+
+    set_pragmas(args.journal, args.synchronous)
+    total = args.threads * args.writes
+    print(f"{args.threads} threads x {args.writes} token writes, journal={args.journal} synchronous={args.synchronous}")
+    print(f"{'window':>8} {'writes/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'txns':>6} {'errors':>6}")
+    for window in args.windows:
+        tmp = tempfile.mkdtemp(prefix="ss-wbbench-")
+        engine, Session = make_db(os.path.join(tmp, "bench.db"))
+        elapsed, lat, errors, stats = run_window(engine, Session, window, args.threads, args.writes)
+        txns = stats["batches"] if window > 0 else total
+        print(f"{window:>6g}ms {total / elapsed:>10.0f} {np.percentile(lat, 50):>8.2f} {np.percentile(lat, 99):>8.2f} {txns:>6} {len(errors):>6}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
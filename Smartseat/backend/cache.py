@@ -0,0 +1,59 @@
+"""Small in-process caches for hot read endpoints.
+
+Entries are grouped by scope (e.g. a room id) so a write can drop exactly the
+entries it affects. A short TTL bounds staleness from writers this process
+never hears about (other workers, manual DB edits).
+"""
+from __future__ import annotations
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+ROOM_SEATS_TTL_S = float(os.getenv("ROOM_SEATS_CACHE_TTL_S", "30"))
+ROOM_SEATS_MAX_ROOMS = int(os.getenv("ROOM_SEATS_CACHE_ROOMS", "512"))
+
+
+class ScopedCache:
+    """scope -> {subkey: value} with per-entry TTL and LRU eviction of whole scopes."""
+
+    def __init__(self, ttl_s: float, max_scopes: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl_s = ttl_s
+        self.max_scopes = max_scopes
+        self.clock = clock
+        self._scopes: OrderedDict[Hashable, dict[Hashable, tuple[float, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, scope: Hashable, subkey: Hashable = None) -> Optional[Any]:
+        with self._lock:
+            entries = self._scopes.get(scope)
+            item = entries.get(subkey) if entries is not None else None
+            if item is None or item[0] < self.clock():
+                self.misses += 1
+                return None
+            self._scopes.move_to_end(scope)
+            self.hits += 1
+            return item[1]
+
+    def set(self, scope: Hashable, subkey: Hashable, value: Any) -> None:
+        with self._lock:
+            entries = self._scopes.setdefault(scope, {})
+            entries[subkey] = (self.clock() + self.ttl_s, value)
+            self._scopes.move_to_end(scope)
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+
+    def invalidate(self, scope: Hashable) -> None:
+        with self._lock:
+            self._scopes.pop(scope, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._scopes.clear()
+
+
+# Serialized seat-map payloads keyed by room id, then (seat_type, status) filter.
+room_seats = ScopedCache(ROOM_SEATS_TTL_S, ROOM_SEATS_MAX_ROOMS)
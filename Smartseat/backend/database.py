@@ -1,7 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from starlette.requests import Request
+from contextvars import ContextVar
 import os
+import threading
+import time
 from pathlib import Path
+from . import storage
 
 # Prefer env DATABASE_URL; otherwise use an absolute sqlite path anchored to project root (Smartseat/app.db)
 _env_url = os.getenv("DATABASE_URL")
@@ -12,16 +17,162 @@ else:
     proj_root = Path(__file__).resolve().parents[1]
     DB_URL = f"sqlite:///{(proj_root / 'app.db').as_posix()}"
 
-connect_args = {"check_same_thread": False} if DB_URL.startswith("sqlite") else {}
-
-engine = create_engine(DB_URL, echo=False, future=True, connect_args=connect_args)
+# Pool sizing, pragmas etc. come from the storage profile (DB_PROFILE, see storage.py)
+engine = storage.make_engine(DB_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, future=True)
 Base = declarative_base()
 
-def get_db():
-    from sqlalchemy.orm import Session
-    db: Session = SessionLocal()
+# Read/write routing. Read-only routes take get_read_db, which is bound to a separate pool:
+# READ_DATABASE_URL (a replica) when set, otherwise a read-only pool on the primary database
+# (for SQLite: a second set of connections with query_only=ON; under the default sqlite storage
+# profile the file is in WAL mode so those readers never block a booking's commit, under
+# DB_PROFILE=plain the journal mode is left alone). READ_ROUTING=0 sends everything to the primary.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+READ_ROUTING = os.getenv("READ_ROUTING", "1").strip().lower() in ("1", "true", "yes", "on")
+READ_PIN_S = float(os.getenv("READ_PIN_S", "5"))  # after a write, that caller reads from the primary this long
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_sqlite_file = storage.is_sqlite_file(DB_URL)
+
+if READ_ROUTING and (READ_DATABASE_URL or _sqlite_file or not DB_URL.startswith("sqlite")):
+    read_engine = storage.make_engine(READ_DATABASE_URL or DB_URL)
+
+    @event.listens_for(read_engine, "connect")
+    def _read_only(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        if read_engine.dialect.name == "sqlite":
+            cur.execute("PRAGMA query_only=ON")
+        else:
+            cur.execute("SET SESSION CHARACTERISTICS AS TRANSACTION READ ONLY")
+        cur.close()
+else:
+    read_engine = engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine, future=True)
+
+# Read-your-writes: callers (keyed by their Authorization header) that just sent a write are
+# pinned to the primary for READ_PIN_S, so a lagging replica cannot hide their own booking.
+# Pins are per process; a replica with more lag than READ_PIN_S needs a longer pin.
+_pins: dict[str, float] = {}
+_pins_lock = threading.Lock()
+
+def pin_primary(key: str, seconds: float | None = None):
+    until = time.monotonic() + (READ_PIN_S if seconds is None else seconds)
+    with _pins_lock:
+        if len(_pins) > 10000:
+            now = time.monotonic()
+            for k in [k for k, t in _pins.items() if t <= now]:
+                del _pins[k]
+        _pins[key] = until
+
+def is_pinned(key: str | None) -> bool:
+    return bool(key) and _pins.get(key, 0.0) > time.monotonic()
+
+# Set by /api/batch around each sub-request: get_db / get_read_db hand out this session
+# (owned and closed by the batch) instead of opening their own.
+batch_session: ContextVar = ContextVar("batch_session", default=None)
+
+def get_db(request: Request):
+    """Read-write session on the primary. Unsafe methods pin their caller's reads to the primary."""
+    shared = batch_session.get()
+    if shared is not None:
+        yield shared
+        return
+    key = request.headers.get("authorization") if request.method not in SAFE_METHODS else None
+    if key:
+        pin_primary(key)
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        if key:
+            pin_primary(key)  # count the window from the end of the write
+
+def reads_primary(db) -> bool:
+    """True if `db` sees every commit on the primary (not a replica that may lag), so results may be cached."""
+    bind = db.get_bind()
+    return bind is engine or (bind is read_engine and not READ_DATABASE_URL)
+
+def get_read_db(request: Request):
+    """Session for read-only routes: the read pool/replica, or the primary for a pinned caller."""
+    shared = batch_session.get()
+    if shared is not None:
+        yield shared
+        return
+    factory = SessionLocal if is_pinned(request.headers.get("authorization")) else ReadSessionLocal
+    db = factory()
     try:
         yield db
     finally:
         db.close()
+
+def sync_schema(bind=None):
+    """create_all plus a light additive migration for tables that already exist.
+
+    create_all never alters existing tables, so columns/indexes added to models later
+    (e.g. tokens.expires_at) would be missing from an older app.db. Add any missing
+    nullable columns, create missing indexes, rebuild indexes whose uniqueness
+    changed and drop unique constraints the model no longer has (e.g.
+    reservations' old (seat_id, status) one, now a partial index). On SQLite a
+    table whose primary key or AUTOINCREMENT differs from the model (e.g.
+    reservations_archive's surrogate key) is rebuilt with its rows; anything
+    destructive to data stays manual.
+    """
+    from sqlalchemy import UniqueConstraint, inspect, text
+    from . import models  # noqa: F401  (register every table on Base.metadata)
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    insp = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not insp.has_table(table.name):
+                continue
+            wanted = {frozenset(c.columns.keys()) for c in table.constraints if isinstance(c, UniqueConstraint)}
+            stale = [u["name"] for u in insp.get_unique_constraints(table.name)
+                     if u["name"] and frozenset(u["column_names"]) not in wanted]
+            if conn.dialect.name == "sqlite" and (stale or _sqlite_key_changed(conn, table, insp)):
+                # SQLite cannot drop a constraint or change a key: rebuild the table and copy the rows over.
+                _rebuild_sqlite_table(conn, table, insp)
+                continue
+            for name in stale:
+                conn.execute(text(f'ALTER TABLE {table.name} DROP CONSTRAINT {name}'))
+            existing_cols = {c["name"] for c in insp.get_columns(table.name)}
+            for col in table.columns:
+                if col.name in existing_cols or not col.nullable:
+                    continue
+                col_type = col.type.compile(dialect=conn.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type}'))
+            existing_idx = {ix["name"]: ix for ix in insp.get_indexes(table.name)}
+            for index in table.indexes:
+                current = existing_idx.get(index.name)
+                if current is not None and bool(current.get("unique")) != bool(index.unique):
+                    # e.g. seats.seat_code went from globally unique to unique per room
+                    index.drop(bind=conn)
+                index.create(bind=conn, checkfirst=True)
+
+
+def _sqlite_key_changed(conn, table, insp) -> bool:
+    """Primary key columns or AUTOINCREMENT differ between the SQLite table and the model."""
+    from sqlalchemy import text
+    if insp.get_pk_constraint(table.name)["constrained_columns"] != [c.name for c in table.primary_key.columns]:
+        return True
+    if not table.dialect_options["sqlite"]["autoincrement"]:
+        return False
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                       {"name": table.name}).scalar()
+    return "AUTOINCREMENT" not in (sql or "").upper()
+
+
+def _rebuild_sqlite_table(conn, table, insp):
+    """Recreate `table` from the model and copy its rows (columns present in both)."""
+    from sqlalchemy import text
+    old = f"_{table.name}_old"
+    old_cols = {c["name"] for c in insp.get_columns(table.name)}
+    old_indexes = [ix["name"] for ix in insp.get_indexes(table.name)]
+    conn.execute(text(f'ALTER TABLE {table.name} RENAME TO {old}'))
+    for name in old_indexes:  # index names are global in SQLite and would clash with the new ones
+        conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+    table.create(bind=conn)
+    cols = ", ".join(c.name for c in table.columns if c.name in old_cols)
+    conn.execute(text(f'INSERT INTO {table.name} ({cols}) SELECT {cols} FROM {old}'))
+    conn.execute(text(f'DROP TABLE {old}'))
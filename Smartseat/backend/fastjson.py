@@ -0,0 +1,37 @@
+"""Fast JSON responses for read-heavy endpoints.
+
+Routes that already produce plain dicts/tuples from column selects can hand the
+result to `json_response` and skip pydantic validation + FastAPI re-serialization.
+Uses orjson when installed and falls back to the stdlib encoder otherwise.
+"""
+from __future__ import annotations
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def _default(obj: Any):
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def json_response(obj: Any, status_code: int = 200) -> Response:
+    """Serialize straight to bytes; the route's response_model is then only used for the OpenAPI schema."""
+    return Response(content=dumps(obj), status_code=status_code, media_type="application/json")
@@ -0,0 +1,350 @@
+"""Cross-worker cache invalidation bus.
+
+Per-process caches (room seat maps in cache.py, spatial indexes in seatmap.py)
+are updated in place by the worker that makes a write. Every other worker learns
+about the write through this bus and drops its copy of the affected scope.
+
+Backends, picked with CACHE_BUS:
+  db (default)        cache_versions table: each publish appends a row, every worker
+                      polls for ids above the last one it saw (CACHE_BUS_POLL_S).
+                      Needs nothing beyond the app database.
+  local               single process only; publish is a no-op for other processes.
+  redis://host:port   Redis PUBLISH/SUBSCRIBE via a minimal RESP client (no extra
+                      dependency). resp_standin.py is a local stand-in for tests.
+
+Messages carry the publishing process' origin id, and a worker ignores its own
+messages because it has already applied the change locally.
+
+Writers pass their session (publish(scope, key, db=session)) before committing:
+the db bus then adds its row to that transaction, so a booking costs one commit,
+not two, and the message exists exactly when the write does. Other buses send
+after that session commits.
+"""
+from __future__ import annotations
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import delete, event, func, or_, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import CacheVersion
+
+log = logging.getLogger("smartseat.invalidation")
+
+BUS_URL = os.getenv("CACHE_BUS", "db")
+POLL_S = float(os.getenv("CACHE_BUS_POLL_S", "0.25"))
+RETAIN_S = float(os.getenv("CACHE_BUS_RETAIN_S", "600"))
+GAP_S = float(os.getenv("CACHE_BUS_GAP_S", "10"))
+CHANNEL = os.getenv("CACHE_BUS_CHANNEL", "smartseat:invalidate")
+
+Handler = Callable[[str], None]
+
+
+class InvalidationBus:
+    """Base bus: routes received (scope, key) messages to registered handlers."""
+
+    def __init__(self, origin: Optional[str] = None):
+        self.origin = origin or uuid.uuid4().hex[:16]
+        self._handlers: dict[str, list[Handler]] = {}
+        self.received = 0
+
+    def register(self, scope: str, handler: Handler) -> None:
+        self._handlers.setdefault(scope, []).append(handler)
+
+    def publish(self, scope: str, key) -> None:
+        raise NotImplementedError
+
+    def publish_in(self, db: Session, scope: str, key) -> None:
+        """Publish once `db` commits (nothing is sent if it never does)."""
+        event.listen(db, "after_commit", lambda _session: self.publish(scope, key), once=True)
+
+    def deliver(self, origin: str, scope: str, key: str) -> None:
+        if origin == self.origin:
+            return
+        self.received += 1
+        for handler in self._handlers.get(scope, ()):
+            try:
+                handler(key)
+            except Exception:
+                log.exception("invalidation handler for %s failed", scope)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class LocalBus(InvalidationBus):
+    """Single-process deployments: the writer already updated its own caches."""
+
+    def publish(self, scope: str, key) -> None:
+        pass
+
+    def publish_in(self, db: Session, scope: str, key) -> None:
+        pass
+
+
+class _Poller(InvalidationBus):
+    def __init__(self, origin: Optional[str] = None, poll_s: float = POLL_S):
+        super().__init__(origin)
+        self.poll_s = poll_s
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def poll_once(self) -> int:
+        raise NotImplementedError
+
+    def _loop(self):
+        while not self._stop.wait(self.poll_s):
+            try:
+                self.poll_once()
+            except Exception:
+                log.exception("invalidation poll failed")
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="cache-bus", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+class DBBus(_Poller):
+    """Append-only version table: row id is the global version, readers poll id > last seen.
+
+    Ids must never be handed out twice, or readers past them would skip the new rows:
+    the table is AUTOINCREMENT on SQLite and pruning always keeps the newest row (older
+    databases without AUTOINCREMENT reuse ids only once the table is empty). On Postgres
+    ids are allocated before commit, so a smaller id can become visible after a larger
+    one: ids skipped over are re-checked for GAP_S seconds before being given up on
+    (a rolled-back publish leaves a gap that never fills).
+    """
+
+    def __init__(self, session_factory=SessionLocal, origin: Optional[str] = None, poll_s: float = POLL_S,
+                 retain_s: float = RETAIN_S, gap_s: float = GAP_S):
+        super().__init__(origin, poll_s)
+        self.session_factory = session_factory
+        self.retain = timedelta(seconds=retain_s)
+        self.gap_s = gap_s
+        self.last_id: Optional[int] = None
+        self._gaps: dict[int, float] = {}  # skipped id -> when it was first missed
+        self._last_prune = 0.0
+
+    def publish_in(self, db: Session, scope: str, key) -> None:
+        db.add(CacheVersion(scope=scope, key=str(key), origin=self.origin))  # commits with the write
+
+    def publish(self, scope: str, key) -> None:
+        db = self.session_factory()
+        try:
+            db.add(CacheVersion(scope=scope, key=str(key), origin=self.origin))
+            db.commit()
+        except Exception:
+            db.rollback()
+            log.exception("failed to publish invalidation %s:%s", scope, key)
+        finally:
+            db.close()
+
+    def poll_once(self) -> int:
+        db = self.session_factory()
+        try:
+            if self.last_id is None:
+                # Start from "now": anything older predates this process' caches.
+                self.last_id = db.execute(select(func.max(CacheVersion.id))).scalar() or 0
+                return 0
+            newer = CacheVersion.id > self.last_id
+            rows = db.execute(
+                select(CacheVersion.id, CacheVersion.origin, CacheVersion.scope, CacheVersion.key)
+                .where(or_(newer, CacheVersion.id.in_(list(self._gaps))) if self._gaps else newer)
+                .order_by(CacheVersion.id).limit(1000)
+            ).all()
+            if time.monotonic() - self._last_prune > self.retain.total_seconds() / 4:
+                self._last_prune = time.monotonic()
+                newest = select(func.max(CacheVersion.id)).scalar_subquery()
+                db.execute(delete(CacheVersion).where(
+                    CacheVersion.created_at < datetime.now(timezone.utc) - self.retain, CacheVersion.id < newest))
+                db.commit()
+        finally:
+            db.close()
+        now = time.monotonic()
+        for vid, origin, scope, key in rows:
+            if vid <= self.last_id:
+                self._gaps.pop(vid, None)  # a late commit filled a gap
+            else:
+                for missing in range(self.last_id + 1, min(vid, self.last_id + 1 + 1000)):
+                    self._gaps[missing] = now
+                self.last_id = vid
+            self.deliver(origin, scope, key)
+        for vid in [v for v, t in self._gaps.items() if now - t > self.gap_s]:
+            del self._gaps[vid]
+        return len(rows)
+
+    def start(self) -> None:
+        self.poll_once()  # pin last_id before serving
+        super().start()
+
+
+def _resp_command(*parts: str) -> bytes:
+    out = [f"*{len(parts)}\r\n".encode()]
+    for p in parts:
+        b = p.encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+    return b"".join(out)
+
+
+def read_resp(f):
+    """Read one RESP value from a binary file-like object."""
+    line = f.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RuntimeError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        n = int(rest)
+        if n < 0:
+            return None
+        data = f.read(n + 2)
+        return data[:-2].decode("utf-8")
+    if kind == b"*":
+        n = int(rest)
+        return None if n < 0 else [read_resp(f) for _ in range(n)]
+    raise RuntimeError(f"bad RESP line {line!r}")
+
+
+class RedisBus(InvalidationBus):
+    """PUBLISH on write, SUBSCRIBE on a background connection. Speaks RESP directly."""
+
+    def __init__(self, url: str, origin: Optional[str] = None, channel: Optional[str] = None):
+        super().__init__(origin)
+        u = urlparse(url)
+        self.host = u.hostname or "127.0.0.1"
+        self.port = u.port or 6379
+        self.channel = channel or CHANNEL
+        self._pub: Optional[socket.socket] = None
+        self._pub_file = None
+        self._pub_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sub: Optional[socket.socket] = None
+        self._subscribed = threading.Event()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=5)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock, sock.makefile("rb")
+
+    def publish(self, scope: str, key) -> None:
+        payload = f"{self.origin}|{scope}|{key}"
+        with self._pub_lock:
+            for attempt in (1, 2):
+                try:
+                    if self._pub is None:
+                        self._pub, self._pub_file = self._connect()
+                    self._pub.sendall(_resp_command("PUBLISH", self.channel, payload))
+                    read_resp(self._pub_file)
+                    return
+                except (OSError, ConnectionError):
+                    self._close_pub()
+                    if attempt == 2:
+                        log.exception("failed to publish invalidation %s:%s", scope, key)
+
+    def _close_pub(self):
+        if self._pub is not None:
+            try:
+                self._pub.close()
+            except OSError:
+                pass
+        self._pub, self._pub_file = None, None
+
+    def _loop(self):
+        backoff = 0.1
+        while not self._stop.is_set():
+            try:
+                sock, f = self._connect()
+                self._sub = sock
+                sock.settimeout(None)
+                sock.sendall(_resp_command("SUBSCRIBE", self.channel))
+                read_resp(f)  # subscribe confirmation
+                self._subscribed.set()
+                backoff = 0.1
+                while not self._stop.is_set():
+                    msg = read_resp(f)
+                    if isinstance(msg, list) and len(msg) == 3 and msg[0] == "message":
+                        origin, scope, key = msg[2].split("|", 2)
+                        self.deliver(origin, scope, key)
+            except (OSError, ConnectionError, RuntimeError, ValueError):
+                self._subscribed.clear()
+                if self._stop.wait(backoff):
+                    return
+                backoff = min(backoff * 2, 5.0)
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name="cache-bus-redis", daemon=True)
+            self._thread.start()
+            self._subscribed.wait(timeout=2)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._close_pub()
+        if self._sub is not None:
+            try:
+                self._sub.shutdown(socket.SHUT_RDWR)  # unblocks the subscriber's read
+            except OSError:
+                pass
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def make_bus(url: str = BUS_URL) -> InvalidationBus:
+    if url.startswith("redis://"):
+        return RedisBus(url)
+    if url == "local":
+        return LocalBus()
+    if url == "db":
+        return DBBus()
+    raise ValueError(f"Unknown CACHE_BUS {url!r} (expected db, local or redis://host:port)")
+
+
+def _drop_room(key: str) -> None:
+    from . import cache, seatmap
+    room_id = None if key in ("", "None") else int(key)
+    cache.room_seats.invalidate(room_id)
+    if room_id is not None:
+        seatmap.invalidate(room_id)
+
+
+def register_default_handlers(b: InvalidationBus) -> InvalidationBus:
+    b.register("room", _drop_room)
+    return b
+
+
+bus = register_default_handlers(make_bus())
+
+
+def publish(scope: str, key, db: Optional[Session] = None) -> None:
+    """Tell other workers `scope:key` changed; pass the writer's session to publish with its commit."""
+    if db is None:
+        bus.publish(scope, key)
+    else:
+        bus.publish_in(db, scope, key)
@@ -1,11 +1,47 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from backend.database import engine, Base
-from backend import models
-from backend.routers import auth, users, seats, reservations, moderation, forecast, demo
+from backend.database import engine, read_engine, SessionLocal, sync_schema
+from backend import backtest as backtest_engine
+from backend import archive, invalidation, models, profiling, querydiag, ratelimit, release_scheduler, static_assets, tokens, write_batcher
+from backend.routers import auth, users, seats, rooms, reservations, moderation, forecast, demo, backtest, diagnostics, frontend, batch
 import logging
 
-app = FastAPI(title="Take-A-Seat Backend", version="0.1.0")
+token_purger = tokens.TokenPurger(SessionLocal)
+archiver = archive.Archiver(SessionLocal)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    invalidation.bus.start()  # hear about other workers' writes before serving cached reads
+    token_purger.start()
+    archiver.start()  # moves finished reservations older than ARCHIVE_AFTER_DAYS to reservations_archive
+    if release_scheduler.ENABLED:
+        release_scheduler.scheduler.start()  # loads active reservations, releases overdue seats
+    if write_batcher.batcher.enabled:
+        write_batcher.batcher.start()  # group commit for bookings/logins (WRITE_BATCH_MS)
+    if static_assets.ENABLED:
+        try:
+            static_assets.current()  # build (or reuse) the hashed, precompressed front end before the first page load
+        except Exception:
+            logging.exception("Front-end build failed; /app will retry on first request")
+    try:
+        yield
+    finally:
+        write_batcher.batcher.stop()  # flushes intents already queued
+        backtest_engine.shutdown_pool()
+        release_scheduler.scheduler.stop()
+        archiver.stop()
+        token_purger.stop()
+        invalidation.bus.stop()
+
+
+app = FastAPI(title="Take-A-Seat Backend", version="0.1.0", lifespan=lifespan)
+
+# Admission control: shed auth/booking bursts with 429 before they reach the DB.
+# Added before CORS so CORS stays outermost and 429s still carry CORS headers.
+if ratelimit.ENABLED:
+    app.add_middleware(ratelimit.RateLimitMiddleware)
 
 # CORS for local dev; tighten in prod
 app.add_middleware(
@@ -16,20 +52,34 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# create tables safely
+# Opt-in SQL diagnostics (QUERY_DIAG=1): N+1 / slow-query logging and per-route query budgets
+if querydiag.ENABLED:
+    querydiag.install(engine, read_engine)  # GET routes run on the read pool (get_read_db)
+    app.add_middleware(querydiag.QueryDiagMiddleware)
+
+# create tables safely (and add columns/indexes introduced since the DB was created)
 try:
-    Base.metadata.create_all(bind=engine)
+    sync_schema()
 except Exception as e:
     logging.exception("Failed to create DB tables: %s", e)
 
 # Routers
-app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(seats.router)
-app.include_router(reservations.router)
-app.include_router(moderation.router)
-app.include_router(forecast.router)
-app.include_router(demo.router)
+routers = [auth.router, users.router, seats.router, rooms.router, reservations.router, moderation.router,
+           forecast.router, demo.router, backtest.router, diagnostics.router, batch.router]
+# The pages themselves, same origin as the API (no CORS preflights): /app/A01_signin_credentials.html ...
+if static_assets.ENABLED:
+    routers.append(frontend.router)
+
+# Opt-in per-request profiling (PROFILING=1): cProfile + SQL timeline for flagged or sampled requests.
+# Endpoints are wrapped before include_router copies them; the middleware is added last so it
+# is outermost and times the whole request.
+if profiling.ENABLED:
+    profiling.install(engine, read_engine)
+    profiling.wrap_endpoints(*routers)
+    app.add_middleware(profiling.ProfilingMiddleware)
+
+for router in routers:
+    app.include_router(router)
 
 @app.get("/")
 def root():
@@ -1,6 +1,6 @@
 from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy import String, Integer, ForeignKey, DateTime, UniqueConstraint, Text, Enum
-from sqlalchemy.sql import func
+from sqlalchemy import String, Integer, BigInteger, Float, LargeBinary, ForeignKey, DateTime, UniqueConstraint, Index, Text, Enum
+from sqlalchemy.sql import func, text
 from .database import Base
 import enum
 from datetime import datetime
@@ -18,6 +18,7 @@ class SeatStatus(str, enum.Enum):
 class ReservationStatus(str, enum.Enum):
     active = "active"
     cancelled = "cancelled"
+    completed = "completed"  # end_time passed; seat released by release_scheduler
 
 class User(Base):
     __tablename__ = "users"
@@ -34,20 +35,69 @@ class Token(Base):
     __tablename__ = "tokens"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     token: Mapped[str] = mapped_column(String(64), unique=True, index=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # NULL only for tokens issued before expiry existed; those age out from created_at (see tokens.py)
+    expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
     user = relationship("User", back_populates="tokens")
 
+class SeatShare(Base):
+    """owner lets viewer see where they sit (recommendations near a friend); opt-in, one row per pair."""
+    __tablename__ = "seat_shares"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    owner_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
+    viewer_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("viewer_id", "owner_id", name="uq_seat_share_viewer_owner"),
+    )
+
+class Campus(Base):
+    __tablename__ = "campuses"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    code: Mapped[str] = mapped_column(String(32), unique=True, index=True)  # e.g., singapore
+    name: Mapped[str] = mapped_column(String(100))
+    address: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+
+    rooms = relationship("Room", back_populates="campus", cascade="all, delete-orphan")
+
+class Room(Base):
+    __tablename__ = "rooms"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    campus_id: Mapped[int] = mapped_column(ForeignKey("campuses.id"), index=True)
+    block: Mapped[str] = mapped_column(String(8))  # e.g., A
+    floor: Mapped[int] = mapped_column(Integer)
+    code: Mapped[str] = mapped_column(String(20))  # e.g., A1-01 (block, floor, room number)
+    name: Mapped[Optional[str]] = mapped_column(String(100), nullable=True)
+
+    campus = relationship("Campus", back_populates="rooms")
+    seats = relationship("Seat", back_populates="room")
+
+    __table_args__ = (
+        UniqueConstraint("campus_id", "code", name="uq_room_campus_code"),
+        Index("ix_rooms_campus_block_floor", "campus_id", "block", "floor"),
+    )
+
 class Seat(Base):
     __tablename__ = "seats"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    seat_code: Mapped[str] = mapped_column(String(10), unique=True, index=True)  # e.g., A1
+    # Unique per room (see uq_seats_room_seat_code), so every room can have its own A1.
+    seat_code: Mapped[str] = mapped_column(String(10), index=True)  # e.g., A1
+    room_id: Mapped[Optional[int]] = mapped_column(ForeignKey("rooms.id"), nullable=True)
     seat_type: Mapped[SeatType] = mapped_column(Enum(SeatType), default=SeatType.standard)
     status: Mapped[SeatStatus] = mapped_column(Enum(SeatStatus), default=SeatStatus.available)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
+    room = relationship("Room", back_populates="seats")
     reservations = relationship("Reservation", back_populates="seat")
 
+    __table_args__ = (
+        Index("uq_seats_room_seat_code", "room_id", "seat_code", unique=True),
+        # Seat-map loads filter by room (and usually status); keep them to one room's rows.
+        Index("ix_seats_room_status", "room_id", "status"),
+    )
+
 class Reservation(Base):
     __tablename__ = "reservations"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -62,5 +112,65 @@ class Reservation(Base):
     seat = relationship("Seat", back_populates="reservations")
 
     __table_args__ = (
-        UniqueConstraint("seat_id", "status", name="uq_seat_active_when_reserved"),
+        # One active reservation per seat; cancelled/completed history is unconstrained.
+        Index("uq_reservations_active_seat", "seat_id", unique=True,
+              sqlite_where=text("status = 'active'"), postgresql_where=text("status = 'active'")),
+        {"sqlite_autoincrement": True},  # never hand out an id again once its row was archived
+    )
+
+class ReservationArchive(Base):
+    """Finished reservations moved out of `reservations` by archive.py; `id` is the original reservation id, no FKs."""
+    __tablename__ = "reservations_archive"
+    archive_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    id: Mapped[int] = mapped_column(Integer)  # not unique: databases from before AUTOINCREMENT may have reused ids
+    user_id: Mapped[int] = mapped_column(Integer)
+    seat_id: Mapped[int] = mapped_column(Integer)
+    start_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    end_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), nullable=True)
+    status: Mapped[ReservationStatus] = mapped_column(Enum(ReservationStatus))
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index("ix_reservations_archive_start", "start_time"),
+        Index("ix_reservations_archive_id", "id"),
+    )
+
+class CacheVersion(Base):
+    """Append-only invalidation log for the DB cache bus (invalidation.DBBus); id is the global version."""
+    __tablename__ = "cache_versions"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    scope: Mapped[str] = mapped_column(String(32))  # e.g., room
+    key: Mapped[str] = mapped_column(String(64))
+    origin: Mapped[str] = mapped_column(String(32))  # publishing process
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+    __table_args__ = {"sqlite_autoincrement": True}  # never reuse a version, even after pruning
+
+class TimeSeriesPoint(Base):
+    """One aggregated value per (series_name, ts); see tsstore.SeriesChunk for the chunked store."""
+    __tablename__ = "timeseries"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    series_name: Mapped[str] = mapped_column(String(100), index=True)
+    ts: Mapped[datetime] = mapped_column(DateTime, index=True)
+    value: Mapped[float] = mapped_column(Float)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    __table_args__ = (
+        UniqueConstraint("series_name", "ts", name="uq_series_ts"),
+    )
+
+class SeriesChunk(Base):
+    """Up to tsstore.CHUNK_SIZE points of one series as compressed arrays (see tsstore.py)."""
+    __tablename__ = "ts_chunks"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    series_name: Mapped[str] = mapped_column(String(100))
+    chunk_no: Mapped[int] = mapped_column(Integer)  # 0, 1, 2 ... in time order
+    start_ts: Mapped[int] = mapped_column(BigInteger)  # epoch seconds (UTC) of first point
+    end_ts: Mapped[int] = mapped_column(BigInteger)  # epoch seconds (UTC) of last point
+    count: Mapped[int] = mapped_column(Integer)
+    ts_data: Mapped[bytes] = mapped_column(LargeBinary)
+    value_data: Mapped[bytes] = mapped_column(LargeBinary)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    __table_args__ = (
+        UniqueConstraint("series_name", "chunk_no", name="uq_ts_chunk"),
+        Index("ix_ts_chunks_series_end", "series_name", "end_ts"),
     )
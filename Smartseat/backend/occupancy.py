@@ -0,0 +1,212 @@
+"""Concurrent seat occupancy from reservation intervals.
+
+Every non-cancelled reservation is an interval [start_time, end_time) (still-open
+ones end "now"). Occupancy over a grid of slots (e.g. 15 or 60 minutes) is
+computed with a sweep line in NumPy, never with a Python loop over slots or
+intervals:
+
+  instant   seats occupied at each slot boundary. Each interval adds +1 at the
+            first boundary >= start and -1 at the first boundary >= end; one
+            bincount over (group, slot) plus a cumsum gives every group at once.
+  mean      average seats occupied during each slot (seat-seconds / slot length).
+            With starts and ends sorted, the occupied seat-seconds before time b
+            are sum(max(0, b - start)) - sum(max(0, b - end)); each sum is
+            count * b - prefix_sum, found with searchsorted, and slot values are
+            differences between consecutive boundaries.
+
+Both are O(N log N + slots) and exact in integer seconds. Groups are
+(room_id, seat_type).
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+from sqlalchemy import BigInteger, case, cast, extract, func, select
+from sqlalchemy.orm import Session
+
+from . import archive, models
+
+SEAT_TYPES = [t.value for t in models.SeatType]
+HOWS = ("mean", "instant")
+
+
+@dataclass
+class Intervals:
+    starts: np.ndarray  # int64 epoch seconds
+    ends: np.ndarray  # int64 epoch seconds, > starts
+    room_ids: np.ndarray  # int64
+    seat_types: np.ndarray  # int8 index into SEAT_TYPES
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def _slot_index(t: np.ndarray, t0: int, slot_s: int, n_slots: int) -> np.ndarray:
+    """Index of the first slot boundary >= t, clipped to [0, n_slots]."""
+    return np.clip(-((t0 - t) // slot_s), 0, n_slots)
+
+
+def sweep_instant(starts, ends, t0: int, slot_s: int, n_slots: int, groups=None, n_groups: int = 1) -> np.ndarray:
+    """Occupied seats at t0 + k*slot_s, shape (n_groups, n_slots)."""
+    starts, ends = np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64)
+    groups = np.zeros(len(starts), dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+    width = n_slots + 1
+    up = groups * width + _slot_index(starts, t0, slot_s, n_slots)
+    down = groups * width + _slot_index(ends, t0, slot_s, n_slots)
+    delta = np.bincount(up, minlength=n_groups * width) - np.bincount(down, minlength=n_groups * width)
+    return np.cumsum(delta.reshape(n_groups, width), axis=1)[:, :n_slots]
+
+
+def _busy_before(sorted_starts: np.ndarray, sorted_ends: np.ndarray, bounds: np.ndarray) -> np.ndarray:
+    """Seat-seconds occupied before each bound: sum(max(0, b - s)) - sum(max(0, b - e))."""
+    out = np.zeros(len(bounds), dtype=np.int64)
+    for xs, sign in ((sorted_starts, 1), (sorted_ends, -1)):
+        prefix = np.concatenate(([0], np.cumsum(xs)))
+        cnt = np.searchsorted(xs, bounds, side="left")
+        out += sign * (cnt * bounds - prefix[cnt])
+    return out
+
+
+def sweep_mean(starts, ends, t0: int, slot_s: int, n_slots: int, groups=None, n_groups: int = 1) -> np.ndarray:
+    """Average occupied seats over [t0 + k*slot_s, t0 + (k+1)*slot_s), shape (n_groups, n_slots)."""
+    starts, ends = np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64)
+    bounds = t0 + slot_s * np.arange(n_slots + 1, dtype=np.int64)
+    out = np.zeros((n_groups, n_slots))
+    if groups is None:
+        order, cuts = None, [0, len(starts)]
+    else:
+        groups = np.asarray(groups, dtype=np.int64)
+        order = np.argsort(groups, kind="stable")
+        cuts = np.searchsorted(groups[order], np.arange(n_groups + 1), side="left")
+    for g in range(n_groups):
+        sel = slice(cuts[g], cuts[g + 1])
+        s = starts[order[sel]] if order is not None else starts[sel]
+        e = ends[order[sel]] if order is not None else ends[sel]
+        if len(s):
+            out[g] = np.diff(_busy_before(np.sort(s), np.sort(e), bounds)) / slot_s
+    return out
+
+
+def sweep(how: str, *args, **kwargs) -> np.ndarray:
+    if how not in HOWS:
+        raise ValueError(f"how must be one of {HOWS}")
+    return (sweep_mean if how == "mean" else sweep_instant)(*args, **kwargs)
+
+
+def _epoch(col, dialect: str):
+    if dialect == "sqlite":
+        return cast(func.strftime("%s", col), BigInteger)
+    return cast(extract("epoch", col), BigInteger)
+
+
+def load_intervals(db: Session, start: datetime, end: datetime, room_id: Optional[int] = None,
+                   seat_type: Optional[str] = None, now: Optional[datetime] = None) -> Intervals:
+    """Non-cancelled reservations overlapping [start, end), as arrays (open ones end at `now`)."""
+    now = now or datetime.now(timezone.utc)
+    now_s = int(now.timestamp())
+    dialect = db.get_bind().dialect.name
+    R, S = archive.history().c, models.Seat  # archived history included
+    # Every column comes back as an integer (open end -> now, seat type -> index into SEAT_TYPES),
+    # so each column converts to an int64 array in one call instead of per-row Python.
+    type_code = case(*((S.seat_type == models.SeatType(t), i) for i, t in enumerate(SEAT_TYPES)), else_=0)
+    q = (
+        select(_epoch(R.start_time, dialect), func.coalesce(_epoch(R.end_time, dialect), now_s),
+               func.coalesce(S.room_id, 0), type_code)
+        .join(S, S.id == R.seat_id)
+        .where(
+            R.status != models.ReservationStatus.cancelled,
+            R.start_time < end,
+            func.coalesce(R.end_time, now) > start,
+        )
+    )
+    if room_id is not None:
+        q = q.where(S.room_id == room_id)
+    if seat_type is not None:
+        q = q.where(S.seat_type == models.SeatType(seat_type))
+    # Core result (no ORM row handling); zip transposes the rows into columns in C.
+    cols = list(zip(*db.connection().execute(q).all())) or [(), (), (), ()]
+    starts, ends, rooms, types = (np.array(c, dtype=np.int64) for c in cols)
+    keep = ends > starts
+    return Intervals(starts[keep], ends[keep], rooms[keep], types[keep].astype(np.int8))
+
+
+def room_capacity(db: Session, room_id: int) -> dict[str, int]:
+    rows = db.execute(
+        select(models.Seat.seat_type, func.count()).where(models.Seat.room_id == room_id).group_by(models.Seat.seat_type)
+    ).all()
+    return {getattr(t, "value", t): n for t, n in rows}
+
+
+def room_occupancy(db: Session, room_id: int, start: datetime, end: datetime, slot_minutes: int = 60,
+                   how: str = "mean", now: Optional[datetime] = None) -> dict[str, np.ndarray]:
+    """seat_type -> occupancy per slot of [start, end) for one room."""
+    slot_s = slot_minutes * 60
+    t0 = int(start.timestamp())
+    n_slots = max(0, -(-(int(end.timestamp()) - t0) // slot_s))
+    iv = load_intervals(db, start, start + timedelta(seconds=n_slots * slot_s), room_id=room_id, now=now)
+    grid = sweep(how, iv.starts, iv.ends, t0, slot_s, n_slots, groups=iv.seat_types, n_groups=len(SEAT_TYPES))
+    return {t: grid[i] for i, t in enumerate(SEAT_TYPES)}
+
+
+def time_of_day(db: Session, room_id: int, days: int = 28, slot_minutes: int = 60, open_hour: int = 8,
+                close_hour: int = 17, tz: str = "UTC", now: Optional[datetime] = None) -> tuple[list[str], np.ndarray, int]:
+    """Mean seats occupied per slot of the opening hours over the last `days` complete local days.
+
+    Slot edges are wall-clock times in `tz` on each day (8:00, 9:00, ... local), so a
+    DST change inside the window does not shift any day. A slot that spans a change
+    is averaged over its real length (two hours when clocks go back, none - and left
+    out of the mean - when it falls in the skipped hour). Returns (labels, occupied, capacity).
+    """
+    zone = ZoneInfo(tz)
+    now = now or datetime.now(timezone.utc)
+    today = now.astimezone(zone).date()
+    lo, hi = open_hour * 60 // slot_minutes, close_hour * 60 // slot_minutes
+    # Aware + timedelta is wall-clock arithmetic; .timestamp() then applies that day's offset.
+    bounds = np.array([
+        [int((datetime.combine(today - timedelta(days=d), datetime.min.time(), tzinfo=zone)
+              + timedelta(minutes=k * slot_minutes)).timestamp()) for k in range(lo, hi + 1)]
+        for d in range(days, 0, -1)
+    ], dtype=np.int64)
+    iv = load_intervals(db, datetime.fromtimestamp(int(bounds.min()), tz=timezone.utc),
+                        datetime.fromtimestamp(int(bounds.max()), tz=timezone.utc), room_id=room_id, now=now)
+    busy = _busy_before(np.sort(iv.starts), np.sort(iv.ends), bounds.ravel()).reshape(bounds.shape)
+    lengths = np.diff(bounds, axis=1)
+    per_day = np.where(lengths > 0, np.diff(busy, axis=1) / np.maximum(lengths, 1), 0.0)
+    total = per_day.sum(axis=0) / np.maximum((lengths > 0).sum(axis=0), 1)
+    labels = []
+    for k in range(lo, hi):
+        a, b = k * slot_minutes, (k + 1) * slot_minutes
+        labels.append(f"{a // 60}-{b // 60}" if slot_minutes == 60 else f"{a // 60}:{a % 60:02d}")
+    return labels, total, sum(room_capacity(db, room_id).values())
+
+
+def series_name(room_id: int, seat_type: str, slot_minutes: int) -> str:
+    return f"occupancy_{slot_minutes}m_room{room_id}_{seat_type}"
+
+
+def aggregate_occupancy(db: Session, lookback_days: int = 7, slot_minutes: int = 60, now: Optional[datetime] = None) -> int:
+    """Mean occupancy of completed slots per (room, seat type) into the chunked store; returns points written."""
+    from . import tsstore
+    now = now or datetime.now(timezone.utc)
+    slot_s = slot_minutes * 60
+    end_s = int(now.timestamp()) // slot_s * slot_s  # last completed slot boundary
+    t0 = end_s - lookback_days * 86400 // slot_s * slot_s
+    n_slots = (end_s - t0) // slot_s
+    start = datetime.fromtimestamp(t0, tz=timezone.utc)
+    iv = load_intervals(db, start, datetime.fromtimestamp(end_s, tz=timezone.utc), now=now)
+    room_ids = np.array(db.execute(select(models.Room.id).order_by(models.Room.id)).scalars().all(), dtype=np.int64)
+    known = np.isin(iv.room_ids, room_ids)
+    rooms = np.searchsorted(room_ids, iv.room_ids[known])  # position in the sorted room ids
+    groups = rooms * len(SEAT_TYPES) + iv.seat_types[known]
+    grid = sweep_mean(iv.starts[known], iv.ends[known], t0, slot_s, n_slots,
+                      groups=groups, n_groups=len(room_ids) * len(SEAT_TYPES))
+    ts = t0 + slot_s * np.arange(n_slots, dtype=np.int64)
+    written = 0
+    for i, rid in enumerate(room_ids.tolist()):
+        for j, stype in enumerate(SEAT_TYPES):
+            written += tsstore.append(db, series_name(rid, stype, slot_minutes), ts, grid[i * len(SEAT_TYPES) + j], skip_existing=True)
+    db.commit()
+    return written
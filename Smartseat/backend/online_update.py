@@ -0,0 +1,225 @@
+"""Fold new observations into a portable SARIMAX bundle without refitting.
+
+An update keeps the bundle's params fixed and runs the Kalman filter over the
+new observations only, starting from the filtered state saved by the previous
+update (statsmodels extend semantics). The new observations and the state after
+them are appended to the bundle's NPZ as extra members; nothing already in the
+NPZ is rewritten:
+
+    y.npy                  training data written by portable_save
+    y_delta_0001.npy       observations added by update 1
+    state_0001.npy         predicted state after update 1
+    state_cov_0001.npy     its covariance
+    ...
+
+portable_read concatenates y and every y_delta_* in order, so portable_load
+and backtest see the full series. The first update after a fit filters the base
+series once to get a starting state; later ones cost O(new points).
+
+Each update scores its observations by their standardized one-step errors and
+flags the bundle for a full refit (meta["online"]["refit_due"]) when they drift:
+one error beyond DRIFT_Z, a biased mean over the last DRIFT_WINDOW errors, or
+their mean square beyond DRIFT_VAR. refit_if_due() then refits with the same
+order and rewrites the bundle without deltas.
+
+Single writer per bundle: run updates from one job (aggregate_cli / cron).
+
+CLI:  python online_update.py seat_usage_daily.portable.json --values 41 37
+      python online_update.py seat_usage_daily.portable.json --series seat_usage_daily
+      python online_update.py seat_usage_daily.portable.json --refit-if-due
+
+Environment:
+  DRIFT_Z=4.0  DRIFT_WINDOW=14  DRIFT_BIAS=3.0  DRIFT_VAR=2.5
+"""
+from __future__ import annotations
+import argparse
+import io
+import json
+import os
+import time
+import warnings
+import zipfile
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from .train_dummy_sarimax import delta_number, portable_model, portable_read, portable_save  # imported as backend.online_update
+except ImportError:
+    from train_dummy_sarimax import delta_number, portable_model, portable_read, portable_save  # run as a script from backend/
+
+DRIFT_Z = float(os.getenv("DRIFT_Z", "4.0"))
+DRIFT_WINDOW = int(os.getenv("DRIFT_WINDOW", "14"))
+DRIFT_BIAS = float(os.getenv("DRIFT_BIAS", "3.0"))
+DRIFT_VAR = float(os.getenv("DRIFT_VAR", "2.5"))
+
+@dataclass
+class UpdateResult:
+    appended: int
+    nobs: int
+    delta: int  # index of the NPZ delta written (0 if nothing appended)
+    seconds: float
+    z: list[float] = field(default_factory=list)
+    refit_due: bool = False
+    reason: Optional[str] = None
+
+
+def _npz_path(portable_json_path: str) -> str:
+    return os.path.splitext(portable_json_path)[0] + ".npz"
+
+
+def delta_members(npz_path: str) -> list[int]:
+    with zipfile.ZipFile(npz_path) as zf:
+        return sorted(n for n in map(delta_number, zf.namelist()) if n is not None)
+
+
+def _array_bytes(arr: np.ndarray) -> bytes:
+    buf = io.BytesIO()
+    np.lib.format.write_array(buf, np.ascontiguousarray(arr))
+    return buf.getvalue()
+
+
+def _write_json(path: str, meta: dict) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _start_state(portable_json_path: str, meta: dict, last_delta: int):
+    """Predicted state/cov after everything already in the bundle."""
+    npz = np.load(_npz_path(portable_json_path))
+    if last_delta and f"state_{last_delta:04d}" in npz.files:
+        return npz[f"state_{last_delta:04d}"], npz[f"state_cov_{last_delta:04d}"]
+    series, _ = portable_read(portable_json_path)  # first update after a fit: one full pass
+    res = portable_model(series.to_numpy(dtype=float), meta).filter(np.asarray(meta["params"]))
+    return res.predicted_state[:, -1], res.predicted_state_cov[:, :, -1]
+
+
+def _drift(online: dict, z: np.ndarray) -> Optional[str]:
+    if z.size and np.max(np.abs(z)) > DRIFT_Z:
+        return f"one-step error of {float(np.max(np.abs(z))):.1f} sd"
+    recent = np.asarray(online["recent_z"][-DRIFT_WINDOW:])
+    if recent.size >= min(DRIFT_WINDOW, 7):
+        bias = abs(recent.mean()) * np.sqrt(recent.size)
+        if bias > DRIFT_BIAS:
+            return f"biased errors over last {recent.size} points ({bias:.1f})"
+        if np.mean(recent ** 2) > DRIFT_VAR:
+            return f"error variance {float(np.mean(recent ** 2)):.1f}x the model's over last {recent.size} points"
+    return None
+
+
+def update_bundle(portable_json_path: str, values) -> UpdateResult:
+    """Append `values` (the observations right after the bundle's last one) with fixed params."""
+    t0 = time.perf_counter()
+    values = np.asarray(values, dtype=float).ravel()
+    with open(portable_json_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    npz_path = _npz_path(portable_json_path)
+    deltas = delta_members(npz_path)
+    last = deltas[-1] if deltas else 0
+    online = meta.setdefault("online", {"updates": 0, "recent_z": [], "refit_due": False, "reason": None})
+    if not values.size:
+        return UpdateResult(0, meta["nobs"], 0, 0.0, refit_due=online["refit_due"], reason=online["reason"])
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        state, state_cov = _start_state(portable_json_path, meta, last)
+        model = portable_model(values, meta)
+        model.ssm.initialize_known(state, state_cov)
+        res = model.filter(np.asarray(meta["params"]))
+    z = res.forecasts_error[0] / np.sqrt(res.forecasts_error_cov[0, 0])
+
+    k = last + 1
+    with zipfile.ZipFile(npz_path, "a") as zf:
+        zf.writestr(f"y_delta_{k:04d}.npy", _array_bytes(values))
+        zf.writestr(f"state_{k:04d}.npy", _array_bytes(res.predicted_state[:, -1]))
+        zf.writestr(f"state_cov_{k:04d}.npy", _array_bytes(res.predicted_state_cov[:, :, -1]))
+
+    meta["nobs"] = int(meta["nobs"]) + int(values.size)
+    online["updates"] += 1
+    online["recent_z"] = [round(float(x), 4) for x in (list(online["recent_z"]) + list(z))[-DRIFT_WINDOW:]]
+    online["updated_at"] = datetime.now(timezone.utc).isoformat()
+    reason = _drift(online, z)
+    if reason and not online["refit_due"]:
+        online["refit_due"], online["reason"] = True, reason
+    _write_json(portable_json_path, meta)
+    return UpdateResult(
+        appended=int(values.size), nobs=meta["nobs"], delta=k, seconds=round(time.perf_counter() - t0, 5),
+        z=[round(float(x), 4) for x in z], refit_due=online["refit_due"], reason=online["reason"],
+    )
+
+
+def next_timestamp(meta: dict) -> pd.Timestamp:
+    return pd.date_range(start=pd.to_datetime(meta["start"]), periods=int(meta["nobs"]) + 1, freq=meta["freq"])[-1]
+
+
+def update_from_store(db, portable_json_path: str, series_name: str) -> UpdateResult:
+    """Append the points of a tsstore series that come after the bundle's last observation."""
+    from . import tsstore
+    with open(portable_json_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    start = next_timestamp(meta)
+    ts, values = tsstore.read_range(db, series_name, start=start.to_pydatetime())
+    expected = pd.date_range(start=start, periods=len(ts), freq=meta["freq"])
+    if len(ts) and not np.array_equal(ts.astype("datetime64[s]"), expected.values.astype("datetime64[s]")):
+        raise ValueError(f"{series_name} has gaps after {start}; expected freq {meta['freq']}")
+    return update_bundle(portable_json_path, values)
+
+
+def refit(portable_json_path: str) -> dict:
+    """Full refit with the bundle's order, starting from its params; rewrites JSON + NPZ without deltas."""
+    series, meta = portable_read(portable_json_path)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = portable_model(series, meta).fit(start_params=np.asarray(meta["params"]), disp=False)
+    extra = {"selection": meta["selection"]} if "selection" in meta else None
+    portable_save(series, results, portable_json_path, extra=extra)
+    with open(portable_json_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def refit_if_due(portable_json_path: str) -> bool:
+    with open(portable_json_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    if not meta.get("online", {}).get("refit_due"):
+        return False
+    refit(portable_json_path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append observations to a portable SARIMAX bundle without refitting.")
+    parser.add_argument("bundle", help="*.portable.json")
+    src = parser.add_mutually_exclusive_group(required=True)
+    src.add_argument("--values", type=float, nargs="+", help="new observations, oldest first")
+    src.add_argument("--series", help="append points of this tsstore series newer than the bundle")
+    src.add_argument("--refit-if-due", action="store_true", help="refit only if drift was flagged")
+    args = parser.parse_args()
+
+    if args.refit_if_due:
+        print("refitted" if refit_if_due(args.bundle) else "no refit due")
+        return
+    if args.values:
+        result = update_bundle(args.bundle, args.values)
+    else:
+        import sys
+        import pathlib
+        sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+        from backend.database import SessionLocal
+        from backend.online_update import update_from_store
+        db = SessionLocal()
+        try:
+            result = update_from_store(db, args.bundle, args.series)
+        finally:
+            db.close()
+    print(f"appended={result.appended} nobs={result.nobs} delta={result.delta} in {result.seconds * 1000:.2f} ms")
+    if result.refit_due:
+        print(f"refit due: {result.reason}")
+
+
+if __name__ == "__main__":
+    main()
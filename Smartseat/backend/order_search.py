@@ -0,0 +1,292 @@
+"""Automatic SARIMAX order selection over a (p,d,q)(P,D,Q,m) grid.
+
+Candidates are fitted in parallel on a process pool and ranked by AIC or BIC.
+A candidate is pruned when its optimizer does not converge, when it raises, or
+when it runs past the per-candidate time budget (checked from the optimizer
+callback, so a slow fit stops itself instead of holding a worker). Candidates
+are tried simplest first and anything still queued when the total budget runs
+out is skipped.
+
+Fitted candidates are cached per series and data version (a hash of the index
+and values, plus exog when given) as JSON, so re-running a search on unchanged data fits nothing, and
+extending the grid only fits the new candidates. The winner is rebuilt from its
+cached params with model.filter(), the same way portable_load does.
+
+Only needs numpy/pandas/statsmodels so train_dummy_sarimax.py can import it
+when run as a plain script.
+
+Environment:
+  ORDER_SEARCH_WORKERS=<cpu count>   processes in the pool
+  ORDER_SEARCH_CACHE=<dir>           candidate cache directory (default backend/order_cache)
+"""
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import os
+import re
+import time
+import warnings
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.statespace.sarimax import SARIMAX, SARIMAXResults
+
+WORKERS = int(os.getenv("ORDER_SEARCH_WORKERS", "0")) or (os.cpu_count() or 1)
+CACHE_DIR = os.getenv("ORDER_SEARCH_CACHE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "order_cache"))
+CRITERIA = ("aic", "bic")
+
+DEFAULT_GRID = "p=0-2,d=0-1,q=0-2,P=0-1,D=0,Q=0-1"
+
+
+@dataclass
+class Candidate:
+    order: tuple[int, int, int]
+    seasonal_order: tuple[int, int, int, int]
+    status: str = "pending"  # ok | no_converge | timeout | error | skipped
+    aic: Optional[float] = None
+    bic: Optional[float] = None
+    params: list[float] = field(default_factory=list)
+    seconds: float = 0.0
+    budget_s: Optional[float] = None
+    message: str = ""
+
+    @property
+    def key(self) -> str:
+        return ",".join(map(str, self.order)) + "|" + ",".join(map(str, self.seasonal_order))
+
+    @property
+    def complexity(self) -> int:
+        p, d, q = self.order
+        P, D, Q, _ = self.seasonal_order
+        return p + q + P + Q + d + D
+
+
+@dataclass
+class SearchResult:
+    criterion: str
+    data_version: str
+    best: Optional[Candidate]
+    ranked: list[Candidate]  # status ok, best first
+    pruned: list[Candidate]  # everything else, with the reason in status/message
+    fitted: int  # candidates fitted in this run
+    cached: int  # candidates reused from the cache
+    elapsed_s: float
+    workers: int
+
+
+def _span(spec: str) -> list[int]:
+    if "-" in spec:
+        lo, hi = spec.split("-", 1)
+        return list(range(int(lo), int(hi) + 1))
+    return [int(x) for x in spec.split("|")]
+
+
+def parse_grid(spec: str = DEFAULT_GRID, m: int = 12) -> list[Candidate]:
+    """'p=0-2,d=1,q=0-2,P=0-1,D=0,Q=0|1,m=12' -> candidates; unspecified letters are 0 (m defaults to `m`)."""
+    ranges = {k: [0] for k in "pdqPDQ"}
+    ranges["m"] = [m]
+    for part in filter(None, (x.strip() for x in spec.split(","))):
+        k, _, v = part.partition("=")
+        if k not in ranges or not re.fullmatch(r"\d+(-\d+|(\|\d+)*)", v):
+            raise ValueError(f"bad grid term {part!r} (expected e.g. p=0-2 or q=0|2)")
+        ranges[k] = _span(v)
+    out = []
+    for p, d, q, P, D, Q, mm in itertools.product(*(ranges[k] for k in "pdqPDQm")):
+        if (P or D or Q) and mm < 2:
+            continue
+        out.append(Candidate((p, d, q), (P, D, Q, mm if (P or D or Q) else 0)))
+    # Dedupe (the non-seasonal variants collapse to m=0) and try simplest first.
+    unique = {c.key: c for c in out}
+    return sorted(unique.values(), key=lambda c: (c.complexity, c.key))
+
+
+def data_version(series: pd.Series, exog=None) -> str:
+    """Hash of the series (start, frequency, values) and, when given, exog (shape, column names, values).
+
+    Fitted params only fit the data they came from: with another exog (or none) a
+    cached winner's params have a different length or meaning.
+    """
+    h = hashlib.sha1()
+    h.update(str(series.index[0] if len(series) else "").encode())
+    freq = series.index.freqstr or (pd.infer_freq(series.index) if len(series) > 2 else None)
+    h.update(str(freq).encode())
+    h.update(np.ascontiguousarray(series.to_numpy(dtype=np.float64)).tobytes())
+    if exog is not None:
+        if isinstance(exog, pd.DataFrame):
+            names = [str(c) for c in exog.columns]
+        elif isinstance(exog, pd.Series):
+            names = [str(exog.name)]
+        else:
+            names = None
+        values = np.asarray(exog, dtype=np.float64)
+        h.update(b"\0exog" + json.dumps([list(values.shape), names]).encode())
+        h.update(np.ascontiguousarray(values).tobytes())
+    return h.hexdigest()[:16]
+
+
+class _OverBudget(Exception):
+    pass
+
+
+def _build(series: pd.Series, c: Candidate, exog=None) -> SARIMAX:
+    return SARIMAX(
+        series,
+        exog=exog,
+        order=c.order,
+        seasonal_order=c.seasonal_order,
+        enforce_stationarity=False,
+        enforce_invertibility=False,
+    )
+
+
+def fit_candidate(series: pd.Series, c: Candidate, budget_s: Optional[float] = None, exog=None, maxiter: int = 200) -> Candidate:
+    """Fit one candidate (runs inside a pool worker); never raises."""
+    t0 = time.perf_counter()
+
+    def check_budget(*_):
+        if budget_s is not None and time.perf_counter() - t0 > budget_s:
+            raise _OverBudget()
+
+    c.budget_s = budget_s
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            res = _build(series, c, exog).fit(disp=False, maxiter=maxiter, callback=check_budget)
+        c.aic, c.bic = float(res.aic), float(res.bic)
+        c.params = [float(x) for x in res.params]
+        if not res.mle_retvals.get("converged", True):
+            c.status = "no_converge"
+        elif not (np.isfinite(c.aic) and np.isfinite(c.bic)):
+            c.status, c.message = "error", "non-finite information criterion"
+        else:
+            c.status = "ok"
+    except _OverBudget:
+        c.status, c.message = "timeout", f"over {budget_s}s budget"
+    except Exception as e:  # LinAlgError, ValueError from bad orders, ...
+        c.status, c.message = "error", f"{type(e).__name__}: {e}"[:200]
+    c.seconds = round(time.perf_counter() - t0, 4)
+    return c
+
+
+def _cache_path(cache_dir: str, series_name: str, version: str) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", series_name) or "series"
+    return os.path.join(cache_dir, safe, f"{version}.json")
+
+
+def _load_cache(path: str) -> dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path: str, entries: dict[str, dict]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.replace(tmp, path)
+
+
+def _reusable(entry: dict, budget_s: Optional[float]) -> bool:
+    if entry.get("status") != "timeout":
+        return True
+    # A timeout only says the fit took longer than that budget; retry with a bigger one.
+    return budget_s is not None and entry.get("budget_s") is not None and budget_s <= entry["budget_s"]
+
+
+def search(
+    series: pd.Series,
+    candidates: Optional[list[Candidate]] = None,
+    *,
+    series_name: str = "series",
+    criterion: str = "aic",
+    workers: Optional[int] = None,
+    candidate_budget_s: Optional[float] = 30.0,
+    total_budget_s: Optional[float] = None,
+    exog=None,
+    cache_dir: Optional[str] = CACHE_DIR,
+    m: int = 12,
+) -> SearchResult:
+    """Fit every candidate (or reuse cached fits) and rank the converged ones by `criterion`."""
+    if criterion not in CRITERIA:
+        raise ValueError(f"criterion must be one of {CRITERIA}")
+    t0 = time.perf_counter()
+    workers = max(1, workers or WORKERS)
+    candidates = candidates if candidates is not None else parse_grid(DEFAULT_GRID, m)
+    version = data_version(series, exog)
+    path = _cache_path(cache_dir, series_name, version) if cache_dir else None
+    cache = _load_cache(path) if path else {}
+
+    done: list[Candidate] = []
+    todo: list[Candidate] = []
+    for c in candidates:
+        entry = cache.get(c.key)
+        if entry is not None and _reusable(entry, candidate_budget_s):
+            done.append(Candidate(**{**entry, "order": tuple(entry["order"]), "seasonal_order": tuple(entry["seasonal_order"])}))
+        elif c.seasonal_order[3] and len(series) < 2 * c.seasonal_order[3] + sum(c.order):
+            c.status, c.message = "error", "series shorter than two seasons"
+            done.append(c)
+        else:
+            todo.append(c)
+    cached = len(done)
+
+    deadline = None if total_budget_s is None else t0 + total_budget_s
+    fitted: list[Candidate] = []
+    if workers == 1 or len(todo) <= 1:
+        for i, c in enumerate(todo):
+            if deadline is not None and time.perf_counter() > deadline:
+                for rest in todo[i:]:
+                    rest.status, rest.message = "skipped", "total budget exhausted"
+                break
+            fitted.append(fit_candidate(series, c, candidate_budget_s, exog))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(todo))) as pool:
+            pending = {pool.submit(fit_candidate, series, c, candidate_budget_s, exog): c for c in todo}
+            while pending:
+                timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+                finished, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                if not finished:
+                    for fut, c in pending.items():
+                        fut.cancel()
+                        c.status, c.message = "skipped", "total budget exhausted"
+                    break
+                for fut in finished:
+                    pending.pop(fut)
+                    fitted.append(fut.result())
+
+    if path and fitted:
+        for c in fitted:
+            cache[c.key] = asdict(c)
+        _save_cache(path, cache)
+
+    everything = done + fitted + [c for c in todo if c.status == "skipped"]
+    ranked = sorted((c for c in everything if c.status == "ok"), key=lambda c: (getattr(c, criterion), c.complexity, c.key))
+    pruned = [c for c in everything if c.status != "ok"]
+    return SearchResult(
+        criterion=criterion, data_version=version, best=ranked[0] if ranked else None,
+        ranked=ranked, pruned=pruned, fitted=len(fitted), cached=cached,
+        elapsed_s=round(time.perf_counter() - t0, 3), workers=workers,
+    )
+
+
+def winner_results(series: pd.Series, best: Candidate, exog=None) -> SARIMAXResults:
+    """Rebuild the winning model from its fitted params without re-optimizing."""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return _build(series, best, exog).filter(np.asarray(best.params))
+
+
+def summary(result: SearchResult, top: int = 5) -> str:
+    lines = [
+        f"order search: {len(result.ranked)} ok, {len(result.pruned)} pruned, "
+        f"{result.fitted} fitted + {result.cached} cached in {result.elapsed_s}s on {result.workers} workers"
+    ]
+    for c in result.ranked[:top]:
+        lines.append(f"  {c.order}x{c.seasonal_order}  aic={c.aic:.2f}  bic={c.bic:.2f}  ({c.seconds}s)")
+    return "\n".join(lines)
@@ -0,0 +1,288 @@
+"""On-demand per-request profiling: cProfile of the endpoint plus the request's SQL timeline.
+
+Off by default, and then nothing is installed: no middleware, no engine hooks,
+no endpoint wrappers. With ``PROFILING=1`` a request is profiled when
+
+  - it carries ``X-Profile: <DIAG_TOKEN>`` or ``?_profile=<DIAG_TOKEN>``, or
+  - its path matches a PROFILE_SAMPLE route template and wins the coin flip.
+
+Unselected requests pay one context-variable read per endpoint call and per
+SQL statement.
+
+The profiler runs inside the endpoint call, on the thread that executes it
+(FastAPI runs sync endpoints on its threadpool, where a profiler enabled by
+the middleware would see nothing). The SQL timeline covers every statement
+the request issued, including the ones in its dependencies (auth, session).
+Each capture becomes two files in PROFILE_DIR: ``<id>.prof`` (pstats, for
+snakeviz / ``python -m pstats``) and ``<id>.json`` (request, timings, SQL
+timeline, top functions). A request rejected before its endpoint ran (401,
+404, 422) has no cProfile data: it gets only the JSON, with an empty top list. Only the newest PROFILE_KEEP captures are kept.
+They are listed and downloaded under /api/diag/profiles.
+
+Environment:
+  PROFILING=1                          install the hooks
+  PROFILE_SAMPLE="/api/seats=5;/api/rooms/{room_id}/seats=1"   percent of matching requests
+  PROFILE_DIR=backend/profiles
+  PROFILE_KEEP=50
+  PROFILE_TOP=30                       functions listed in the JSON summary
+"""
+from __future__ import annotations
+import contextvars
+import cProfile
+import functools
+import inspect
+import io
+import json
+import logging
+import os
+import pathlib
+import pstats
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qs
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.concurrency import run_in_threadpool
+
+log = logging.getLogger("smartseat.profiling")
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _parse_sample(raw: str) -> list[tuple[re.Pattern, float]]:
+    """Parse '/api/seats=5;/api/rooms/{room_id}/seats=1' -> [(path regex, percent)]."""
+    rules = []
+    for item in raw.split(";"):
+        if "=" not in item:
+            continue
+        template, _, pct = item.rpartition("=")
+        pattern = re.sub(r"\\\{[^/]*?\\\}", "[^/]+", re.escape(template.strip()))
+        rules.append((re.compile(pattern), float(pct)))
+    return rules
+
+
+ENABLED = _env_flag("PROFILING")
+SAMPLE = _parse_sample(os.getenv("PROFILE_SAMPLE", ""))
+PROFILE_DIR = pathlib.Path(os.getenv("PROFILE_DIR") or pathlib.Path(__file__).resolve().parent / "profiles")
+KEEP = max(1, int(os.getenv("PROFILE_KEEP", "50")))
+TOP = int(os.getenv("PROFILE_TOP", "30"))
+HEADER = b"x-profile"
+QUERY_FLAG = "_profile"
+_ID = re.compile(r"^[0-9]{8}T[0-9]{12}-[0-9a-f]{8}$")
+
+
+@dataclass
+class SqlEvent:
+    start_ms: float  # since the request started
+    duration_ms: float
+    statement: str
+    thread: str
+
+
+@dataclass
+class Capture:
+    method: str
+    path: str
+    trigger: str  # "header" | "query" | "sample"
+    started: float = field(default_factory=time.perf_counter)
+    profiler: cProfile.Profile = field(default_factory=cProfile.Profile)
+    sql: list[SqlEvent] = field(default_factory=list)
+    endpoint_ms: float = 0.0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+_current: contextvars.ContextVar[Optional[Capture]] = contextvars.ContextVar("profiling_capture", default=None)
+_WS = re.compile(r"\s+")
+
+
+def _authorized(value: Optional[str]) -> bool:
+    expected = os.getenv("DIAG_TOKEN")
+    return bool(expected and value and secrets.compare_digest(value, expected))
+
+
+def select(scope) -> Optional[str]:
+    """Why this request should be profiled ("header", "query", "sample"), or None."""
+    header = next((v for k, v in scope["headers"] if k == HEADER), None)
+    if header is not None and _authorized(header.decode("latin-1")):
+        return "header"
+    if QUERY_FLAG.encode() in scope.get("query_string", b""):
+        values = parse_qs(scope["query_string"].decode("latin-1")).get(QUERY_FLAG, [])
+        if values and _authorized(values[0]):
+            return "query"
+    for pattern, pct in SAMPLE:
+        if pattern.fullmatch(scope["path"]):
+            return "sample" if random.random() * 100 < pct else None
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("profiling_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    cap = _current.get()
+    starts = conn.info.get("profiling_start")
+    if cap is None or not starts:
+        return
+    t0 = starts.pop()
+    ev = SqlEvent(round((t0 - cap.started) * 1000, 3), round((time.perf_counter() - t0) * 1000, 3),
+                  _WS.sub(" ", statement).strip()[:500], threading.current_thread().name)
+    with cap.lock:
+        cap.sql.append(ev)
+
+
+def install(*engines: Engine) -> None:
+    """Attach the cursor hooks to each engine (idempotent)."""
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _profiled(fn):
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            cap = _current.get()
+            if cap is None:
+                return await fn(*args, **kwargs)
+            # Async endpoints run on the event loop: other tasks interleaved at awaits show up too.
+            t0 = time.perf_counter()
+            try:
+                cap.profiler.enable()
+            except ValueError:  # another profiler already owns this thread
+                return await fn(*args, **kwargs)
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                cap.profiler.disable()
+                cap.endpoint_ms += (time.perf_counter() - t0) * 1000
+    else:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            cap = _current.get()
+            if cap is None:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return cap.profiler.runcall(fn, *args, **kwargs)
+            finally:
+                cap.endpoint_ms += (time.perf_counter() - t0) * 1000
+    wrapper._profiled = True
+    return wrapper
+
+
+def wrap_endpoints(*routers) -> int:
+    """Run each router's endpoints under the request's profiler when one is active; returns routes wrapped.
+
+    Call before app.include_router: including copies the routes (eagerly or lazily,
+    depending on the FastAPI version) from route.endpoint / route.dependant.
+    """
+    n = 0
+    for router in routers:
+        for route in router.routes:
+            dependant = getattr(route, "dependant", None)
+            if dependant is None or getattr(route.endpoint, "_profiled", False):
+                continue
+            route.endpoint = dependant.call = _profiled(route.endpoint)
+            n += 1
+    return n
+
+
+def _top_functions(profiler: cProfile.Profile, limit: int) -> list[dict]:
+    if not profiler.getstats():  # endpoint never ran (401/404/422 from auth, routing or validation)
+        return []
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (cc, nc, tt, ct, _) in stats.stats.items():
+        rows.append({"function": f"{name} ({pathlib.Path(filename).name}:{line})", "calls": nc,
+                     "tottime_ms": round(tt * 1000, 3), "cumtime_ms": round(ct * 1000, 3)})
+    rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+    return rows[:limit]
+
+
+def save(cap: Capture, status: int, total_ms: float, route: Optional[str], directory: pathlib.Path = None) -> str:
+    """Write <id>.prof + <id>.json, drop the oldest captures beyond KEEP; returns the id."""
+    directory = pathlib.Path(directory or PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    pid = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"  # sorts by time
+    if cap.profiler.getstats():  # an empty dump is not loadable by pstats; the JSON is still written
+        cap.profiler.dump_stats(str(directory / f"{pid}.prof"))
+    meta = {
+        "id": pid, "method": cap.method, "path": cap.path, "route": route, "status": status, "trigger": cap.trigger,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "total_ms": round(total_ms, 3), "endpoint_ms": round(cap.endpoint_ms, 3),
+        "sql_count": len(cap.sql), "sql_ms": round(sum(e.duration_ms for e in cap.sql), 3),
+        "sql": [asdict(e) for e in sorted(cap.sql, key=lambda e: e.start_ms)],
+        "top": _top_functions(cap.profiler, TOP),
+    }
+    (directory / f"{pid}.json").write_text(json.dumps(meta, indent=1))
+    for old in sorted(directory.glob("*.json"))[:-KEEP]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".prof").unlink(missing_ok=True)
+    return pid
+
+
+def list_profiles(directory: pathlib.Path = None) -> list[dict]:
+    """Summaries of the kept captures, newest first."""
+    directory = pathlib.Path(directory or PROFILE_DIR)
+    out = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            meta = json.loads(path.read_text())
+        except (OSError, ValueError):  # rotated away or half-written
+            continue
+        out.append({k: meta[k] for k in ("id", "method", "path", "route", "status", "trigger", "created_at",
+                                         "total_ms", "endpoint_ms", "sql_count", "sql_ms")})
+    return out
+
+
+def profile_path(pid: str, suffix: str, directory: pathlib.Path = None) -> Optional[pathlib.Path]:
+    if not _ID.fullmatch(pid):
+        return None
+    path = pathlib.Path(directory or PROFILE_DIR) / f"{pid}{suffix}"
+    return path if path.exists() else None
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that starts a capture for selected requests and saves it when they finish."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        trigger = select(scope) if scope["type"] == "http" else None
+        if trigger is None:
+            await self.app(scope, receive, send)
+            return
+        cap = Capture(scope["method"], scope["path"], trigger)
+        status = [500]
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        token = _current.set(cap)
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            _current.reset(token)
+            total_ms = (time.perf_counter() - cap.started) * 1000
+            route = getattr(scope.get("route"), "path", None)
+            try:
+                pid = await run_in_threadpool(save, cap, status[0], total_ms, route)
+                log.info("profiled %s %s -> %s (%.1f ms)", cap.method, cap.path, pid, total_ms)
+            except Exception:
+                log.exception("could not save profile for %s %s", cap.method, cap.path)
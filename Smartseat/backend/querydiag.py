@@ -0,0 +1,179 @@
+"""Per-request SQL diagnostics: N+1 detection, slow-query logging and query budgets.
+
+Off by default. Enable with ``QUERY_DIAG=1``; the app then hooks
+``before_cursor_execute``/``after_cursor_execute`` on the primary and read
+engines and tracks every statement against the route that issued it.
+
+Environment:
+  QUERY_DIAG=1                 turn the diagnostics on
+  QUERY_DIAG_SLOW_MS=50        log statements slower than this (with bound params)
+  QUERY_DIAG_REPEAT=5          flag a statement shape seen this many times in one request (N+1)
+  QUERY_DIAG_BUDGET=0          default max statements per request (0 = no budget)
+  QUERY_DIAG_BUDGETS="GET /api/seats=2;GET /api/reservations/mine=3"
+  QUERY_DIAG_STRICT=1          raise QueryBudgetExceeded when a route goes over budget (fails tests)
+"""
+from __future__ import annotations
+import contextvars
+import logging
+import os
+import re
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger("smartseat.querydiag")
+
+
+def _env_flag(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _parse_budgets(raw: str) -> dict[str, int]:
+    """Parse 'GET /api/seats=2;GET /api/reservations/mine=3' -> {route: budget}."""
+    budgets: dict[str, int] = {}
+    for item in raw.split(";"):
+        if "=" not in item:
+            continue
+        route, _, n = item.rpartition("=")
+        budgets[route.strip()] = int(n)
+    return budgets
+
+
+ENABLED = _env_flag("QUERY_DIAG")
+STRICT = _env_flag("QUERY_DIAG_STRICT")
+SLOW_MS = float(os.getenv("QUERY_DIAG_SLOW_MS", "50"))
+REPEAT_THRESHOLD = int(os.getenv("QUERY_DIAG_REPEAT", "5"))
+DEFAULT_BUDGET = int(os.getenv("QUERY_DIAG_BUDGET", "0"))
+ROUTE_BUDGETS: dict[str, int] = _parse_budgets(os.getenv("QUERY_DIAG_BUDGETS", ""))
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in strict mode when a request issues more statements than its route allows."""
+
+
+@dataclass
+class StatementRecord:
+    shape: str
+    statement: str
+    params: Any
+    duration_ms: float
+
+
+@dataclass
+class RequestQueries:
+    route: str
+    statements: list[StatementRecord] = field(default_factory=list)
+    shapes: Counter = field(default_factory=Counter)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(s.duration_ms for s in self.statements)
+
+    def repeated(self, threshold: int = REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        """Statement shapes issued at least `threshold` times (likely N+1 via lazy loads / per-row lookups)."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+_current: contextvars.ContextVar[Optional[RequestQueries]] = contextvars.ContextVar("query_diag_request", default=None)
+
+# Most recent finished requests, newest last; handy for tests and ad-hoc inspection.
+recent: deque[RequestQueries] = deque(maxlen=50)
+
+_WS = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)")
+_NUM = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STR = re.compile(r"'(?:[^']|'')*'")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a SQL string so repeated executions with different values compare equal."""
+    s = _WS.sub(" ", statement).strip()
+    s = _STR.sub("?", s)
+    s = _NUM.sub("?", s)
+    return _IN_LIST.sub("(?...)", s)
+
+
+def route_key(method: str, path: str) -> str:
+    return f"{method.upper()} {path}"
+
+
+def budget_for(route: str) -> int:
+    return ROUTE_BUDGETS.get(route, DEFAULT_BUDGET)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_diag_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_diag_start")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+    rq = _current.get()
+    route = rq.route if rq is not None else "<no request>"
+    if elapsed_ms >= SLOW_MS:
+        log.warning("slow query %.1fms route=%s params=%r: %s", elapsed_ms, route, parameters, _WS.sub(" ", statement))
+    if rq is not None:
+        shape = statement_shape(statement)
+        rq.shapes[shape] += 1
+        rq.statements.append(StatementRecord(shape, statement, parameters, elapsed_ms))
+
+
+def install(*engines: Engine) -> None:
+    """Attach the cursor hooks to each engine (idempotent)."""
+    for engine in engines:
+        if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstall(*engines: Engine) -> None:
+    for engine in engines:
+        if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+            event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+            event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def finish(rq: RequestQueries) -> None:
+    """Report on a finished request: log N+1 suspects, enforce the route budget."""
+    recent.append(rq)
+    for shape, n in rq.repeated():
+        log.warning("possible N+1 route=%s: %d x %s", rq.route, n, shape)
+    budget = budget_for(rq.route)
+    if budget and rq.count > budget:
+        msg = f"{rq.route} issued {rq.count} statements (budget {budget})"
+        if STRICT:
+            raise QueryBudgetExceeded(msg)
+        log.warning("query budget exceeded: %s", msg)
+
+
+class QueryDiagMiddleware:
+    """ASGI middleware that scopes statement tracking to one HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rq = RequestQueries(route=route_key(scope["method"], scope["path"]))
+        token = _current.set(rq)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current.reset(token)
+            # Prefer the route template (/api/reservations/{reservation_id}) so budgets match all ids.
+            route = scope.get("route")
+            if route is not None and getattr(route, "path", None):
+                rq.route = route_key(scope["method"], route.path)
+        finish(rq)
@@ -0,0 +1,186 @@
+"""In-memory admission control: token-bucket rate limits and a write concurrency cap.
+
+Requests are shed with 429 + Retry-After before they reach a route (and so before
+they open a DB session or queue on the SQLite writer lock). Each check is a dict
+lookup plus a little arithmetic; bucket tables are LRU-bounded so memory stays flat
+no matter how many distinct IPs/tokens show up.
+
+Environment (rates are "tokens_per_second,burst"):
+  RATE_LIMIT=1                        set to 0 to disable everything
+  RATE_LIMIT_AUTH_IP=1,30             signup/login/logout per client IP
+  RATE_LIMIT_WRITE_TOKEN=2,10         reservation writes per bearer token
+  RATE_LIMIT_WRITE_IP=10,50           reservation writes per client IP
+  RATE_LIMIT_MAX_KEYS=10000           buckets kept per table (least recently used evicted)
+  WRITE_CONCURRENCY=8                 write requests (non-GET /api/*) in flight at once (0 = unlimited)
+"""
+from __future__ import annotations
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+
+def _parse_rate(raw: str) -> tuple[float, float]:
+    rate, _, burst = raw.partition(",")
+    return float(rate), float(burst or rate)
+
+
+ENABLED = os.getenv("RATE_LIMIT", "1").strip().lower() not in ("0", "false", "no", "off")
+AUTH_IP = _parse_rate(os.getenv("RATE_LIMIT_AUTH_IP", "1,30"))
+WRITE_TOKEN = _parse_rate(os.getenv("RATE_LIMIT_WRITE_TOKEN", "2,10"))
+WRITE_IP = _parse_rate(os.getenv("RATE_LIMIT_WRITE_IP", "10,50"))
+MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", "8"))
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Consume one token. Returns 0 when admitted, otherwise seconds until a token is available."""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class BucketTable:
+    """Per-key token buckets with LRU eviction once `max_keys` is reached.
+
+    Not locked: the middleware only touches it from the event loop thread.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = MAX_KEYS, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, key: str) -> float:
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.burst, now)
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+
+class ConcurrencyLimiter:
+    """Non-blocking in-flight counter: over the limit means shed now, not queue."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_flight = 0
+
+    def try_acquire(self) -> bool:
+        if self.limit and self.in_flight >= self.limit:
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+
+@dataclass
+class Rule:
+    name: str
+    methods: frozenset
+    path_prefix: str
+    key: str  # "ip" or "token"
+    table: BucketTable
+
+    def matches(self, method: str, path: str) -> bool:
+        return method in self.methods and path.startswith(self.path_prefix)
+
+
+def default_rules() -> list[Rule]:
+    return [
+        Rule("auth-ip", frozenset({"POST"}), "/api/auth/", "ip", BucketTable(*AUTH_IP)),
+        Rule("booking-token", WRITE_METHODS, "/api/reservations", "token", BucketTable(*WRITE_TOKEN)),
+        Rule("booking-ip", WRITE_METHODS, "/api/reservations", "ip", BucketTable(*WRITE_IP)),
+    ]
+
+
+def _bearer(scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            parts = value.decode("latin-1").split()
+            if len(parts) == 2 and parts[0].lower() == "bearer":
+                return parts[1]
+    return None
+
+
+async def _reject(send, retry_after: float, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying `rules` and a global write concurrency limit."""
+
+    def __init__(self, app, rules: Optional[list[Rule]] = None, write_concurrency: int = WRITE_CONCURRENCY):
+        self.app = app
+        self.rules = default_rules() if rules is None else rules
+        self.writes = ConcurrencyLimiter(write_concurrency)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method, path = scope["method"], scope["path"]
+        for rule in self.rules:
+            if not rule.matches(method, path):
+                continue
+            if rule.key == "token":
+                key = _bearer(scope)
+                if key is None:
+                    continue  # unauthenticated; the route itself answers 401
+            else:
+                client = scope.get("client")
+                key = client[0] if client else "unknown"
+            wait = rule.table.check(key)
+            if wait > 0:
+                await _reject(send, wait, f"Rate limit exceeded ({rule.name})")
+                return
+
+        if method in WRITE_METHODS and path.startswith("/api/"):
+            if not self.writes.try_acquire():
+                await _reject(send, 1, "Server busy, retry shortly")
+                return
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                self.writes.release()
+            return
+        await self.app(scope, receive, send)
@@ -0,0 +1,184 @@
+"""Auto-release of seats whose reservation end_time has passed.
+
+An in-process min-heap of (end_time, reservation_id) drives a daemon thread that
+sleeps until the next deadline and then completes every due reservation in
+batched UPDATE statements. Nothing lives only in memory: the heap is reloaded
+from active reservations at startup (overdue ones are released straight away)
+and re-synced periodically to pick up bookings made by other workers.
+
+Workers coordinate through the DB rather than with each other. The reservation
+UPDATE only matches rows that are still active and due, and RETURNING reports
+which rows this worker actually flipped; only those seats are released. A second
+worker racing on the same batch matches nothing and releases nothing.
+
+Environment:
+  RELEASE_SCHEDULER=1          set to 0 to disable the background thread
+  RELEASE_BATCH=200            reservations completed per transaction
+  RELEASE_RESYNC_S=300         reload due times from the DB this often
+"""
+from __future__ import annotations
+import heapq
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from . import cache, invalidation, models, seatmap
+from .database import SessionLocal
+
+log = logging.getLogger("smartseat.release")
+
+ENABLED = os.getenv("RELEASE_SCHEDULER", "1").strip().lower() not in ("0", "false", "no", "off")
+BATCH_SIZE = int(os.getenv("RELEASE_BATCH", "200"))
+RESYNC_S = float(os.getenv("RELEASE_RESYNC_S", "300"))
+
+
+def _utc_ts(dt: datetime) -> float:
+    # SQLite hands DateTime(timezone=True) back naive; values are written as UTC.
+    return (dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def release_batch(db: Session, reservation_ids: list[int], now: Optional[datetime] = None) -> int:
+    """Complete the due, still-active reservations among `reservation_ids` and free their seats.
+
+    Returns the number of reservations this call completed.
+    """
+    now = now or datetime.now(timezone.utc)
+    due = (
+        models.Reservation.id.in_(reservation_ids),
+        models.Reservation.status == models.ReservationStatus.active,
+        models.Reservation.end_time <= now,
+    )
+    released_seats = db.execute(
+        update(models.Reservation).where(*due)
+        .values(status=models.ReservationStatus.completed)
+        .returning(models.Reservation.seat_id)
+    ).scalars().all()
+    if not released_seats:
+        db.rollback()
+        return 0
+    rooms = db.execute(
+        update(models.Seat).where(models.Seat.id.in_(released_seats))
+        .values(status=models.SeatStatus.available)
+        .returning(models.Seat.id, models.Seat.room_id)
+    ).all()
+    for room_id in {room_id for _, room_id in rooms}:
+        invalidation.publish("room", room_id, db=db)
+    db.commit()
+    for seat_id, room_id in rooms:
+        cache.room_seats.invalidate(room_id)
+        seatmap.mark_available(room_id, seat_id)
+    return len(released_seats)
+
+
+class ReleaseScheduler:
+    def __init__(self, session_factory=SessionLocal, batch_size: int = BATCH_SIZE, resync_s: float = RESYNC_S):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.resync_s = resync_s
+        self._heap: list[tuple[float, int]] = []
+        self._due_at: dict[int, float] = {}  # reservation id -> deadline currently in the heap
+        self._cv = threading.Condition()
+        self._stop = False
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return len(self._due_at)
+
+    def schedule(self, reservation_id: int, end_time: Optional[datetime]) -> None:
+        if end_time is None:
+            return
+        ts = _utc_ts(end_time)
+        with self._cv:
+            if self._due_at.get(reservation_id) == ts:
+                return
+            self._due_at[reservation_id] = ts
+            heapq.heappush(self._heap, (ts, reservation_id))
+            if self._heap[0][1] == reservation_id:
+                self._cv.notify()  # new earliest deadline
+
+    def load(self) -> int:
+        """(Re)load deadlines of all active reservations with an end_time."""
+        db = self.session_factory()
+        try:
+            rows = db.execute(
+                select(models.Reservation.id, models.Reservation.end_time).where(
+                    models.Reservation.status == models.ReservationStatus.active,
+                    models.Reservation.end_time.is_not(None),
+                )
+            ).all()
+        finally:
+            db.close()
+        for rid, end in rows:
+            self.schedule(rid, end)
+        return len(rows)
+
+    def _pop_due(self, now_ts: float) -> list[int]:
+        ids = []
+        with self._cv:
+            while self._heap and self._heap[0][0] <= now_ts and len(ids) < self.batch_size:
+                ts, rid = heapq.heappop(self._heap)
+                if self._due_at.get(rid) == ts:  # skip superseded entries
+                    del self._due_at[rid]
+                    ids.append(rid)
+        return ids
+
+    def run_due(self, now: Optional[datetime] = None) -> int:
+        """Release everything due by `now`, one batch per transaction."""
+        now = now or datetime.now(timezone.utc)
+        released = 0
+        while True:
+            ids = self._pop_due(now.timestamp())
+            if not ids:
+                return released
+            db = self.session_factory()
+            try:
+                released += release_batch(db, ids, now)
+            except Exception:
+                db.rollback()
+                log.exception("seat release batch failed; will retry on next resync")
+            finally:
+                db.close()
+
+    def _loop(self):
+        next_resync = 0.0
+        while True:
+            now = datetime.now(timezone.utc).timestamp()
+            if now >= next_resync:
+                try:
+                    self.load()
+                except Exception:
+                    log.exception("failed to load reservation deadlines")
+                next_resync = now + self.resync_s
+            n = self.run_due()
+            if n:
+                log.info("released %d seats from ended reservations", n)
+            with self._cv:
+                if self._stop:
+                    return
+                wake = min(next_resync, self._heap[0][0] if self._heap else next_resync)
+                self._cv.wait(timeout=max(0.0, wake - datetime.now(timezone.utc).timestamp()))
+                if self._stop:
+                    return
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._loop, name="seat-release", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cv:
+            self._stop = True
+            self._cv.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+scheduler = ReleaseScheduler()
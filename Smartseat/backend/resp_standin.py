@@ -0,0 +1,106 @@
+"""Minimal Redis-protocol stand-in (PING / PUBLISH / SUBSCRIBE / QUIT) for testing the
+redis:// cache bus without a Redis server.
+
+Run: python -m backend.resp_standin --port 6390
+"""
+from __future__ import annotations
+import argparse
+import socketserver
+import threading
+
+from .invalidation import _resp_command, read_resp
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server: RespStandIn = self.server
+        lock = threading.Lock()  # PUBLISH from other connections writes to this socket too
+
+        def write(data: bytes):
+            with lock:
+                self.wfile.write(data)
+                self.wfile.flush()
+
+        channels: set[str] = set()
+        try:
+            while True:
+                cmd = read_resp(self.rfile)
+                if not isinstance(cmd, list) or not cmd:
+                    write(b"-ERR protocol error\r\n")
+                    continue
+                name = cmd[0].upper()
+                if name == "PING":
+                    write(b"+PONG\r\n")
+                elif name == "PUBLISH" and len(cmd) == 3:
+                    write(b":%d\r\n" % server.publish(cmd[1], cmd[2]))
+                elif name == "SUBSCRIBE" and len(cmd) >= 2:
+                    for ch in cmd[1:]:
+                        channels.add(ch)
+                        server.subscribe(ch, write)
+                        b = ch.encode("utf-8")
+                        write(b"*3\r\n$9\r\nsubscribe\r\n$%d\r\n%s\r\n:%d\r\n" % (len(b), b, len(channels)))
+                elif name == "QUIT":
+                    write(b"+OK\r\n")
+                    return
+                else:
+                    write(b"-ERR unknown command\r\n")
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            for ch in channels:
+                server.unsubscribe(ch, write)
+
+
+class RespStandIn(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), _Handler)
+        self._subs: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"redis://{host}:{port}"
+
+    def subscribe(self, channel, writer):
+        with self._lock:
+            self._subs.setdefault(channel, []).append(writer)
+
+    def unsubscribe(self, channel, writer):
+        with self._lock:
+            if writer in self._subs.get(channel, []):
+                self._subs[channel].remove(writer)
+
+    def publish(self, channel: str, message: str) -> int:
+        with self._lock:
+            writers = list(self._subs.get(channel, []))
+        frame = _resp_command("message", channel, message)
+        delivered = 0
+        for w in writers:
+            try:
+                w(frame)
+                delivered += 1
+            except OSError:
+                self.unsubscribe(channel, w)
+        return delivered
+
+    def start(self) -> "RespStandIn":
+        threading.Thread(target=self.serve_forever, name="resp-standin", daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Redis-protocol stand-in for the cache bus.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    server = RespStandIn(args.host, args.port)
+    print(f"RESP stand-in listening on {server.url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
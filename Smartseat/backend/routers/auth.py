@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Header
 from sqlalchemy.orm import Session
 from typing import Optional
+from contextvars import ContextVar
 from ..database import get_db
 from .. import models, schemas
-from ..utils import hash_password, verify_password, new_token
+from ..utils import hash_password, verify_password
+from .. import statements, tokens, write_batcher
 from sqlalchemy.exc import IntegrityError
 import logging
 
@@ -15,7 +17,7 @@ def signup(payload: schemas.UserCreate, db: Session = Depends(get_db)):
     email = payload.email.strip().lower()
     if len(payload.password) < 6:
         raise HTTPException(status_code=400, detail="Password must be at least 6 characters")
-    if db.query(models.User).filter(models.User.email == email).first():
+    if db.execute(statements.USER_BY_EMAIL, {"email": email}).scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
     user = models.User(name=payload.name, email=email, password_hash=hash_password(payload.password))
     db.add(user)
@@ -39,29 +41,50 @@ def signup(payload: schemas.UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=schemas.TokenResponse)
 def login(payload: schemas.LoginRequest, db: Session = Depends(get_db)):
     email = payload.email.strip().lower()
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = db.execute(statements.USER_BY_EMAIL, {"email": email}).scalar_one_or_none()
     if not user or not verify_password(payload.password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    # issue token
-    token = models.Token(user_id=user.id, token=new_token())
-    db.add(token)
+    # issue token (also trims this user's oldest tokens beyond the per-user cap)
+    def issue(wdb: Session) -> models.Token:
+        token = tokens.issue_token(wdb, user)
+        wdb.flush()
+        wdb.refresh(token)
+        return token
+
     try:
-        db.commit()
-        db.refresh(token)
+        token = write_batcher.execute(db, issue)  # grouped with concurrent logins when WRITE_BATCH_MS is set
     except Exception:
-        db.rollback()
+        logging.exception("Failed to issue token for %s", email)
         raise HTTPException(status_code=500, detail="Failed to issue token")
-    return schemas.TokenResponse(token=token.token)
+    return schemas.TokenResponse(token=token.token, expires_at=token.expires_at)
 
-def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> models.User:
+def _bearer_value(authorization: Optional[str]) -> str:
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=401, detail="Missing bearer token")
-    token_value = authorization.split()[1]
-    token = db.query(models.Token).filter_by(token=token_value).first()
+    return authorization.split()[1]
+
+# Set by /api/batch, which resolves the caller once for all of its sub-requests.
+batch_user: ContextVar[Optional[models.User]] = ContextVar("batch_user", default=None)
+
+def get_current_user(authorization: Optional[str] = Header(None), db: Session = Depends(get_db)) -> models.User:
+    user = batch_user.get()
+    if user is not None:
+        return user
+    token = tokens.resolve(db, _bearer_value(authorization))
     if not token:
-        raise HTTPException(status_code=401, detail="Invalid token")
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
     return token.user
 
+@router.post("/logout")
+def logout(all: bool = False, authorization: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """Revoke the presented token, or every token of its user with ?all=true."""
+    token_value = _bearer_value(authorization)
+    token = tokens.resolve(db, token_value)
+    if not token:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    revoked = tokens.revoke_all(db, token.user_id) if all else int(tokens.revoke(db, token_value))
+    return {"ok": True, "revoked": revoked}
+
 @router.get("/me", response_model=schemas.UserOut)
 def me(user: models.User = Depends(get_current_user)):
     return user
@@ -0,0 +1,30 @@
+import asyncio
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException
+from .. import backtest, models, schemas
+from .auth import get_current_user
+
+router = APIRouter(prefix="/api/backtest", tags=["backtest"])
+
+@router.get("/models", response_model=list[str])
+def list_models(user: models.User = Depends(get_current_user)):
+    return backtest.list_bundles()
+
+@router.post("", response_model=list[schemas.BacktestReportOut])
+async def run_backtest(payload: schemas.BacktestRequest, user: models.User = Depends(get_current_user)):
+    paths = []
+    for name in payload.models:
+        path = backtest.bundle_path(name)
+        if path is None:
+            raise HTTPException(status_code=404, detail=f"Model bundle not found: {name}")
+        paths.append(path)
+    # CPU-bound: every bundle runs on the shared, bounded process pool, never on the event loop.
+    pool = backtest.shared_pool()
+    futures = [
+        pool.submit(backtest.backtest_bundle, path, horizon=payload.horizon, initial=payload.initial,
+                    step=payload.step, alpha=payload.alpha, mode=payload.mode,
+                    max_origins=payload.max_refit_origins if payload.mode == "refit" else None)
+        for path in paths
+    ]
+    reports = await asyncio.gather(*(asyncio.wrap_future(f) for f in futures))
+    return [asdict(r) for r in reports]
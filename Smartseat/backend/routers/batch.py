@@ -0,0 +1,161 @@
+"""Composite requests: several API calls in one round trip.
+
+POST /api/batch {"requests": [{"id": "me", "path": "/api/auth/me"},
+                              {"id": "seats", "path": "/api/seats?status=available"},
+                              {"id": "mine", "path": "/api/reservations/mine"}]}
+-> {"responses": [{"id": "me", "status": 200, "body": {...}}, ...]}  (request order)
+
+Each sub-request goes through the app in-process (routing, validation, rate
+limits and error handling as if called directly) but the batch resolves the
+caller's token once and hands its sessions to the sub-requests instead of each
+one opening its own. Runs of consecutive GETs are spread over up to
+BATCH_CONCURRENCY lanes that run concurrently; the GETs in one lane share one
+session (a Session is not thread-safe, so lanes cannot share one). Writes run
+one at a time, in order, on the batch's primary session, and every read after
+the first write goes to the primary so the batch sees its own writes.
+
+A failing sub-request only fails its own entry; the batch answers 200 unless
+it is malformed, too large (BATCH_MAX) or carries an invalid token (401).
+
+Environment:
+  BATCH_MAX=20            sub-requests per batch
+  BATCH_CONCURRENCY=4     lanes for consecutive GETs (1 = one shared session)
+"""
+import asyncio
+import logging
+import os
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from .. import database, schemas, tokens
+from ..fastjson import dumps
+from .auth import _bearer_value, batch_user
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/batch", tags=["batch"])
+
+BATCH_MAX = int(os.getenv("BATCH_MAX", "20"))
+BATCH_CONCURRENCY = max(1, int(os.getenv("BATCH_CONCURRENCY", "4")))
+READ_METHODS = ("GET",)
+_DROP_HEADERS = {b"content-length", b"content-type", b"accept-encoding"}
+
+
+def _sub_scope(parent: dict, sub: schemas.BatchSubRequest, body: bytes) -> dict:
+    path, _, query = sub.path.partition("?")
+    headers = [(k, v) for k, v in parent["headers"] if k not in _DROP_HEADERS]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    return {
+        "type": "http", "asgi": parent.get("asgi", {"version": "3.0"}), "http_version": parent.get("http_version", "1.1"),
+        "method": sub.method, "scheme": parent.get("scheme", "http"), "root_path": parent.get("root_path", ""),
+        "path": path, "raw_path": path.encode(), "query_string": query.encode(), "headers": headers,
+        "client": parent.get("client"), "server": parent.get("server"), "extensions": {},
+    }
+
+
+async def dispatch(app, parent: dict, sub: schemas.BatchSubRequest) -> tuple[int, bytes]:
+    """Run one sub-request through `app`; returns (status, body as a JSON value)."""
+    if not sub.path.startswith("/api/") or sub.path.split("?")[0].rstrip("/") == router.prefix:
+        return 400, dumps({"detail": "Sub-request path must be an /api/ route other than /api/batch"})
+    body = b"" if sub.body is None else dumps(sub.body)
+    done = asyncio.Event()
+    received = False
+    status, content_type, chunks = 500, b"", []
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                done.set()
+
+    try:
+        await app(_sub_scope(parent, sub, body), receive, send)
+    except Exception:
+        # ServerErrorMiddleware re-raises after sending its 500; keep that response.
+        log.exception("Batch sub-request %s %s failed", sub.method, sub.path)
+        if not done.is_set():
+            return 500, dumps({"detail": "Internal Server Error"})
+    finally:
+        done.set()
+    raw = b"".join(chunks)
+    if not raw:
+        return status, b"null"
+    if content_type.startswith(b"application/json"):
+        return status, raw  # spliced into the batch response as is
+    return status, dumps(raw.decode("utf-8", "replace"))
+
+
+async def _run_lane(app, parent, items, session, results):
+    ctx = database.batch_session.set(session)
+    try:
+        for i, sub in items:
+            results[i] = await dispatch(app, parent, sub)
+    finally:
+        database.batch_session.reset(ctx)
+
+
+@router.post("")
+async def batch(payload: schemas.BatchRequest, request: Request):
+    """Run the sub-requests (see module docstring); one entry per sub-request, in order."""
+    subs = payload.requests
+    if len(subs) > BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX} sub-requests per batch")
+    authorization = request.headers.get("authorization")
+    primary = database.SessionLocal()
+    sessions = [primary]
+    wrote = False
+    user_ctx = None
+    try:
+        if authorization:
+            token = await run_in_threadpool(tokens.resolve, primary, _bearer_value(authorization))
+            if not token:
+                raise HTTPException(status_code=401, detail="Invalid or expired token")
+            user = token.user
+            primary.expunge(user)  # loaded, detached: safe to hand to every lane
+            user_ctx = batch_user.set(user)
+        results: list = [None] * len(subs)
+        i = 0
+        while i < len(subs):
+            if subs[i].method in READ_METHODS:
+                j = i
+                while j < len(subs) and subs[j].method in READ_METHODS:
+                    j += 1
+                group = list(enumerate(subs[i:j], start=i))
+                if wrote:  # read our own writes: stay on the primary session, in order
+                    await _run_lane(request.app, request.scope, group, primary, results)
+                else:
+                    lanes = [group[k::BATCH_CONCURRENCY] for k in range(min(BATCH_CONCURRENCY, len(group)))]
+                    factory = database.SessionLocal if database.is_pinned(authorization) else database.ReadSessionLocal
+                    lane_sessions = [factory() for _ in lanes]
+                    sessions += lane_sessions
+                    await asyncio.gather(*(_run_lane(request.app, request.scope, lane, s, results)
+                                           for lane, s in zip(lanes, lane_sessions)))
+                i = j
+            else:
+                await _run_lane(request.app, request.scope, [(i, subs[i])], primary, results)
+                await run_in_threadpool(primary.rollback)  # drop anything a failed write left uncommitted
+                wrote = True
+                i += 1
+    finally:
+        if user_ctx is not None:
+            batch_user.reset(user_ctx)
+        for s in sessions:
+            await run_in_threadpool(s.close)
+        if wrote and authorization:
+            database.pin_primary(authorization)  # later plain GETs read the batch's writes too
+    parts = [b'{"id":' + dumps(sub.id) + b',"status":' + str(status).encode() + b',"body":' + body + b"}"
+             for sub, (status, body) in zip(subs, results)]
+    return Response(content=b'{"responses":[' + b",".join(parts) + b"]}", media_type="application/json")
@@ -0,0 +1,44 @@
+import json
+import os
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+from .. import profiling, statements
+from ..fastjson import json_response
+
+router = APIRouter(prefix="/api/diag", tags=["diagnostics"])
+
+def require_diag_token(x_diag_token: Optional[str] = Header(None)) -> None:
+    # Diagnostics stay invisible unless DIAG_TOKEN is set, and then need that token.
+    expected = os.getenv("DIAG_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_diag_token or not secrets.compare_digest(x_diag_token, expected):
+        raise HTTPException(status_code=403, detail="Invalid diagnostics token")
+
+@router.get("/statements", dependencies=[Depends(require_diag_token)])
+def statement_cache(measure: bool = True):
+    """Compile-cache hit rates of the pre-built hot-path statements and the CPU they save."""
+    return statements.report(measure=measure)
+
+@router.get("/profiles", dependencies=[Depends(require_diag_token)])
+def list_profiles():
+    """Recent request profiles (PROFILING=1), newest first."""
+    return profiling.list_profiles()
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_diag_token)])
+def get_profile(profile_id: str):
+    """One capture: request, timings, SQL timeline and top functions."""
+    path = profiling.profile_path(profile_id, ".json")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return json_response(json.loads(path.read_text()))
+
+@router.get("/profiles/{profile_id}/pstats", dependencies=[Depends(require_diag_token)])
+def download_profile(profile_id: str):
+    """The raw cProfile dump, for snakeviz or `python -m pstats`."""
+    path = profiling.profile_path(profile_id, ".prof")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
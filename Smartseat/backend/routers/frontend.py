@@ -0,0 +1,46 @@
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import RedirectResponse, Response
+from .. import static_assets
+
+router = APIRouter(prefix="/app", tags=["frontend"], include_in_schema=False)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # pages: always revalidate, usually a 304
+
+def accepted_encodings(header: str | None) -> set[str]:
+    accepted = set()
+    for part in (header or "").split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name.strip().lower())
+    return accepted
+
+@router.get("")
+def app_root():
+    return RedirectResponse("/app/", status_code=308)
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"])
+def asset(path: str, request: Request):
+    item = static_assets.current().get(path)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    accepted = accepted_encodings(request.headers.get("accept-encoding"))
+    encoding = next((e for e in item.encodings if e in accepted), None)
+    # Strong validator per representation: the gzip and identity bodies differ byte for byte.
+    etag = f'"{item.etag}-{encoding}"' if encoding else f'"{item.etag}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE if item.immutable else REVALIDATE}
+    if item.encodings:
+        headers["Vary"] = "Accept-Encoding"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    suffix = dict(static_assets.ENCODINGS).get(encoding, "")
+    file = item.path.with_name(item.path.name + suffix)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    if request.method == "HEAD":
+        # Same headers as the GET, including the real Content-Length, and no body.
+        headers["Content-Length"] = str(file.stat().st_size)
+        return Response(media_type=item.type, headers=headers)
+    # Fixed-length bodies (Content-Length, never chunked) keep the connection reusable.
+    return Response(content=file.read_bytes(), media_type=item.type, headers=headers)
@@ -1,61 +1,121 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, select, update, String, type_coerce
 from datetime import datetime, timedelta, timezone
-from ..database import get_db
-from .. import models, schemas
+from ..database import get_db, get_read_db
+from .. import cache, invalidation, models, release_scheduler, schemas, seatmap, statements, write_batcher
+from ..seed import DEFAULT_ROOM
 from .auth import get_current_user
+from ..fastjson import json_response
 
 router = APIRouter(prefix="/api/reservations", tags=["reservations"])
 
+# Reservation + seat columns for the /mine fast path: one joined select, plain tuples.
+RESERVATION_COLUMNS = (
+    models.Reservation.id,
+    models.Seat.seat_code,
+    models.Seat.room_id,
+    type_coerce(models.Seat.seat_type, String).label("seat_type"),
+    type_coerce(models.Reservation.status, String).label("status"),
+    models.Reservation.start_time,
+    models.Reservation.end_time,
+    models.Reservation.created_at,
+)
+
+def _to_utc(dt: datetime | None) -> datetime | None:
+    if dt is None or dt.tzinfo is None:
+        return dt  # naive input is taken as UTC
+    return dt.astimezone(timezone.utc)
+
+def _default_room_id(db: Session) -> int | None:
+    return db.execute(
+        select(models.Room.id).join(models.Campus, models.Campus.id == models.Room.campus_id)
+        .where(models.Campus.code == DEFAULT_ROOM["campus"], models.Room.code == DEFAULT_ROOM["code"])
+    ).scalar()
+
 @router.get("/mine", response_model=list[schemas.ReservationOut])
-def my_reservations(user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    res = []
-    for r in db.query(models.Reservation).filter_by(user_id=user.id).order_by(models.Reservation.created_at.desc()).all():
-        res.append(schemas.ReservationOut(
-            id=r.id, seat_code=r.seat.seat_code, seat_type=r.seat.seat_type.value if hasattr(r.seat.seat_type, "value") else r.seat.seat_type, 
-            status=r.status.value if hasattr(r.status, "value") else r.status, start_time=r.start_time, end_time=r.end_time, created_at=r.created_at
-        ))
-    return res
+def my_reservations(user: models.User = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    stmt = (
+        select(*RESERVATION_COLUMNS)
+        .join(models.Seat, models.Seat.id == models.Reservation.seat_id)
+        .where(models.Reservation.user_id == user.id)
+        .order_by(models.Reservation.created_at.desc())
+    )
+    return json_response([
+        {"id": rid, "seat_code": code, "room_id": room_id, "seat_type": stype, "status": rstatus,
+         "start_time": start, "end_time": end, "created_at": created}
+        for rid, code, room_id, stype, rstatus, start, end, created in db.execute(stmt)
+    ])
 
 @router.post("", response_model=schemas.ReservationOut)
 def create_reservation(payload: schemas.ReservationCreate, user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    seat = db.query(models.Seat).filter_by(seat_code=payload.seat_code).first()
-    if not seat:
+    if payload.room_id is None:
+        matches = db.execute(statements.SEAT_BY_CODE, {"seat_code": payload.seat_code}).scalars().all()
+    else:
+        matches = db.execute(statements.SEAT_BY_CODE_IN_ROOM, {"seat_code": payload.seat_code, "room_id": payload.room_id}).scalars().all()
+    if not matches:
         raise HTTPException(status_code=404, detail="Seat not found")
+    if len(matches) > 1 and payload.room_id is None:
+        # Clients that predate rooms send a bare code: it names a seat in the default room.
+        default_room = _default_room_id(db)
+        matches = [s for s in matches if s.room_id == default_room] or matches
+    if len(matches) > 1:
+        raise HTTPException(status_code=400, detail="Seat code exists in several rooms; pass room_id")
+    seat = matches[0]
     if seat.status == models.SeatStatus.booked:
         raise HTTPException(status_code=409, detail="Seat already booked")
-    # Optional time window
-    start = payload.start_time or datetime.now(timezone.utc)
-    end = payload.end_time
-    # Mark seat booked & create reservation (simple model)
-    seat.status = models.SeatStatus.booked
-    r = models.Reservation(user_id=user.id, seat_id=seat.id, start_time=start, end_time=end, status=models.ReservationStatus.active)
-    db.add(r)
-    db.commit()
-    db.refresh(r)
+    # Optional time window (stored as UTC so the release scheduler compares like with like)
+    start = _to_utc(payload.start_time) or datetime.now(timezone.utc)
+    end = _to_utc(payload.end_time)
+    seat_id, room_id, user_id = seat.id, seat.room_id, user.id
+
+    def book(wdb: Session) -> models.Reservation:
+        # Claim the seat only if it is still free at write time (a concurrent booking may have won).
+        claimed = wdb.execute(
+            update(models.Seat)
+            .where(models.Seat.id == seat_id, models.Seat.status == models.SeatStatus.available)
+            .values(status=models.SeatStatus.booked)
+        ).rowcount
+        if not claimed:
+            raise HTTPException(status_code=409, detail="Seat already booked")
+        r = models.Reservation(user_id=user_id, seat_id=seat_id, start_time=start, end_time=end, status=models.ReservationStatus.active)
+        wdb.add(r)
+        invalidation.publish("room", room_id, db=wdb)  # part of this transaction (db bus) or sent after it commits
+        wdb.flush()
+        wdb.refresh(r)
+        return r
+
+    # One transaction per request, or grouped with concurrent writes when WRITE_BATCH_MS is set
+    r = write_batcher.execute(db, book)
+    cache.room_seats.invalidate(seat.room_id)
+    seatmap.mark_booked(seat.room_id, seat.id)
+    release_scheduler.scheduler.schedule(r.id, r.end_time)
     return schemas.ReservationOut(
-        id=r.id, seat_code=seat.seat_code, seat_type=seat.seat_type.value if hasattr(seat.seat_type, "value") else seat.seat_type,
+        id=r.id, seat_code=seat.seat_code, room_id=seat.room_id, seat_type=seat.seat_type.value if hasattr(seat.seat_type, "value") else seat.seat_type,
         status=r.status.value if hasattr(r.status, "value") else r.status, start_time=r.start_time, end_time=r.end_time, created_at=r.created_at
     )
 
 @router.delete("/{reservation_id}")
 def cancel_reservation(reservation_id: int, user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    r = db.query(models.Reservation).filter_by(id=reservation_id, user_id=user.id).first()
-    if not r:
-        raise HTTPException(status_code=404, detail="Reservation not found")
-    if r.status == models.ReservationStatus.cancelled:
-        return {"ok": True}
-    # To avoid violating UniqueConstraint(seat_id, status) on repeated cycles,
-    # remove any prior cancelled records for this seat before marking this one cancelled.
-    db.query(models.Reservation).filter(
-        models.Reservation.seat_id == r.seat_id,
-        models.Reservation.status == models.ReservationStatus.cancelled,
-        models.Reservation.id != r.id,
-    ).delete(synchronize_session=False)
-    r.status = models.ReservationStatus.cancelled
-    # free the seat
-    seat = r.seat
-    seat.status = models.SeatStatus.available
-    db.commit()
+    user_id = user.id
+
+    def cancel(wdb: Session) -> tuple[int, int | None] | None:
+        r = wdb.query(models.Reservation).filter_by(id=reservation_id, user_id=user_id).first()
+        if not r:
+            raise HTTPException(status_code=404, detail="Reservation not found")
+        if r.status in (models.ReservationStatus.cancelled, models.ReservationStatus.completed):
+            # completed: the seat was already released (and may be booked by someone else now)
+            return None
+        r.status = models.ReservationStatus.cancelled
+        # free the seat
+        seat = r.seat
+        seat.status = models.SeatStatus.available
+        invalidation.publish("room", seat.room_id, db=wdb)
+        return seat.id, seat.room_id
+
+    freed = write_batcher.execute(db, cancel)
+    if freed is not None:
+        seat_id, room_id = freed
+        cache.room_seats.invalidate(room_id)
+        seatmap.mark_available(room_id, seat_id)
     return {"ok": True}
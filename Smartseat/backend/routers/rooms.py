@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from ..database import get_read_db, reads_primary
+from .. import cache, models, schemas, fastjson, seatmap, occupancy
+from .seats import SEAT_COLUMNS, seat_filters, seat_rows_to_dicts
+from .auth import get_current_user
+
+router = APIRouter(prefix="/api", tags=["rooms"])
+
+@router.get("/campuses", response_model=list[schemas.CampusOut])
+def list_campuses(db: Session = Depends(get_read_db)):
+    return db.query(models.Campus).order_by(models.Campus.id).all()
+
+@router.get("/campuses/{campus_code}/rooms", response_model=list[schemas.RoomOut])
+def list_rooms(campus_code: str, block: str | None = None, floor: int | None = None, db: Session = Depends(get_read_db)):
+    campus = db.query(models.Campus).filter_by(code=campus_code.lower()).first()
+    if not campus:
+        raise HTTPException(status_code=404, detail="Campus not found")
+    q = db.query(models.Room).filter(models.Room.campus_id == campus.id)
+    if block:
+        q = q.filter(models.Room.block == block.upper())
+    if floor is not None:
+        q = q.filter(models.Room.floor == floor)
+    return q.order_by(models.Room.block, models.Room.floor, models.Room.code).all()
+
+@router.get("/rooms/{room_id}", response_model=schemas.RoomOut)
+def get_room(room_id: int, db: Session = Depends(get_read_db)):
+    room = db.get(models.Room, room_id)
+    if not room:
+        raise HTTPException(status_code=404, detail="Room not found")
+    return room
+
+@router.get("/rooms/{room_id}/seats", response_model=list[schemas.SeatOut])
+def list_room_seats(room_id: int, seat_type: str | None = None, status: str | None = None, db: Session = Depends(get_read_db)):
+    """Seat map for one room: served from ix_seats_room_status and cached per room (primary reads only) until a booking changes it."""
+    subkey = ((seat_type or "").lower(), (status or "").lower())
+    body = cache.room_seats.get(room_id, subkey)
+    if body is None:
+        clauses = seat_filters(seat_type, status)
+        rows = db.execute(
+            select(*SEAT_COLUMNS).where(models.Seat.room_id == room_id, *clauses).order_by(models.Seat.seat_code)
+        ).all()
+        if not rows and db.get(models.Room, room_id) is None:
+            raise HTTPException(status_code=404, detail="Room not found")
+        body = fastjson.dumps(seat_rows_to_dicts(rows))
+        if reads_primary(db):  # a lagging replica's map would outlive the booking's invalidation
+            cache.room_seats.set(room_id, subkey, body)
+    return Response(content=body, media_type="application/json")
+
+SLOT_MINUTES = (15, 30, 60)
+
+def _check_occupancy_args(room_id: int, slot_minutes: int, days: int, db: Session):
+    if slot_minutes not in SLOT_MINUTES:
+        raise HTTPException(status_code=400, detail=f"slot_minutes must be one of {SLOT_MINUTES}")
+    if not 1 <= days <= 366:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 366")
+    if db.get(models.Room, room_id) is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+
+@router.get("/rooms/{room_id}/occupancy", response_model=schemas.OccupancyOut)
+def get_room_occupancy(
+    room_id: int,
+    days: int = 1,
+    slot_minutes: int = 60,
+    how: str = "mean",
+    seat_type: str | None = None,
+    db: Session = Depends(get_read_db),
+):
+    """Concurrent occupancy per slot over the last `days` days (up to now), per seat type."""
+    _check_occupancy_args(room_id, slot_minutes, days, db)
+    if how not in occupancy.HOWS:
+        raise HTTPException(status_code=400, detail=f"how must be one of {occupancy.HOWS}")
+    if seat_type and seat_type.lower() not in occupancy.SEAT_TYPES:
+        raise HTTPException(status_code=400, detail="Invalid seat_type")
+    now = datetime.now(timezone.utc)
+    slot_s = slot_minutes * 60
+    end = datetime.fromtimestamp(-(-int(now.timestamp()) // slot_s) * slot_s, tz=timezone.utc)
+    start = end - timedelta(days=days)
+    grid = occupancy.room_occupancy(db, room_id, start, end, slot_minutes, how, now=now)
+    capacity = occupancy.room_capacity(db, room_id)
+    types = [seat_type.lower()] if seat_type else occupancy.SEAT_TYPES
+    n = len(next(iter(grid.values())))
+    return schemas.OccupancyOut(
+        room_id=room_id, slot_minutes=slot_minutes, how=how,
+        slots=[start + timedelta(seconds=k * slot_s) for k in range(n)],
+        capacity={t: capacity.get(t, 0) for t in types},
+        occupied={t: [round(float(x), 3) for x in grid[t]] for t in types},
+    )
+
+@router.get("/rooms/{room_id}/occupancy/time-of-day", response_model=schemas.TimeOfDayUsageOut)
+def room_usage_by_time_of_day(
+    room_id: int,
+    days: int = 28,
+    slot_minutes: int = 60,
+    open_hour: int = 8,
+    close_hour: int = 17,
+    tz: str = "UTC",
+    db: Session = Depends(get_read_db),
+):
+    """Average usage per hour (or slot) of the opening hours, for the usage-by-time-of-day chart."""
+    _check_occupancy_args(room_id, slot_minutes, days, db)
+    if not 0 <= open_hour < close_hour <= 24:
+        raise HTTPException(status_code=400, detail="need 0 <= open_hour < close_hour <= 24")
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):  # ValueError: not a valid key at all (e.g. "../x")
+        raise HTTPException(status_code=400, detail="Unknown tz")
+    labels, occupied, capacity = occupancy.time_of_day(db, room_id, days, slot_minutes, open_hour, close_hour, tz)
+    return schemas.TimeOfDayUsageOut(
+        room_id=room_id, days=days, tz=tz, labels=labels, capacity=capacity,
+        occupied=[round(float(x), 3) for x in occupied],
+        usage_pct=[round(float(x) * 100 / capacity, 1) if capacity else 0.0 for x in occupied],
+    )
+
+@router.get("/rooms/{room_id}/recommendations", response_model=list[schemas.SeatRecommendation])
+def recommend_seats(
+    room_id: int,
+    near: str | None = None,
+    friend_email: str | None = None,
+    seat_type: str | None = None,
+    limit: int = 5,
+    user: models.User = Depends(get_current_user),  # signed-in only: friend lookups reveal where someone sits
+    db: Session = Depends(get_read_db),
+):
+    """Best available seats in a room, nearest to a seat code, to a friend's active booking,
+    or (with neither) to the front of the room; optionally restricted to one seat type.
+
+    A friend's booking is only used if that friend shares their seat with the caller
+    (PUT /api/users/me/seat-shares/{email}); otherwise it is a 404, exactly as if they
+    had no booking here."""
+    if seat_type:
+        try:
+            seat_type = models.SeatType(seat_type.lower()).value
+        except Exception:
+            raise HTTPException(status_code=400, detail="Invalid seat_type")
+    limit = max(1, min(limit, 50))
+    if db.get(models.Room, room_id) is None:
+        raise HTTPException(status_code=404, detail="Room not found")
+    idx = seatmap.get_index(db, room_id)
+
+    pos = (0, 0)  # front of the room
+    if friend_email:
+        friend_seat = db.execute(
+            select(models.Seat.seat_code)
+            .join(models.Reservation, models.Reservation.seat_id == models.Seat.id)
+            .join(models.User, models.User.id == models.Reservation.user_id)
+            .join(models.SeatShare, models.SeatShare.owner_id == models.User.id)
+            .where(
+                models.User.email == friend_email.strip().lower(),
+                models.SeatShare.viewer_id == user.id,
+                models.Reservation.status == models.ReservationStatus.active,
+                models.Seat.room_id == room_id,
+            )
+            .limit(1)
+        ).scalar()
+        if friend_seat is None:
+            raise HTTPException(status_code=404, detail="No booking shared with you by that friend in this room")
+        pos = seatmap.parse_seat_code(friend_seat) or pos
+    elif near:
+        pos = seatmap.parse_seat_code(near)
+        if pos is None:
+            raise HTTPException(status_code=400, detail="near must be a seat code like B7")
+    picks = idx.nearest(pos[0], pos[1], k=limit, seat_type=seat_type)
+    return [
+        schemas.SeatRecommendation(seat_id=r.seat.seat_id, seat_code=r.seat.seat_code, room_id=room_id,
+                                   seat_type=r.seat.seat_type, distance=r.distance)
+        for r in picks
+    ]
@@ -1,32 +1,62 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import select
-from ..database import get_db
-from .. import models, schemas
+from sqlalchemy import bindparam, select, String, type_coerce
+from ..database import get_read_db
+from .. import models, schemas, statements
+from ..fastjson import json_response
 
 router = APIRouter(prefix="/api/seats", tags=["seats"])
 
-@router.get("", response_model=list[schemas.SeatOut])
-def list_seats(db: Session = Depends(get_db), seat_type: str | None = None, status: str | None = None):
-    q = db.query(models.Seat)
-    # validate filters (case-insensitive)
+# Columns for the fast path. Enum columns are read back as their stored strings (member
+# names, identical to the values here) so no per-row Enum construction happens.
+SEAT_COLUMNS = (
+    models.Seat.id,
+    models.Seat.seat_code,
+    models.Seat.room_id,
+    type_coerce(models.Seat.seat_type, String).label("seat_type"),
+    type_coerce(models.Seat.status, String).label("status"),
+)
+
+def seat_rows_to_dicts(rows) -> list[dict]:
+    return [{"id": i, "seat_code": code, "room_id": room_id, "seat_type": stype, "status": sstatus}
+            for i, code, room_id, stype, sstatus in rows]
+
+def seat_filter_params(seat_type: str | None, status: str | None) -> dict:
+    """Validate the seat_type/status query filters (case-insensitive) into bind parameters."""
+    params = {}
     if seat_type:
         try:
-            st = models.SeatType(seat_type.lower())
+            params["seat_type"] = models.SeatType(seat_type.lower())
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid seat_type")
-        q = q.filter(models.Seat.seat_type == st)
     if status:
         try:
-            ss = models.SeatStatus(status.lower())
+            params["status"] = models.SeatStatus(status.lower())
         except Exception:
             raise HTTPException(status_code=400, detail="Invalid status")
-        q = q.filter(models.Seat.status == ss)
-    seats = q.order_by(models.Seat.seat_code).all()
-    # Coerce Enum -> str for Pydantic Literal types
-    out: list[schemas.SeatOut] = []
-    for s in seats:
-        stype = s.seat_type.value if hasattr(s.seat_type, "value") else str(s.seat_type)
-        sstatus = s.status.value if hasattr(s.status, "value") else str(s.status)
-        out.append(schemas.SeatOut(id=s.id, seat_code=s.seat_code, seat_type=stype, status=sstatus))
-    return out
+    return params
+
+def seat_filters(seat_type: str | None, status: str | None) -> list:
+    """Validate the seat_type/status query filters (case-insensitive) into WHERE clauses."""
+    params = seat_filter_params(seat_type, status)
+    return [getattr(models.Seat, col) == value for col, value in params.items()]
+
+# One pre-built statement per filter combination, keyed by the filters present; only the
+# bound values change per request (see statements.py).
+SEAT_LIST = {}
+for _filters in ((), ("seat_type",), ("status",), ("seat_type", "status")):
+    SEAT_LIST[frozenset(_filters)] = statements.register(
+        "seat_list" + "".join(f"_by_{f}" for f in _filters),
+        select(*SEAT_COLUMNS)
+        .where(*(getattr(models.Seat, f) == bindparam(f) for f in _filters))
+        .order_by(models.Seat.seat_code),
+        (lambda fs: lambda: select(*SEAT_COLUMNS).where(*(getattr(models.Seat, f) == "x" for f in fs))
+         .order_by(models.Seat.seat_code))(_filters),
+    )
+
+@router.get("", response_model=list[schemas.SeatOut])
+def list_seats(db: Session = Depends(get_read_db), seat_type: str | None = None, status: str | None = None):
+    params = seat_filter_params(seat_type, status)
+    rows = db.execute(SEAT_LIST[frozenset(params)], params).all()
+    # Tuples -> JSON bytes directly: no ORM hydration, no SeatOut per row, no second validation pass.
+    return json_response(seat_rows_to_dicts(rows))
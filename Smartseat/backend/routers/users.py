@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
 from ..database import get_db
 from .. import models, schemas
@@ -9,3 +10,37 @@ router = APIRouter(prefix="/api/users", tags=["users"])
 @router.get("/me", response_model=schemas.UserOut)
 def me(user: models.User = Depends(get_current_user)):
     return user
+
+# Seat sharing: who may find my seat through /api/rooms/{id}/recommendations?friend_email=.
+# Nobody can until the owner adds them here.
+
+def _user_by_email(db: Session, email: str) -> models.User:
+    other = db.execute(select(models.User).where(models.User.email == email.strip().lower())).scalar()
+    if other is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return other
+
+@router.get("/me/seat-shares", response_model=list[str])
+def list_seat_shares(user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Emails of the users who can see where I sit."""
+    return db.execute(
+        select(models.User.email).join(models.SeatShare, models.SeatShare.viewer_id == models.User.id)
+        .where(models.SeatShare.owner_id == user.id).order_by(models.User.email)
+    ).scalars().all()
+
+@router.put("/me/seat-shares/{email}")
+def add_seat_share(email: str, user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    viewer = _user_by_email(db, email)
+    exists = db.execute(select(models.SeatShare.id).where(
+        models.SeatShare.owner_id == user.id, models.SeatShare.viewer_id == viewer.id)).scalar()
+    if exists is None and viewer.id != user.id:
+        db.add(models.SeatShare(owner_id=user.id, viewer_id=viewer.id))
+        db.commit()
+    return {"ok": True}
+
+@router.delete("/me/seat-shares/{email}")
+def remove_seat_share(email: str, user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
+    viewer = _user_by_email(db, email)
+    db.execute(delete(models.SeatShare).where(models.SeatShare.owner_id == user.id, models.SeatShare.viewer_id == viewer.id))
+    db.commit()
+    return {"ok": True}
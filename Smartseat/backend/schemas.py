@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
-from typing import Optional, List, Literal
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
+from typing import Any, Optional, List, Literal
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -13,6 +13,7 @@ class LoginRequest(BaseModel):
 
 class TokenResponse(BaseModel):
     token: str
+    expires_at: Optional[datetime] = None
 
 class UserOut(BaseModel):
     id: int
@@ -21,21 +22,64 @@ class UserOut(BaseModel):
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
+class CampusOut(BaseModel):
+    id: int
+    code: str
+    name: str
+    address: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
+class RoomOut(BaseModel):
+    id: int
+    campus_id: int
+    block: str
+    floor: int
+    code: str
+    name: Optional[str] = None
+    model_config = ConfigDict(from_attributes=True)
+
 class SeatOut(BaseModel):
     id: int
     seat_code: str
+    room_id: Optional[int] = None
     seat_type: Literal["standard", "quiet", "accessible"]
     status: Literal["available", "booked"]
     model_config = ConfigDict(from_attributes=True)
 
+class SeatRecommendation(BaseModel):
+    seat_id: int
+    seat_code: str
+    room_id: int
+    seat_type: Literal["standard", "quiet", "accessible"]
+    distance: float  # grid distance (rows/columns) from the anchor seat
+
+class OccupancyOut(BaseModel):
+    room_id: int
+    slot_minutes: int
+    how: Literal["mean", "instant"]  # mean seats over each slot, or seats at each slot start
+    slots: list[datetime]  # slot starts (UTC)
+    capacity: dict[str, int]  # seats per seat type
+    occupied: dict[str, list[float]]  # seat type -> occupancy per slot
+
+class TimeOfDayUsageOut(BaseModel):
+    room_id: int
+    days: int
+    tz: str
+    labels: list[str]  # e.g. "8-9"
+    occupied: list[float]  # mean seats occupied in that slot over the last `days` days
+    usage_pct: list[float]  # occupied / capacity * 100
+    capacity: int
+
 class ReservationCreate(BaseModel):
     seat_code: str
+    room_id: Optional[int] = None  # without it, a code used in several rooms means the default room's seat
     start_time: Optional[datetime] = None
     end_time: Optional[datetime] = None
 
 class ReservationOut(BaseModel):
     id: int
     seat_code: str
+    room_id: Optional[int] = None
     seat_type: str
     status: str
     start_time: datetime
@@ -61,6 +105,37 @@ class ForecastDBResponse(BaseModel):
     steps: int
     points: List[ForecastPoint]
 
+class BacktestRequest(BaseModel):
+    # bundle names in MODEL_DIR, e.g. "sarimax_model" for sarimax_model.portable.json
+    models: List[str] = Field(..., min_length=1, max_length=8)
+    horizon: int = Field(6, ge=1, le=120)
+    initial: Optional[int] = Field(None, ge=1)  # observations before the first origin; default half the series
+    step: int = Field(1, ge=1)
+    alpha: float = Field(0.05, gt=0, lt=1)
+    mode: Literal["extend", "refit"] = "extend"
+    max_refit_origins: int = Field(50, ge=1, le=200)  # refit fits once per origin; a bundle with more origins fails
+
+class HorizonScoreOut(BaseModel):
+    h: int
+    n: int
+    mae: Optional[float] = None
+    mape: Optional[float] = None
+    coverage: Optional[float] = None
+
+class BacktestReportOut(BaseModel):
+    model: str
+    mode: str
+    nobs: int
+    initial: int
+    step: int
+    horizon: int
+    alpha: float
+    origins: int
+    seconds: float
+    ms_per_origin: float
+    per_horizon: List[HorizonScoreOut]
+    error: Optional[str] = None
+
 class TimeSeriesPointIn(BaseModel):
     ts: datetime
     value: float
@@ -91,3 +166,12 @@ class AggregationResponse(BaseModel):
     series_weekly: Optional[str]
     outcome: AggregationOutcome
     ran_at: datetime
+
+class BatchSubRequest(BaseModel):
+    id: Optional[str] = None  # echoed back so the client can match results
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    path: str  # e.g. "/api/seats?status=available"
+    body: Optional[Any] = None  # JSON body for POST/PUT/PATCH
+
+class BatchRequest(BaseModel):
+    requests: List[BatchSubRequest]
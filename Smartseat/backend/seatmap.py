@@ -0,0 +1,214 @@
+"""Spatial index of available seats for nearest-seat recommendations.
+
+Seat codes encode grid positions: the row letter(s) and the column number
+("A1" -> row 0, col 1; "AB3" -> row 27, col 3). Each room keeps, per seat type,
+a sorted list of non-empty rows and for every row a sorted list of available
+columns. A nearest query walks rows outward from the anchor and bisects into
+each row, stopping once the row gap alone exceeds the k-th best distance, so it
+only visits seats near the anchor instead of scanning the room.
+
+Indexes are built lazily from the DB, kept current incrementally by the
+reservation routes (mark_booked / mark_available) and rebuilt after
+SEATMAP_TTL_S to pick up writes made elsewhere. Only indexes built from the
+primary database are kept; one built from a replica serves that request only.
+"""
+from __future__ import annotations
+import bisect
+import heapq
+import math
+import os
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import reads_primary
+
+SEATMAP_TTL_S = float(os.getenv("SEATMAP_TTL_S", "60"))
+
+_CODE = re.compile(r"^([A-Za-z]+)(\d+)$")
+
+
+def parse_seat_code(code: str) -> Optional[tuple[int, int]]:
+    """'A1' -> (0, 1), 'B12' -> (1, 12), 'AA3' -> (26, 3); None if the code is not grid-shaped."""
+    m = _CODE.match(code.strip())
+    if not m:
+        return None
+    row = 0
+    for ch in m.group(1).upper():
+        row = row * 26 + (ord(ch) - ord("A") + 1)
+    return row - 1, int(m.group(2))
+
+
+@dataclass(frozen=True)
+class SeatPoint:
+    seat_id: int
+    seat_code: str
+    seat_type: str
+    row: int
+    col: int
+
+
+@dataclass(frozen=True)
+class Recommendation:
+    seat: SeatPoint
+    distance: float
+
+
+class _TypeGrid:
+    """Available seats of one type: sorted row keys -> sorted columns -> seat."""
+
+    def __init__(self):
+        self.rows: list[int] = []
+        self.cols: dict[int, list[int]] = {}
+        self.at: dict[tuple[int, int], SeatPoint] = {}
+
+    def add(self, p: SeatPoint) -> None:
+        if (p.row, p.col) in self.at:
+            return
+        self.at[(p.row, p.col)] = p
+        cols = self.cols.get(p.row)
+        if cols is None:
+            bisect.insort(self.rows, p.row)
+            cols = self.cols[p.row] = []
+        bisect.insort(cols, p.col)
+
+    def remove(self, p: SeatPoint) -> None:
+        if self.at.pop((p.row, p.col), None) is None:
+            return
+        cols = self.cols[p.row]
+        del cols[bisect.bisect_left(cols, p.col)]
+        if not cols:
+            del self.cols[p.row]
+            del self.rows[bisect.bisect_left(self.rows, p.row)]
+
+    def _rows_outward(self, row: int) -> Iterable[int]:
+        hi = bisect.bisect_left(self.rows, row)
+        lo = hi - 1
+        while lo >= 0 or hi < len(self.rows):
+            if hi < len(self.rows) and (lo < 0 or self.rows[hi] - row <= row - self.rows[lo]):
+                yield self.rows[hi]
+                hi += 1
+            else:
+                yield self.rows[lo]
+                lo -= 1
+
+    def nearest(self, row: int, col: int, k: int, best: list, exclude: set[int]) -> None:
+        """Push up to k nearest seats into `best` (a max-heap of (-distance, -seat_id, point))."""
+        for r in self._rows_outward(row):
+            dr = abs(r - row)
+            if len(best) >= k and dr > -best[0][0]:
+                break  # every remaining row is farther than the current k-th best
+            cols = self.cols[r]
+            hi = bisect.bisect_left(cols, col)
+            lo = hi - 1
+            while lo >= 0 or hi < len(cols):
+                if hi < len(cols) and (lo < 0 or cols[hi] - col <= col - cols[lo]):
+                    c = cols[hi]
+                    hi += 1
+                else:
+                    c = cols[lo]
+                    lo -= 1
+                d = math.hypot(dr, c - col)
+                if len(best) >= k and d > -best[0][0]:
+                    break  # columns only get farther from here on
+                p = self.at[(r, c)]
+                if p.seat_id in exclude:
+                    continue
+                item = (-d, -p.seat_id, p)
+                if len(best) < k:
+                    heapq.heappush(best, item)
+                elif item[:2] > best[0][:2]:  # closer, or equally close with a lower seat id
+                    heapq.heapreplace(best, item)
+
+
+class RoomSeatIndex:
+    def __init__(self, room_id: int, built_at: float):
+        self.room_id = room_id
+        self.built_at = built_at
+        self.by_type: dict[str, _TypeGrid] = {}
+        self.points: dict[int, SeatPoint] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, db: Session, room_id: int) -> "RoomSeatIndex":
+        idx = cls(room_id, time.monotonic())
+        rows = db.execute(
+            select(models.Seat.id, models.Seat.seat_code, models.Seat.seat_type, models.Seat.status)
+            .where(models.Seat.room_id == room_id)
+        ).all()
+        for seat_id, code, stype, status in rows:
+            pos = parse_seat_code(code)
+            if pos is None:
+                continue
+            p = SeatPoint(seat_id, code, models.SeatType(stype).value, pos[0], pos[1])
+            idx.points[seat_id] = p
+            if models.SeatStatus(status) == models.SeatStatus.available:
+                idx.by_type.setdefault(p.seat_type, _TypeGrid()).add(p)
+        return idx
+
+    def mark_booked(self, seat_id: int) -> None:
+        p = self.points.get(seat_id)
+        if p is not None:
+            with self._lock:
+                grid = self.by_type.get(p.seat_type)
+                if grid is not None:
+                    grid.remove(p)
+
+    def mark_available(self, seat_id: int) -> None:
+        p = self.points.get(seat_id)
+        if p is not None:
+            with self._lock:
+                self.by_type.setdefault(p.seat_type, _TypeGrid()).add(p)
+
+    def nearest(self, row: int, col: int, k: int = 5, seat_type: Optional[str] = None,
+                exclude: Iterable[int] = ()) -> list[Recommendation]:
+        best: list = []
+        exclude = set(exclude)
+        with self._lock:
+            grids = [self.by_type.get(seat_type)] if seat_type else list(self.by_type.values())
+            for grid in grids:
+                if grid is not None:
+                    grid.nearest(row, col, k, best, exclude)
+        ranked = sorted(best, key=lambda item: (-item[0], -item[1]))
+        return [Recommendation(p, round(-neg_d, 3)) for neg_d, _, p in ranked]
+
+
+_indexes: dict[int, RoomSeatIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def get_index(db: Session, room_id: int) -> RoomSeatIndex:
+    with _registry_lock:
+        idx = _indexes.get(room_id)
+    if idx is None or time.monotonic() - idx.built_at > SEATMAP_TTL_S:
+        idx = RoomSeatIndex.build(db, room_id)
+        if reads_primary(db):  # an index built from a lagging replica would keep recommending booked seats
+            with _registry_lock:
+                _indexes[room_id] = idx
+    return idx
+
+
+def mark_booked(room_id: Optional[int], seat_id: int) -> None:
+    idx = _indexes.get(room_id) if room_id is not None else None
+    if idx is not None:
+        idx.mark_booked(seat_id)
+
+
+def mark_available(room_id: Optional[int], seat_id: int) -> None:
+    idx = _indexes.get(room_id) if room_id is not None else None
+    if idx is not None:
+        idx.mark_available(seat_id)
+
+
+def invalidate(room_id: Optional[int] = None) -> None:
+    with _registry_lock:
+        if room_id is None:
+            _indexes.clear()
+        else:
+            _indexes.pop(room_id, None)
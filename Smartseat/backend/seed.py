@@ -1,6 +1,6 @@
 import json
 from sqlalchemy.orm import Session
-from .database import SessionLocal, engine, Base
+from .database import SessionLocal, sync_schema
 from . import models
 from pathlib import Path
 
@@ -30,15 +30,46 @@ def _coerce_seat_enums(db: Session):
         db.commit()
 
 
+# Campuses offered on B01_location.html; seat_seed.json seats live in DEFAULT_ROOM.
+CAMPUSES = [
+    {"code": "singapore", "name": "James Cook University, Singapore", "address": "149 Sims Drive, Singapore 387380"},
+    {"code": "townsville", "name": "James Cook University, Townsville", "address": "1 James Cook Drive, Douglas, QLD 4814, Australia"},
+    {"code": "cairns", "name": "James Cook University, Cairns", "address": "1 Trinity Beach Road, Trinity Park, QLD 4879, Australia"},
+]
+DEFAULT_ROOM = {"campus": "singapore", "block": "A", "floor": 1, "code": "A1-01"}
+
+
+def _seed_locations(db: Session) -> models.Room:
+    """Insert missing campuses and the default room; move room-less seats into it."""
+    campuses = {c.code: c for c in db.query(models.Campus).all()}
+    for meta in CAMPUSES:
+        if meta["code"] not in campuses:
+            campuses[meta["code"]] = models.Campus(**meta)
+            db.add(campuses[meta["code"]])
+    db.flush()
+    campus = campuses[DEFAULT_ROOM["campus"]]
+    room = db.query(models.Room).filter_by(campus_id=campus.id, code=DEFAULT_ROOM["code"]).first()
+    if room is None:
+        room = models.Room(campus_id=campus.id, block=DEFAULT_ROOM["block"], floor=DEFAULT_ROOM["floor"], code=DEFAULT_ROOM["code"])
+        db.add(room)
+        db.flush()
+    moved = db.query(models.Seat).filter(models.Seat.room_id.is_(None)).update({models.Seat.room_id: room.id}, synchronize_session=False)
+    db.commit()
+    if moved:
+        print(f"Assigned {moved} seats to room {room.code}")
+    return room
+
+
 def run():
-    Base.metadata.create_all(bind=engine)
+    sync_schema()
     db: Session = SessionLocal()
     try:
         _coerce_seat_enums(db)
+        room = _seed_locations(db)
         data = json.loads(Path(__file__).with_name("seat_seed.json").read_text(encoding="utf-8"))
         desired_by_code = {s["seat_code"]: s for s in data}
 
-        existing = {s.seat_code: s for s in db.query(models.Seat).all()}
+        existing = {s.seat_code: s for s in db.query(models.Seat).filter_by(room_id=room.id).all()}
         inserted = 0
         updated_type = 0
 
@@ -47,6 +78,7 @@ def run():
             for s in data:
                 seat = models.Seat(
                     seat_code=s["seat_code"],
+                    room_id=room.id,
                     seat_type=models.SeatType(s["seat_type"]),
                     status=models.SeatStatus(s["status"]),
                 )
@@ -59,6 +91,7 @@ def run():
                 if code not in existing:
                     seat = models.Seat(
                         seat_code=meta["seat_code"],
+                        room_id=room.id,
                         seat_type=models.SeatType(meta["seat_type"]),
                         status=models.SeatStatus(meta["status"]),
                     )
@@ -0,0 +1,234 @@
+"""Front-end build: content-hashed, precompressed copies of the pages and their assets.
+
+The pages (A01–C03 *.html), styles.css, auth.js and Images/ live at the repo
+root. build() turns them into a directory the API serves under /app
+(routers/frontend.py):
+
+  - styles.css, auth.js and every image get a content-hashed name under
+    assets/ (styles.3f9a1c02be41.css) and the pages' references are rewritten
+    to it, so browsers can cache them forever (Cache-Control: immutable);
+  - inline <script> blocks move into hashed assets/js/ files, so navigating
+    between pages stops re-downloading the same code;
+  - text files get .gz (and .br when the brotli package is installed)
+    variants, compressed once at maximum level instead of per request.
+
+Pages keep their names and are revalidated on every load (no-cache + a strong
+ETag -> 304 with an empty body).
+
+Each build goes to STATIC_BUILD_DIR/<source fingerprint>/, so an unchanged
+tree is reused as is and workers starting together cannot clobber each other.
+`python -m backend.static_assets` builds ahead of deploy; otherwise the app
+builds on first use.
+
+Environment:
+  SERVE_FRONTEND=1                   serve the pages under /app
+  FRONTEND_DIR=<repo root>           where the pages live
+  STATIC_BUILD_DIR=backend/static_build
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import pathlib
+import re
+import shutil
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+log = logging.getLogger(__name__)
+
+ENABLED = os.getenv("SERVE_FRONTEND", "1").strip().lower() not in ("0", "false", "no", "off")
+FRONTEND_DIR = pathlib.Path(os.getenv("FRONTEND_DIR") or pathlib.Path(__file__).resolve().parents[2])
+BUILD_DIR = pathlib.Path(os.getenv("STATIC_BUILD_DIR") or pathlib.Path(__file__).resolve().parent / "static_build")
+INDEX_PAGE = "A01_signin_credentials.html"
+
+HASH_LEN = 12
+COMPRESSIBLE = {".html", ".css", ".js", ".svg", ".json", ".txt"}
+MIN_COMPRESS_BYTES = 256
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))  # preference order
+MANIFEST = "manifest.json"
+
+_INLINE_SCRIPT = re.compile(r"<script(?P<attrs>[^>]*)>(?P<body>.*?)</script>", re.S | re.I)
+_SCRIPT_TYPE = re.compile(r"""\btype\s*=\s*["']?([^"'\s>]+)""", re.I)
+
+
+def source_files(root: pathlib.Path) -> list[str]:
+    """Relative paths of everything the front end is made of."""
+    files = [p for pattern in ("*.html", "*.css", "*.js") for p in root.glob(pattern)]
+    images = root / "Images"
+    if images.is_dir():
+        files += [p for p in images.rglob("*") if p.is_file()]
+    return sorted(p.relative_to(root).as_posix() for p in files)
+
+
+def fingerprint(root: pathlib.Path) -> str:
+    """Cheap change detector over names, sizes and mtimes (no file reads)."""
+    h = hashlib.sha256()
+    for rel in source_files(root):
+        st = (root / rel).stat()
+        h.update(f"{rel}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()[:HASH_LEN]
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LEN]
+
+
+def hashed_name(rel: str, digest: str) -> str:
+    p = pathlib.PurePosixPath(rel)
+    return str(p.with_name(f"{p.stem}.{digest}{p.suffix}"))
+
+
+def rewrite_refs(text: str, refs: dict[str, str]) -> str:
+    """Replace quoted/url() references to known assets (`"Images/a.png"`, `'auth.js'`) with their new paths."""
+    if not refs:
+        return text
+    names = "|".join(re.escape(n) for n in sorted(refs, key=len, reverse=True))
+    pattern = re.compile(r"""(?<=["'(])(?:\./)?(%s)(?=["')])""" % names)
+    return pattern.sub(lambda m: refs[m.group(1)], text)
+
+
+def extract_scripts(page: str, html: str, write) -> str:
+    """Move inline classic/module scripts into files; write(rel, data) stores one and returns its path."""
+    n = 0
+
+    def repl(m: re.Match) -> str:
+        nonlocal n
+        attrs, body = m.group("attrs"), m.group("body")
+        kind = _SCRIPT_TYPE.search(attrs)
+        if "src" in attrs.lower() or not body.strip() or (
+                kind and kind.group(1).lower() not in ("module", "text/javascript", "application/javascript")):
+            return m.group(0)
+        n += 1
+        data = body.strip("\n").encode() + b"\n"
+        path = write(hashed_name(f"js/{page}.{n}.js", content_hash(data)), data)
+        return f'<script{attrs} src="{path}"></script>'
+
+    return _INLINE_SCRIPT.sub(repl, html)
+
+
+def _compress(path: pathlib.Path, data: bytes) -> list[str]:
+    """Write the precompressed variants that are actually smaller; returns their encodings."""
+    if path.suffix not in COMPRESSIBLE or len(data) < MIN_COMPRESS_BYTES:
+        return []
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    kept = []
+    for encoding, suffix in ENCODINGS:
+        blob = variants.get(encoding)
+        if blob is not None and len(blob) < len(data):
+            path.with_name(path.name + suffix).write_bytes(blob)
+            kept.append(encoding)
+    return kept
+
+
+def build(root: pathlib.Path = FRONTEND_DIR, out: pathlib.Path = BUILD_DIR) -> pathlib.Path:
+    """Build the front end into out/<fingerprint>/ (reused if it already exists); returns that directory."""
+    root, out = pathlib.Path(root), pathlib.Path(out)
+    target = out / fingerprint(root)
+    if (target / MANIFEST).exists():
+        return target
+    out.mkdir(parents=True, exist_ok=True)
+    tmp = pathlib.Path(tempfile.mkdtemp(prefix=".build-", dir=out))
+    entries: dict[str, dict] = {}
+
+    def write(rel: str, data: bytes, immutable: bool = True) -> str:
+        url = rel if not immutable else f"assets/{rel}"
+        path = tmp / url
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        entries[url] = {
+            "etag": content_hash(data),
+            "type": mimetypes.guess_type(rel)[0] or "application/octet-stream",
+            "immutable": immutable,
+            "encodings": _compress(path, data),
+            "size": len(data),
+        }
+        return url
+
+    sources = source_files(root)
+    pages = [rel for rel in sources if rel.endswith(".html")]
+    # Images first: CSS/JS may reference them, and pages reference all three.
+    ordered = [rel for rel in sources if rel.startswith("Images/")] + \
+              [rel for rel in sources if rel not in pages and not rel.startswith("Images/")]
+    hashed: dict[str, str] = {}  # source path -> path under assets/
+    for rel in ordered:
+        data = (root / rel).read_bytes()
+        if pathlib.PurePosixPath(rel).suffix in (".css", ".js"):
+            data = rewrite_refs(data.decode(), hashed).encode()  # siblings under assets/
+        hashed[rel] = hashed_name(rel, content_hash(data))
+        write(hashed[rel], data)
+    page_refs = {rel: f"assets/{path}" for rel, path in hashed.items()}
+    for rel in pages:
+        html = rewrite_refs((root / rel).read_text(encoding="utf-8"), page_refs)
+        html = extract_scripts(pathlib.PurePosixPath(rel).stem, html, write)
+        write(rel, html.encode("utf-8"), immutable=False)
+
+    (tmp / MANIFEST).write_text(json.dumps({"index": INDEX_PAGE, "files": entries}, indent=1))
+    try:
+        tmp.rename(target)
+    except OSError:  # another worker finished the same build first
+        shutil.rmtree(tmp, ignore_errors=True)
+    for old in out.iterdir():
+        if old.is_dir() and old != target and not old.name.startswith("."):
+            shutil.rmtree(old, ignore_errors=True)
+    log.info("Front end built into %s (%d files)", target, len(entries))
+    return target
+
+
+@dataclass
+class Asset:
+    path: pathlib.Path
+    etag: str
+    type: str
+    immutable: bool
+    encodings: list
+
+
+class Build:
+    """A loaded build: URL path (relative to /app/) -> Asset."""
+
+    def __init__(self, directory: pathlib.Path):
+        manifest = json.loads((directory / MANIFEST).read_text())
+        self.directory = directory
+        self.index = manifest["index"]
+        self.files = {url: Asset(directory / url, e["etag"], e["type"], e["immutable"], e["encodings"])
+                      for url, e in manifest["files"].items()}
+
+    def get(self, url: str) -> Optional[Asset]:
+        return self.files.get(url or self.index)
+
+
+_current: Optional[Build] = None
+_lock = threading.Lock()
+
+
+def current() -> Build:
+    """The loaded build, building it on first use. Source changes are picked up on restart."""
+    global _current
+    if _current is None:
+        with _lock:
+            if _current is None:
+                _current = Build(build())
+    return _current
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the hashed, precompressed front end")
+    parser.add_argument("--src", default=str(FRONTEND_DIR))
+    parser.add_argument("--out", default=str(BUILD_DIR))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(build(pathlib.Path(args.src), pathlib.Path(args.out)))
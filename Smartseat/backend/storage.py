@@ -0,0 +1,101 @@
+"""Storage profiles: how database.py builds its engines.
+
+DB_PROFILE picks a named profile (default "auto": "sqlite" for a SQLite file,
+"postgres" for a postgresql URL, "plain" otherwise):
+
+  plain     SQLAlchemy/driver defaults (rollback journal on SQLite, 5+10 pool)
+  sqlite    pragmas on every new connection: journal_mode=WAL,
+            synchronous=SQLITE_SYNCHRONOUS (NORMAL), busy_timeout, mmap_size,
+            cache_size, temp_store=MEMORY; sized pool
+  postgres  sized pool with overflow, pre-ping and recycle
+
+WAL + synchronous=NORMAL is durable across application crashes; an OS crash
+or power loss can roll back the last transactions (never corrupts the file).
+Set SQLITE_SYNCHRONOUS=FULL to fsync every commit as well.
+
+Environment:
+  DB_PROFILE=auto                plain | sqlite | postgres | auto
+  SQLITE_SYNCHRONOUS=NORMAL      OFF | NORMAL | FULL
+  SQLITE_BUSY_TIMEOUT_MS=5000    wait this long for the write lock before "database is locked"
+  SQLITE_MMAP_MB=256             memory-mapped I/O size
+  SQLITE_CACHE_MB=64             page cache per connection
+  DB_POOL_SIZE=10  DB_MAX_OVERFLOW=20  DB_POOL_TIMEOUT_S=10  DB_POOL_RECYCLE_S=1800
+"""
+from __future__ import annotations
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+
+PROFILES = ("plain", "sqlite", "postgres")
+PROFILE = os.getenv("DB_PROFILE", "auto").strip().lower()
+
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").strip().upper()
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "256"))
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "64"))
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "10"))
+POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+
+
+def is_sqlite_file(url) -> bool:
+    url = make_url(url)
+    return url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def resolve_profile(url, profile: str | None = None) -> str:
+    profile = (profile or PROFILE).lower()
+    if profile == "auto":
+        backend = make_url(url).get_backend_name()
+        if backend == "sqlite":
+            return "sqlite" if is_sqlite_file(url) else "plain"
+        return "postgres" if backend == "postgresql" else "plain"
+    if profile not in PROFILES:
+        raise ValueError(f"DB_PROFILE must be one of {PROFILES + ('auto',)}, got {profile!r}")
+    return profile
+
+
+def sqlite_pragmas() -> list[str]:
+    return [
+        "PRAGMA journal_mode=WAL",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}",
+        f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}",  # negative = KiB
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def engine_options(url, profile: str) -> dict:
+    """create_engine kwargs for a resolved profile."""
+    is_sqlite = make_url(url).get_backend_name() == "sqlite"
+    connect_args = {"check_same_thread": False} if is_sqlite else {}
+    opts: dict = {"echo": False, "future": True, "connect_args": connect_args}
+    if profile == "sqlite":
+        connect_args["timeout"] = SQLITE_BUSY_TIMEOUT_MS / 1000.0
+        opts.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT_S)
+    elif profile == "postgres":
+        opts.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT_S,
+                    pool_pre_ping=True, pool_recycle=POOL_RECYCLE_S)
+    return opts
+
+
+def make_engine(url, profile: str | None = None, **overrides) -> Engine:
+    """Engine for `url` under a storage profile; keyword overrides win over the profile's options."""
+    profile = resolve_profile(url, profile)
+    opts = engine_options(url, profile)
+    opts.update(overrides)
+    engine = create_engine(url, **opts)
+    engine.storage_profile = profile  # for diagnostics / benchmarks
+    if profile == "sqlite" and is_sqlite_file(url):
+        pragmas = sqlite_pragmas()
+
+        @event.listens_for(engine, "connect")
+        def _apply_pragmas(dbapi_conn, _):
+            cur = dbapi_conn.cursor()
+            for stmt in pragmas:
+                cur.execute(stmt)
+            cur.close()
+    return engine
@@ -0,0 +1,180 @@
+# Reservation history test: cancels keep history, one active booking per seat, legacy schema migrates, archival moves old rows
+import os
+import sys
+import pathlib
+import tempfile
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+os.environ["RATE_LIMIT"] = "0"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from backend.main import app
+from backend.database import SessionLocal, sync_schema
+from backend import aggregator, archive, models
+from datetime import datetime, timedelta, timezone
+import uuid
+
+client = TestClient(app)
+
+LEGACY_RESERVATIONS = """
+CREATE TABLE reservations (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    seat_id INTEGER NOT NULL REFERENCES seats (id),
+    start_time DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+    end_time DATETIME,
+    status VARCHAR(9) NOT NULL,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL,
+    CONSTRAINT uq_seat_active_when_reserved UNIQUE (seat_id, status)
+)"""
+
+LEGACY_ARCHIVE = """
+CREATE TABLE reservations_archive (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    seat_id INTEGER NOT NULL,
+    start_time DATETIME NOT NULL,
+    end_time DATETIME,
+    status VARCHAR(9) NOT NULL,
+    created_at DATETIME NOT NULL
+)"""
+
+
+def fail(msg, code):
+    print("ARCHIVE TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def daily_value(db, series, day):
+    p = db.query(models.TimeSeriesPoint).filter_by(series_name=series, ts=day).first()
+    return p.value if p else None
+
+
+def run():
+    email = f"archive+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "Archive Tester", "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    room_id = client.get("/api/campuses/singapore/rooms").json()[0]["id"]
+    free = [s["seat_code"] for s in client.get(f"/api/rooms/{room_id}/seats", params={"status": "available"}).json()]
+    code = free[0]
+
+    # 1) Book and cancel the same seat twice: both cancelled rows are kept.
+    end = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+    ids = []
+    for _ in range(2):
+        r = client.post("/api/reservations", json={"seat_code": code, "room_id": room_id, "end_time": end}, headers=headers)
+        if r.status_code != 200:
+            fail(f"booking failed: {r.status_code} {r.text}", 2)
+        ids.append(r.json()["id"])
+        if client.delete(f"/api/reservations/{ids[-1]}", headers=headers).status_code != 200:
+            fail("cancel failed", 3)
+    db = SessionLocal()
+    try:
+        rows = db.query(models.Reservation).filter(models.Reservation.id.in_(ids)).all()
+        if len(rows) != 2 or any(r.status != models.ReservationStatus.cancelled for r in rows):
+            fail(f"cancel history lost: {[(r.id, r.status) for r in rows]}", 4)
+        user_id, seat_id = rows[0].user_id, rows[0].seat_id
+
+        # 2) The partial index still allows only one active reservation per seat.
+        db.add_all([models.Reservation(user_id=user_id, seat_id=seat_id) for _ in range(2)])
+        try:
+            db.commit()
+            fail("two active reservations on one seat were accepted", 5)
+        except IntegrityError:
+            db.rollback()
+    finally:
+        db.close()
+
+    # 3) A database with the old (seat_id, status) constraint is migrated without losing rows.
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = create_engine(f"sqlite:///{tmp}/legacy.db")
+        with legacy.begin() as conn:
+            conn.execute(text(LEGACY_RESERVATIONS))
+            conn.execute(text(LEGACY_ARCHIVE))
+            conn.execute(text("INSERT INTO reservations (id, user_id, seat_id, status) VALUES "
+                              "(1, 1, 1, 'cancelled'), (2, 1, 1, 'active'), (3, 1, 2, 'completed')"))
+            conn.execute(text("INSERT INTO reservations_archive VALUES (9, 1, 1, '2020-01-01', NULL, 'COMPLETED', '2020-01-01')"))
+        sync_schema(legacy)
+        insp = inspect(legacy)
+        if insp.get_unique_constraints("reservations"):
+            fail(f"old constraint survived: {insp.get_unique_constraints('reservations')}", 6)
+        if "uq_reservations_active_seat" not in {ix["name"] for ix in insp.get_indexes("reservations")}:
+            fail("partial index missing after migration", 7)
+        with legacy.begin() as conn:
+            if conn.execute(text("SELECT count(*) FROM reservations")).scalar() != 3:
+                fail("rows lost in migration", 8)
+            conn.execute(text("INSERT INTO reservations (user_id, seat_id, status) VALUES (1, 1, 'cancelled')"))
+            sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE name = 'reservations'")).scalar()
+            if "AUTOINCREMENT" not in sql.upper():
+                fail("reservations not rebuilt with AUTOINCREMENT", 13)
+            if conn.execute(text("SELECT archive_id, id FROM reservations_archive")).all() != [(1, 9)]:
+                fail("legacy archive not moved to a surrogate key", 14)
+        legacy.dispose()
+
+    # 4) Archival moves old finished rows in batches; active and recent ones stay.
+    now = datetime.now(timezone.utc)
+    old_day = datetime(now.year, now.month, now.day, 12, tzinfo=timezone.utc) - timedelta(days=45)
+    db = SessionLocal()
+    try:
+        taken = set(db.execute(select(models.Reservation.seat_id).where(
+            models.Reservation.status == models.ReservationStatus.active)).scalars())
+        spare = db.execute(select(models.Seat.id).where(models.Seat.id.not_in(taken)).limit(1)).scalar()
+
+        def add(status, start, seat=seat_id):
+            r = models.Reservation(user_id=user_id, seat_id=seat, status=status, start_time=start,
+                                   end_time=start + timedelta(hours=2), created_at=start)
+            db.add(r)
+            db.flush()
+            return r.id
+
+        done = models.ReservationStatus.completed
+        old = [add(done, old_day), add(done, old_day + timedelta(hours=1)),
+               add(models.ReservationStatus.cancelled, old_day + timedelta(hours=2))]
+        kept = [add(models.ReservationStatus.active, old_day, seat=spare), add(done, now - timedelta(days=1))]
+        db.commit()
+
+        series = f"archive_test_{uuid.uuid4().hex[:8]}"
+        aggregator.aggregate_daily(db, lookback_days=60, series_name=series + "_before")
+        moved = archive.archive_old(db, older_than=timedelta(days=30), batch_size=2)
+        if moved < len(old):
+            fail(f"only {moved} rows archived", 9)
+        hot = set(db.execute(select(models.Reservation.id).where(models.Reservation.id.in_(old + kept))).scalars())
+        cold = set(db.execute(select(models.ReservationArchive.id).where(models.ReservationArchive.id.in_(old + kept))).scalars())
+        if hot != set(kept) or cold != set(old):
+            fail(f"wrong rows moved: hot={sorted(hot)} archive={sorted(cold)}", 10)
+        if archive.archive_old(db, older_than=timedelta(days=30)) != 0:
+            fail("second archival pass moved rows again", 11)
+
+        # 5) Aggregation reads the archive too: the daily counts do not change.
+        aggregator.aggregate_daily(db, lookback_days=60, series_name=series + "_after")
+        day = aggregator._floor_to_day(old_day.replace(tzinfo=None))
+        before, after = daily_value(db, series + "_before", day), daily_value(db, series + "_after", day)
+        if not before or before < len(old) + 1 or before != after:
+            fail(f"daily count changed by archival: before={before} after={after}", 12)
+
+        # 6) Archived ids are never handed out again, and an id already in the archive
+        #    (reused by a database from before AUTOINCREMENT) does not block archival.
+        newest = add(done, old_day)
+        archive.archive_old(db, older_than=timedelta(days=30))
+        later = add(done, old_day)
+        if later <= newest:
+            fail(f"reservation id {later} reused after archival", 15)
+        db.execute(insert(models.ReservationArchive).values(id=later, user_id=user_id, seat_id=seat_id,
+                                                            start_time=old_day, status=done, created_at=old_day))
+        db.commit()
+        if archive.archive_old(db, older_than=timedelta(days=30)) != 1:
+            fail("archival stuck on an id already in the archive", 16)
+
+        db.query(models.Reservation).filter(models.Reservation.id.in_(kept)).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+    print("ARCHIVE TEST PASSED")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,89 @@
+# Backtest test: rolling-origin scores with filter reuse match a from-scratch filter, CLI/API report per horizon
+import os
+import sys
+import pathlib
+import tempfile
+import shutil
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import backtest
+from backend.train_dummy_sarimax import portable_model, portable_read
+import uuid
+
+client = TestClient(app)
+HERE = pathlib.Path(__file__).resolve().parent
+
+
+def fail(msg, code):
+    print("BACKTEST TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def run():
+    model_dir = tempfile.mkdtemp(prefix="bundles-")
+    for name in ("a", "b"):
+        for ext in (".portable.json", ".portable.npz"):
+            shutil.copy(HERE / f"sarimax_model{ext}", os.path.join(model_dir, f"{name}{ext}"))
+    path = os.path.join(model_dir, "a.portable.json")
+
+    rep = backtest.backtest_bundle(path, horizon=3, initial=100, step=2)
+    if rep.error:
+        fail(rep.error, 2)
+    if rep.origins != 10 or [s.n for s in rep.per_horizon] != [10, 10, 9]:
+        fail(f"origin/horizon counts wrong: {rep.origins} {[s.n for s in rep.per_horizon]}", 3)
+
+    # Extending the filtered state must give the same forecast as filtering the prefix from scratch.
+    series, meta = portable_read(path)
+    y = series.to_numpy()
+    t = 110
+    direct = portable_model(y[:t], meta).filter(np.asarray(meta["params"])).get_forecast(1).predicted_mean[0]
+    extended = portable_model(y[:100], meta).filter(np.asarray(meta["params"])).extend(y[100:t]).get_forecast(1).predicted_mean[0]
+    if abs(direct - extended) > 1e-8:
+        fail(f"extend drifted from a full filter: {direct} vs {extended}", 4)
+    h1 = rep.per_horizon[0]
+    if not (0 < h1.mae < 5 and 0 <= h1.coverage <= 1 and h1.mape is not None):
+        fail(f"implausible scores: {h1}", 5)
+    print(backtest.format_report(rep))
+
+    refit = backtest.backtest_bundle(path, horizon=2, initial=116, mode="refit")
+    if refit.error or refit.origins != 4:
+        fail(f"refit mode failed: {refit.error}", 6)
+    both = backtest.backtest_many([path, os.path.join(model_dir, "b.portable.json")], workers=2, horizon=3, initial=100, step=2)
+    if [r.per_horizon for r in both] != [rep.per_horizon, rep.per_horizon]:
+        fail("parallel run disagrees with serial", 7)
+    if not backtest.backtest_bundle(path, initial=500).error:
+        fail("initial past the series end accepted", 8)
+    print("Backtest harness OK")
+
+    backtest.MODEL_DIR = model_dir
+    email = f"bt+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "BT", "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    if client.post("/api/backtest", json={"models": ["a"]}).status_code != 401:
+        fail("backtest API is open without auth", 9)
+    if client.get("/api/backtest/models", headers=headers).json() != ["a", "b"]:
+        fail("model listing wrong", 10)
+    for bad in ("../sarimax_model", "missing"):
+        if client.post("/api/backtest", json={"models": [bad]}, headers=headers).status_code != 404:
+            fail(f"bad model name {bad!r} not rejected", 11)
+    r = client.post("/api/backtest", json={"models": ["a"], "horizon": 3, "initial": 100, "step": 2}, headers=headers)
+    if r.status_code != 200 or r.json()[0]["per_horizon"][0]["mae"] != h1.mae:
+        fail(f"API report wrong: {r.status_code} {r.text[:200]}", 12)
+    if client.post("/api/backtest", json={"models": ["a"] * 9}, headers=headers).status_code != 422:
+        fail("more than 8 models accepted", 13)
+    r = client.post("/api/backtest", json={"models": ["a", "b"], "mode": "refit", "initial": 100, "max_refit_origins": 5},
+                    headers=headers)
+    if r.status_code != 200 or not all("exceed the limit of 5" in (x["error"] or "") for x in r.json()):
+        fail(f"refit origin cap not applied: {r.status_code} {r.text[:200]}", 14)
+    if backtest.shared_pool() is not backtest.shared_pool() or backtest.shared_pool()._max_workers != backtest.WORKERS:
+        fail("API runs do not share one bounded pool", 15)
+    backtest.shutdown_pool()
+    print("BACKTEST TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,81 @@
+# Batch API test: same results as separate calls, one token lookup, per-sub-request status, writes then reads in order
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import uuid
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import statements
+from backend.routers import batch as batch_router
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("BATCH TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def login(tag: str) -> dict:
+    email = f"{tag}+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": tag, "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def run_batch(requests, headers=None):
+    r = client.post("/api/batch", json={"requests": requests}, headers=headers or {})
+    if r.status_code != 200:
+        fail(f"batch failed: {r.status_code} {r.text[:200]}", 2)
+    return {x["id"]: x for x in r.json()["responses"]}
+
+
+def run():
+    headers = login("batch")
+    dashboard = [{"id": "me", "path": "/api/auth/me"},
+                 {"id": "seats", "path": "/api/seats?status=available"},
+                 {"id": "mine", "path": "/api/reservations/mine"},
+                 {"id": "users_me", "path": "/api/users/me"}]
+    token_lookups = statements.REGISTRY["token_by_value"]
+    before = token_lookups.executions
+    got = run_batch(dashboard, headers)
+    if token_lookups.executions - before != 1:
+        fail(f"token resolved {token_lookups.executions - before} times for one batch", 3)
+    for sub in dashboard:
+        direct = client.get(sub["path"], headers=headers)
+        if got[sub["id"]]["status"] != direct.status_code or got[sub["id"]]["body"] != direct.json():
+            fail(f"{sub['path']} differs from a direct call", 4)
+    print("Dashboard batch matches direct calls, one token lookup OK")
+
+    seat = got["seats"]["body"][0]
+    got = run_batch([
+        {"id": "book", "method": "POST", "path": "/api/reservations", "body": {"seat_code": seat["seat_code"], "room_id": seat["room_id"]}},
+        {"id": "again", "method": "POST", "path": "/api/reservations", "body": {"seat_code": seat["seat_code"], "room_id": seat["room_id"]}},
+        {"id": "mine", "path": "/api/reservations/mine"},
+        {"id": "bad_body", "method": "POST", "path": "/api/reservations", "body": {"room_id": "x"}},
+        {"id": "missing", "path": "/api/no-such-route"},
+        {"id": "nested", "method": "POST", "path": "/api/batch", "body": {"requests": []}},
+    ], headers)
+    statuses = {k: v["status"] for k, v in got.items()}
+    if statuses != {"book": 200, "again": 409, "mine": 200, "bad_body": 422, "missing": 404, "nested": 400}:
+        fail(f"per-sub-request statuses wrong: {statuses}", 5)
+    if got["book"]["body"]["id"] not in [x["id"] for x in got["mine"]["body"]]:
+        fail("read after a write in the same batch missed the write", 6)
+    client.delete(f"/api/reservations/{got['book']['body']['id']}", headers=headers)
+    print("Writes in order, read-your-writes, per-sub-request status OK")
+
+    anon = run_batch([{"id": "seats", "path": "/api/seats"}, {"id": "me", "path": "/api/auth/me"}])
+    if anon["seats"]["status"] != 200 or anon["me"]["status"] != 401:
+        fail(f"anonymous batch statuses wrong: {anon}", 7)
+    if client.post("/api/batch", json={"requests": dashboard}, headers={"Authorization": "Bearer nope"}).status_code != 401:
+        fail("invalid token accepted", 8)
+    too_many = [{"path": "/api/seats"}] * (batch_router.BATCH_MAX + 1)
+    if client.post("/api/batch", json={"requests": too_many}).status_code != 400:
+        fail("oversized batch accepted", 9)
+    print("Auth + limits OK")
+    print("BATCH TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
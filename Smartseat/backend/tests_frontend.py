@@ -0,0 +1,81 @@
+# Front-end serving test: hashed + precompressed build, immutable assets, page revalidation (304), encodings
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import gzip
+import re
+import tempfile
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import static_assets
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("FRONTEND TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def run():
+    if not static_assets.ENABLED or not (static_assets.FRONTEND_DIR / static_assets.INDEX_PAGE).exists():
+        print("FRONTEND TEST SKIPPED (SERVE_FRONTEND off or pages not found)")
+        return
+
+    # Build into a scratch dir: hashed names, rewritten references, no inline scripts left.
+    out = pathlib.Path(tempfile.mkdtemp(prefix="ss-frontend-"))
+    built = static_assets.build(static_assets.FRONTEND_DIR, out)
+    if static_assets.build(static_assets.FRONTEND_DIR, out) != built or len([p for p in out.iterdir()]) != 1:
+        fail("unchanged sources were rebuilt", 2)
+    page = (built / static_assets.INDEX_PAGE).read_text()
+    css = re.search(r'href="(assets/styles\.[0-9a-f]{12}\.css)"', page)
+    if not css or not (built / css.group(1)).exists():
+        fail("styles.css reference not rewritten to a hashed asset", 3)
+    if re.search(r"<script(?![^>]*\bsrc=)[^>]*>\s*\S", page) or '"Images/' in page:
+        fail("inline script or unhashed image reference left in the page", 4)
+    js = re.search(r'src="(assets/js/[^"]+\.js)"', page).group(1)
+    if "/api/auth/login" not in (built / js).read_text():
+        fail("extracted page script lost its code", 5)
+    gz = built / (js + ".gz")
+    if not gz.exists() or gzip.decompress(gz.read_bytes()) != (built / js).read_bytes():
+        fail("precompressed variant missing or wrong", 6)
+    print("Hashed, precompressed build OK")
+
+    # Pages: strong ETag, revalidated, 304 on repeat load.
+    plain = client.get("/app/", headers={"Accept-Encoding": "identity"})
+    zipped = client.get("/app/", headers={"Accept-Encoding": "gzip, br;q=0"})
+    if plain.status_code != 200 or "text/html" not in plain.headers["content-type"]:
+        fail(f"index page not served: {plain.status_code}", 7)
+    if zipped.headers.get("content-encoding") != "gzip" or zipped.content != plain.content:
+        fail("gzip variant not negotiated or differs", 8)
+    for r in (plain, zipped):
+        if r.headers["cache-control"] != "no-cache" or r.headers["etag"].startswith("W/"):
+            fail(f"page caching headers wrong: {dict(r.headers)}", 9)
+    for enc, got in (("identity", plain), ("gzip", zipped)):
+        head = client.head("/app/", headers={"Accept-Encoding": enc})
+        if head.status_code != 200 or head.content or head.headers.get("content-length") != got.headers["content-length"]:
+            fail(f"HEAD ({enc}) length wrong: {head.headers.get('content-length')} vs {got.headers['content-length']}", 15)
+    if plain.headers["etag"] == zipped.headers["etag"]:
+        fail("identity and gzip bodies share an ETag", 10)
+    again = client.get("/app/", headers={"Accept-Encoding": "gzip", "If-None-Match": zipped.headers["etag"]})
+    if again.status_code != 304 or again.content:
+        fail(f"repeat page load not a bodiless 304: {again.status_code}", 11)
+    print("Page revalidation OK")
+
+    # Hashed assets: immutable, and the page's links resolve.
+    served = client.get("/app/")
+    for ref in re.findall(r'(?:href|src)="(assets/[^"]+)"', served.text):
+        r = client.get(f"/app/{ref}")
+        if r.status_code != 200 or "immutable" not in r.headers["cache-control"]:
+            fail(f"{ref}: {r.status_code} {r.headers.get('cache-control')}", 12)
+    if client.get("/app/assets/styles.css").status_code != 404 or client.get("/app/../main.py").status_code != 404:
+        fail("unknown paths must 404", 13)
+    if client.get("/app", follow_redirects=False).status_code != 308:
+        fail("/app does not redirect to /app/", 14)
+    print("Immutable assets OK")
+    print("FRONTEND TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
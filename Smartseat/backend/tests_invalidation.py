@@ -0,0 +1,164 @@
+# Cache bus test: a write made by another worker drops this worker's cached seat map (DB and Redis-protocol backends)
+import os
+import sys
+import time
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+os.environ["RATE_LIMIT"] = "0"
+
+from fastapi.testclient import TestClient
+import tempfile
+from sqlalchemy import create_engine, text, update
+from sqlalchemy.orm import sessionmaker
+from backend.main import app
+from backend.database import SessionLocal
+from backend import cache, invalidation, models
+from backend.resp_standin import RespStandIn
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("INVALIDATION TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def wait_for(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if cond():
+            return True
+        time.sleep(0.02)
+    return cond()
+
+
+def other_worker_books(seat_id, room_id, status):
+    """What another process does: commit the write, then publish on its own bus."""
+    db = SessionLocal()
+    try:
+        db.execute(update(models.Seat).where(models.Seat.id == seat_id).values(status=status))
+        db.commit()
+    finally:
+        db.close()
+    invalidation.DBBus(origin="other-worker").publish("room", room_id)
+
+
+def version_ids_never_reused():
+    """Legacy table (no AUTOINCREMENT), pruning on every poll, and an id that commits out of order."""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/bus.db")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE cache_versions (id INTEGER NOT NULL PRIMARY KEY, scope VARCHAR(32) NOT NULL, "
+                              "key VARCHAR(64) NOT NULL, origin VARCHAR(32) NOT NULL, created_at DATETIME DEFAULT (CURRENT_TIMESTAMP) NOT NULL)"))
+        factory = sessionmaker(bind=engine)
+        writer = invalidation.DBBus(factory, origin="writer")
+        reader = invalidation.DBBus(factory, origin="reader", retain_s=0)
+        got = []
+        reader.register("room", got.append)
+        writer.publish("room", 1)
+        reader.poll_once()  # pins last_id
+        writer.publish("room", 2)
+        with engine.begin() as conn:
+            conn.execute(text("UPDATE cache_versions SET created_at = '2000-01-01 00:00:00'"))
+        reader.poll_once()  # delivers 2, then prunes everything but the newest row
+        writer.publish("room", 3)
+        reader.poll_once()
+        if got != ["2", "3"]:
+            fail(f"invalidations lost after pruning (ids reused?): {got}", 9)
+        # Postgres can commit a smaller id after a larger one: the skipped id is re-checked.
+        with engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO cache_versions (id, scope, key, origin) VALUES ({reader.last_id + 2}, 'room', '5', 'w')"))
+        reader.poll_once()
+        with engine.begin() as conn:
+            conn.execute(text(f"INSERT INTO cache_versions (id, scope, key, origin) VALUES ({reader.last_id - 1}, 'room', '4', 'w')"))
+        reader.poll_once()
+        if got != ["2", "3", "5", "4"] or reader._gaps:
+            fail(f"late-committed version missed: {got} gaps={reader._gaps}", 10)
+        engine.dispose()
+    print("Version ids never reused, late commits delivered OK")
+
+
+def run():
+    if not isinstance(invalidation.bus, invalidation.DBBus):
+        fail(f"default bus should be the DB version table, got {type(invalidation.bus).__name__}", 2)
+    bus = invalidation.bus
+    bus.poll_once()  # pins last_id when the lifespan has not started the bus
+
+    room_id = client.get("/api/campuses/singapore/rooms").json()[0]["id"]
+    seat = client.get(f"/api/rooms/{room_id}/seats", params={"status": "available"}).json()[0]
+
+    # Prime this worker's cache, then let "another worker" book the seat behind its back.
+    client.get(f"/api/rooms/{room_id}/seats", params={"status": "available"})
+    other_worker_books(seat["id"], room_id, models.SeatStatus.booked)
+    stale = client.get(f"/api/rooms/{room_id}/seats", params={"status": "available"}).json()
+    if seat["id"] not in [s["id"] for s in stale]:
+        fail("cache was not primed; test would prove nothing", 3)
+    if bus.poll_once() < 1:
+        fail("DB bus did not see the other worker's version row", 4)
+    fresh = client.get(f"/api/rooms/{room_id}/seats", params={"status": "available"}).json()
+    if seat["id"] in [s["id"] for s in fresh]:
+        fail("cached seat map still stale after invalidation", 5)
+    other_worker_books(seat["id"], room_id, models.SeatStatus.available)
+    bus.poll_once()
+    print("DB bus invalidates across workers OK")
+
+    # An API booking publishes in its own transaction: another worker hears about it.
+    peer = invalidation.DBBus(origin="peer")
+    heard = []
+    peer.register("room", heard.append)
+    peer.poll_once()
+    email = f"bus+{time.time_ns()}@example.com"
+    client.post("/api/auth/signup", json={"name": "Bus Tester", "email": email, "password": "secret123"})
+    headers = {"Authorization": "Bearer " + client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]}
+    r = client.post("/api/reservations", json={"seat_code": seat["seat_code"], "room_id": room_id}, headers=headers)
+    if r.status_code != 200:
+        fail(f"booking failed: {r.status_code} {r.text}", 11)
+    client.delete(f"/api/reservations/{r.json()['id']}", headers=headers)
+    peer.poll_once()
+    if heard != [str(room_id), str(room_id)]:
+        fail(f"booking/cancel invalidations not published: {heard}", 12)
+    bus.poll_once()
+
+    version_ids_never_reused()
+
+    # Own messages are skipped: the writer has already updated its caches in place.
+    before = bus.received
+    bus.publish("room", room_id)
+    bus.poll_once()
+    if bus.received != before:
+        fail("bus delivered its own message back to itself", 6)
+
+    # Redis-protocol backend against the local stand-in.
+    server = RespStandIn().start()
+    a = invalidation.RedisBus(server.url, origin="a")
+    b = invalidation.RedisBus(server.url, origin="b")
+    got = []
+    b.register("room", got.append)
+    a.register("room", got.append)
+    a.start()
+    b.start()
+    try:
+        a.publish("room", 42)
+        if not wait_for(lambda: got == ["42"]):
+            fail(f"redis bus delivery wrong: {got}", 7)
+    finally:
+        a.stop()
+        b.stop()
+        server.shutdown()
+        server.server_close()
+    print("Redis-protocol bus OK")
+
+    # The registered handler drops exactly the published room.
+    cache.room_seats.set(1, None, b"x")
+    cache.room_seats.set(2, None, b"y")
+    local = invalidation.register_default_handlers(invalidation.LocalBus(origin="me"))
+    local.deliver("peer", "room", "1")
+    if cache.room_seats.get(1) is not None or cache.room_seats.get(2) != b"y":
+        fail("room handler dropped the wrong scope", 8)
+    cache.room_seats.clear()
+    print("INVALIDATION TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
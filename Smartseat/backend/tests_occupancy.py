@@ -0,0 +1,150 @@
+# Occupancy sweep test: vectorized sweep vs brute force, room occupancy + time-of-day endpoints, store mirror
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+import numpy as np
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal, sync_schema
+from backend import models, occupancy, tsstore
+import uuid
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("OCCUPANCY TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def check_sweep():
+    rng = np.random.default_rng(3)
+    n, t0, slot, n_slots = 2000, 1_000_000, 900, 40
+    starts = rng.integers(t0 - 3000, t0 + slot * n_slots + 3000, size=n)
+    ends = starts + rng.integers(1, 4 * slot, size=n)
+    groups = rng.integers(0, 3, size=n)
+    bounds = t0 + slot * np.arange(n_slots)
+
+    instant = occupancy.sweep_instant(starts, ends, t0, slot, n_slots, groups=groups, n_groups=3)
+    mean = occupancy.sweep_mean(starts, ends, t0, slot, n_slots, groups=groups, n_groups=3)
+    for g in range(3):
+        s, e = starts[groups == g], ends[groups == g]
+        want_instant = [int(np.sum((s <= b) & (b < e))) for b in bounds]
+        want_mean = [np.sum(np.clip(np.minimum(e, b + slot) - np.maximum(s, b), 0, None)) / slot for b in bounds]
+        if instant[g].tolist() != want_instant:
+            fail(f"instant sweep wrong for group {g}", 2)
+        if not np.allclose(mean[g], want_mean, atol=1e-9):
+            fail(f"mean sweep wrong for group {g}", 3)
+    if occupancy.sweep_mean([], [], t0, slot, 4).tolist() != [[0.0] * 4]:
+        fail("empty input not all zero", 4)
+    print("Sweep matches brute force OK")
+
+
+def run():
+    sync_schema()
+    check_sweep()
+
+    now = datetime.now(timezone.utc)
+    day = now.replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=1)  # yesterday 00:00 UTC
+    at = lambda h, m=0: day + timedelta(hours=h, minutes=m)
+
+    db = SessionLocal()
+    try:
+        campus = db.query(models.Campus).first()
+        room = models.Room(campus_id=campus.id, block="O", floor=1, code=f"O{uuid.uuid4().hex[:4]}")
+        db.add(room)
+        db.flush()
+        seats = [
+            models.Seat(seat_code=code, room_id=room.id, seat_type=stype, status=models.SeatStatus.available)
+            for code, stype in (("Y1", models.SeatType.standard), ("Y2", models.SeatType.standard), ("Y3", models.SeatType.quiet))
+        ]
+        user = models.User(name="Occupancy", email=f"occ+{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+        db.add_all(seats + [user])
+        db.flush()
+        done, cancelled = models.ReservationStatus.completed, models.ReservationStatus.cancelled
+        for seat, start, end, status in (
+            (seats[0], at(9), at(11), done),
+            (seats[1], at(9, 30), at(10), done),
+            (seats[2], at(10), at(10, 30), cancelled),  # never counted
+            (seats[2], at(14), at(15), done),
+        ):
+            db.add(models.Reservation(user_id=user.id, seat_id=seat.id, start_time=start, end_time=end, status=status))
+        db.commit()
+        room_id, user_id, seat_id = room.id, user.id, seats[0].id
+    finally:
+        db.close()
+
+    r = client.get(f"/api/rooms/{room_id}/occupancy/time-of-day", params={"days": 1})
+    if r.status_code != 200:
+        fail(f"time-of-day failed: {r.status_code} {r.text}", 5)
+    body = r.json()
+    if body["labels"] != ["8-9", "9-10", "10-11", "11-12", "12-13", "13-14", "14-15", "15-16", "16-17"]:
+        fail(f"labels wrong: {body['labels']}", 6)
+    if body["capacity"] != 3 or body["occupied"] != [0, 1.5, 1, 0, 0, 0, 1, 0, 0]:
+        fail(f"hourly occupancy wrong: {body}", 7)
+    if body["usage_pct"][1] != 50.0:
+        fail(f"usage % wrong: {body['usage_pct']}", 8)
+    if client.get(f"/api/rooms/{room_id}/occupancy/time-of-day", params={"tz": "Nope/Zone"}).status_code != 400:
+        fail("unknown tz did not 400", 15)
+
+    # Sydney leaves DST on 2026-04-05: a 10:00-12:00 local booking every day stays in the 10-12 slots.
+    sydney = ZoneInfo("Australia/Sydney")
+    dst_now = datetime(2026, 4, 20, tzinfo=timezone.utc)
+    db = SessionLocal()
+    try:
+        for d in range(1, 29):
+            day_local = datetime(2026, 4, 20, tzinfo=sydney) - timedelta(days=d)
+            db.add(models.Reservation(user_id=user_id, seat_id=seat_id, status=done,
+                                      start_time=day_local.replace(hour=10).astimezone(timezone.utc),
+                                      end_time=day_local.replace(hour=12).astimezone(timezone.utc)))
+        db.commit()
+        labels, occupied, _ = occupancy.time_of_day(db, room_id, 28, 60, 8, 17, "Australia/Sydney", now=dst_now)
+    finally:
+        db.close()
+    if len(labels) != 9 or not np.allclose(occupied, [0, 0, 1, 1, 0, 0, 0, 0, 0]):
+        fail(f"time-of-day shifted across DST: {np.round(occupied, 3).tolist()}", 16)
+    print("Time-of-day usage OK")
+
+    r = client.get(f"/api/rooms/{room_id}/occupancy", params={"days": 2, "slot_minutes": 15, "how": "instant"})
+    body = r.json()
+    slots = [datetime.fromisoformat(s.replace("Z", "+00:00")) for s in body["slots"]]
+    slots = [s if s.tzinfo else s.replace(tzinfo=timezone.utc) for s in slots]
+    std = dict(zip(slots, body["occupied"]["standard"]))
+    if (std.get(at(9, 30)), std.get(at(9, 45)), std.get(at(10)), std.get(at(11))) != (2, 2, 1, 0):
+        fail(f"15-minute instant occupancy wrong: {[(s.isoformat(), v) for s, v in std.items() if v]}", 9)
+    if body["capacity"] != {"standard": 2, "quiet": 1, "accessible": 0}:
+        fail(f"capacity wrong: {body['capacity']}", 10)
+    quiet = client.get(f"/api/rooms/{room_id}/occupancy", params={"days": 2, "seat_type": "quiet"}).json()
+    if list(quiet["occupied"]) != ["quiet"] or sum(quiet["occupied"]["quiet"]) != 1:
+        fail(f"seat_type filter wrong: {quiet}", 11)
+    for params, code in (({"slot_minutes": 7}, 400), ({"how": "max"}, 400), ({"seat_type": "sofa"}, 400)):
+        if client.get(f"/api/rooms/{room_id}/occupancy", params=params).status_code != code:
+            fail(f"bad params accepted: {params}", 12)
+    if client.get("/api/rooms/999999/occupancy").status_code != 404:
+        fail("unknown room did not 404", 13)
+    print("Room occupancy endpoint OK")
+
+    # The aggregator writes completed slots to the chunked store; a rerun adds nothing.
+    db = SessionLocal()
+    try:
+        first = occupancy.aggregate_occupancy(db, lookback_days=2, slot_minutes=60, now=now)
+        again = occupancy.aggregate_occupancy(db, lookback_days=2, slot_minutes=60, now=now)
+        name = occupancy.series_name(room_id, "standard", 60)
+        ts, vals = tsstore.read_range(db, name, start=at(9), end=at(11))
+        if first == 0 or again != 0 or vals.tolist() != [1.5, 1.0]:
+            fail(f"store mirror wrong: first={first} again={again} vals={vals.tolist()}", 14)
+        for rid in db.query(models.Room.id).all():
+            for stype in occupancy.SEAT_TYPES:
+                tsstore.drop(db, occupancy.series_name(rid[0], stype, 60))
+        db.commit()
+    finally:
+        db.close()
+    print("Occupancy store mirror OK")
+    print("OCCUPANCY TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
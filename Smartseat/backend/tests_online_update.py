@@ -0,0 +1,100 @@
+# Online update test: new observations go into NPZ deltas with fixed params, match a full filter, drift flags a refit
+import os
+import sys
+import pathlib
+import tempfile
+import zipfile
+import warnings
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from backend.database import SessionLocal, sync_schema
+from backend import online_update, tsstore
+from backend.train_dummy_sarimax import portable_load, portable_model, portable_read, portable_save
+import uuid
+
+HERE = pathlib.Path(__file__).resolve().parent
+
+
+def fail(msg, code):
+    print("ONLINE UPDATE TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def run():
+    warnings.simplefilter("ignore")
+    full, meta = portable_read(str(HERE / "sarimax_model.portable.json"))
+    params = np.asarray(meta["params"])
+    y = full.to_numpy()
+
+    # A bundle "trained" on the first 100 points, then fed the rest as it arrives.
+    path = os.path.join(tempfile.mkdtemp(prefix="online-"), "usage.portable.json")
+    portable_save(full[:100], portable_model(full[:100], meta).filter(params), path)
+    npz = path[:-5] + ".npz"
+    with zipfile.ZipFile(npz) as zf:
+        base_bytes = zf.read("y.npy")
+
+    r1 = online_update.update_bundle(path, y[100:105])
+    r2 = online_update.update_bundle(path, y[105:110])
+    if (r1.delta, r2.delta, r2.nobs) != (1, 2, 110):
+        fail(f"deltas wrong: {r1} {r2}", 2)
+    with zipfile.ZipFile(npz) as zf:
+        if zf.read("y.npy") != base_bytes or "y_delta_0002.npy" not in zf.namelist():
+            fail("NPZ was rewritten instead of appended to", 3)
+    if online_update.update_bundle(path, []).appended != 0:
+        fail("empty update wrote a delta", 4)
+
+    # Same state as filtering all 110 points from scratch.
+    ref = portable_model(y[:110], meta).filter(params)
+    loaded = portable_load(path)
+    if loaded.nobs != 110 or not np.allclose(loaded.get_forecast(3).predicted_mean, ref.get_forecast(3).predicted_mean):
+        fail("reloaded bundle does not match a full filter", 5)
+    z_ref = ref.forecasts_error[0][105:110] / np.sqrt(ref.forecasts_error_cov[0, 0][105:110])
+    if not np.allclose(r2.z, z_ref, atol=1e-3):
+        fail(f"one-step errors differ: {r2.z} vs {z_ref}", 6)
+    if r2.refit_due:
+        fail(f"in-sample data flagged as drift: {r2.reason}", 7)
+    print(f"Incremental update OK ({r2.seconds * 1000:.1f} ms for 5 points)")
+
+    # A level shift is drift: flag it, then refit folds the deltas back into y.
+    r3 = online_update.update_bundle(path, [y[110] + 25.0])
+    if not r3.refit_due or not r3.reason:
+        fail("level shift not flagged", 8)
+    if not online_update.refit_if_due(path) or online_update.refit_if_due(path):
+        fail("refit_if_due did not refit exactly once", 9)
+    series, meta2 = portable_read(path)
+    if len(series) != 111 or online_update.delta_members(npz) or "online" in meta2:
+        fail("refit did not consolidate the bundle", 10)
+    print("Drift -> refit OK")
+
+    # Deltas apply in update order, also once the 4-digit padding runs out (10000 after 9999).
+    order_path = os.path.join(tempfile.mkdtemp(prefix="online-order-"), "order.portable.json")
+    portable_save(full[:100], portable_model(full[:100], meta).filter(params), order_path)
+    with zipfile.ZipFile(order_path[:-5] + ".npz", "a") as zf:
+        for k, value in ((10000, 3.0), (2, 1.0), (9999, 2.0)):
+            zf.writestr(f"y_delta_{k:04d}.npy", online_update._array_bytes(np.array([value])))
+    ordered, _ = portable_read(order_path)
+    if list(ordered.to_numpy()[-3:]) != [1.0, 2.0, 3.0] or online_update.delta_members(order_path[:-5] + ".npz") != [2, 9999, 10000]:
+        fail(f"deltas applied out of order: {ordered.to_numpy()[-3:]}", 13)
+
+    # Points that the aggregator mirrored into the chunked store.
+    sync_schema()
+    name = f"online_{uuid.uuid4().hex[:8]}"
+    db = SessionLocal()
+    try:
+        tsstore.append(db, name, full.index[100:].values, y[100:])
+        db.commit()
+        r4 = online_update.update_from_store(db, path, name)
+        if r4.appended != 9 or r4.nobs != 120:
+            fail(f"update_from_store appended {r4.appended}, nobs={r4.nobs}", 11)
+        if online_update.update_from_store(db, path, name).appended != 0:
+            fail("second update_from_store appended again", 12)
+        tsstore.drop(db, name)
+        db.commit()
+    finally:
+        db.close()
+    print("ONLINE UPDATE TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,91 @@
+# Auto order selection test: parallel grid search ranks by AIC/BIC, prunes over-budget fits, caches per data version
+import os
+import sys
+import pathlib
+import tempfile
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+from backend import order_search
+from backend.train_dummy_sarimax import portable_load, portable_save
+
+
+def fail(msg, code):
+    print("ORDER SEARCH TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def make_series(n=96, seed=3):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    y = 10 + 0.05 * t + 2.0 * np.sin(2 * np.pi * t / 12) + 0.5 * rng.standard_normal(n)
+    return pd.Series(y, index=pd.date_range("2015-01-01", periods=n, freq="MS"))
+
+
+def run():
+    series = make_series()
+    grid = order_search.parse_grid("p=0-1,d=1,q=0-1,P=0-1,Q=0-1", m=12)
+    if len(grid) != 16 or grid[0].key != "0,1,0|0,0,0,0":
+        fail(f"grid parse wrong: {len(grid)} {grid[0].key}", 2)
+    try:
+        order_search.parse_grid("p=0-2,x=1")
+        fail("bad grid term accepted", 3)
+    except ValueError:
+        pass
+
+    cache_dir = tempfile.mkdtemp(prefix="order-cache-")
+    res = order_search.search(series, grid, series_name="test", criterion="bic", workers=2, cache_dir=cache_dir)
+    if res.best is None or res.fitted != 16 or res.cached != 0:
+        fail(f"first search: best={res.best} fitted={res.fitted} cached={res.cached}", 4)
+    if res.best.bic != min(c.bic for c in res.ranked):
+        fail("winner is not the lowest BIC", 5)
+    single = order_search.fit_candidate(series, order_search.Candidate(res.best.order, res.best.seasonal_order))
+    if abs(single.bic - res.best.bic) > 1e-6:
+        fail(f"pool fit differs from in-process fit: {single.bic} vs {res.best.bic}", 6)
+    print(order_search.summary(res, top=3))
+
+    # Same data: everything comes from the cache. New data: a new version, fitted again.
+    again = order_search.search(series, grid, series_name="test", criterion="bic", workers=2, cache_dir=cache_dir)
+    if again.fitted != 0 or again.cached != 16 or again.best.key != res.best.key:
+        fail(f"cache not reused: fitted={again.fitted} cached={again.cached}", 7)
+    changed = series.copy()
+    changed.iloc[-1] += 1.0
+    if order_search.data_version(changed) == res.data_version:
+        fail("data version ignores values", 8)
+    # Exog is part of the version: a winner fitted without it is never reused with it (or with other exog).
+    exog = pd.DataFrame({"promo": np.arange(len(series)) % 2}, index=series.index)
+    versions = {order_search.data_version(series), order_search.data_version(series, exog),
+                order_search.data_version(series, exog.rename(columns={"promo": "holiday"})),
+                order_search.data_version(series, exog * 2)}
+    if len(versions) != 4:
+        fail("data version ignores exog", 13)
+    with_exog = order_search.search(series, grid[:2], series_name="test", workers=1, exog=exog, cache_dir=cache_dir)
+    if with_exog.cached != 0 or with_exog.best is None or len(with_exog.best.params) != len({c.key: c for c in again.ranked}[with_exog.best.key].params) + 1:
+        fail(f"cached fits without exog reused for exog: cached={with_exog.cached}", 14)
+    order_search.winner_results(series, with_exog.best, exog)
+
+    # Early stopping: per-candidate budget and total budget.
+    tiny = order_search.search(series, grid[-4:], series_name="test", workers=2, candidate_budget_s=1e-6, cache_dir=None)
+    if tiny.ranked or any(c.status != "timeout" for c in tiny.pruned):
+        fail(f"over-budget fits not pruned: {[c.status for c in tiny.pruned]}", 9)
+    none = order_search.search(series, grid, series_name="test", workers=1, total_budget_s=0, cache_dir=None)
+    if none.best is not None or len(none.pruned) != 16 or none.pruned[0].status != "skipped":
+        fail("total budget not enforced", 10)
+    short = order_search.search(series[:20], grid[-2:], workers=1, cache_dir=None)
+    if any(c.status != "error" for c in short.pruned) or short.ranked:
+        fail("seasonal candidates on a too-short series not pruned", 11)
+    print("Pruning + cache OK")
+
+    # Winner is rebuilt from its params and round-trips through the portable bundle.
+    results = order_search.winner_results(series, res.best)
+    path = os.path.join(cache_dir, "winner.portable.json")
+    portable_save(series, results, path, extra={"selection": {"criterion": "bic"}})
+    loaded = portable_load(path)
+    if not np.allclose(loaded.params, res.best.params) or tuple(loaded.model.order) != res.best.order:
+        fail("portable bundle of the winner does not round-trip", 12)
+    print("ORDER SEARCH TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,99 @@
+# Profiling test: capture only when authorized or sampled, cProfile + SQL timeline saved, rotation, diag endpoints, off = no hooks
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+import pstats
+import subprocess
+import tempfile
+
+PROFILE_DIR = pathlib.Path(tempfile.mkdtemp(prefix="ss-profiles-"))
+os.environ.update(PROFILING="1", PROFILE_DIR=str(PROFILE_DIR), PROFILE_KEEP="3", DIAG_TOKEN="prof-secret",
+                  PROFILE_SAMPLE="/api/rooms/{room_id}/seats=100")
+
+from fastapi.testclient import TestClient
+from backend.main import app
+
+client = TestClient(app)
+DIAG = {"X-Diag-Token": "prof-secret"}
+
+
+def fail(msg, code):
+    print("PROFILING TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def saved() -> list[str]:
+    return sorted(p.stem for p in PROFILE_DIR.glob("*.json"))
+
+
+def run():
+    client.get("/api/seats")
+    client.get("/api/seats", headers={"X-Profile": "wrong"})
+    client.get("/api/seats", params={"_profile": "wrong"})
+    if saved():
+        fail(f"unselected requests were profiled: {saved()}", 2)
+
+    r = client.get("/api/seats", params={"status": "available"}, headers={"X-Profile": "prof-secret"})
+    if r.status_code != 200 or len(saved()) != 1:
+        fail(f"header-flagged request not profiled: {r.status_code} {saved()}", 3)
+    pid = saved()[0]
+    body = client.get(f"/api/diag/profiles/{pid}", headers=DIAG).json()
+    if body["route"] != "/api/seats" or body["status"] != 200 or body["trigger"] != "header":
+        fail(f"capture metadata wrong: {body}", 4)
+    if not body["sql"] or not any("FROM seats" in e["statement"] for e in body["sql"]):
+        fail(f"SQL timeline missing the seat query: {body['sql']}", 5)
+    if not any("list_seats" in f["function"] for f in body["top"]):
+        fail("endpoint function missing from the cProfile summary (profiled the wrong thread?)", 6)
+    dump = client.get(f"/api/diag/profiles/{pid}/pstats", headers=DIAG)
+    path = PROFILE_DIR / "download.prof"
+    path.write_bytes(dump.content)
+    if dump.status_code != 200 or not pstats.Stats(str(path)).total_calls:
+        fail("pstats download unreadable", 7)
+    path.unlink()
+    print("Header-flagged capture: cProfile + SQL timeline OK")
+
+    client.get("/api/seats", params={"_profile": "prof-secret"})
+    room_id = client.get("/api/seats").json()[0]["room_id"]
+    client.get(f"/api/rooms/{room_id}/seats")
+    triggers = sorted(p["trigger"] for p in client.get("/api/diag/profiles", headers=DIAG).json())
+    if triggers != ["header", "query", "sample"]:
+        fail(f"query flag / sampling not captured: {triggers}", 8)
+    client.get(f"/api/rooms/{room_id}/seats")
+    if len(saved()) != 3 or pid in saved():
+        fail(f"rotation did not keep the newest 3: {saved()}", 9)
+    print("Query flag, sampling, rotation OK")
+
+    # A flagged request rejected before its endpoint runs still leaves a capture with its SQL.
+    r = client.get("/api/reservations/mine", headers={"X-Profile": "prof-secret", "Authorization": "Bearer bogus"})
+    latest = client.get(f"/api/diag/profiles/{saved()[-1]}", headers=DIAG).json()
+    if r.status_code != 401 or latest["status"] != 401 or latest["top"] != []:
+        fail(f"rejected request not captured: {r.status_code} {latest}", 12)
+    if not any("FROM tokens" in e["statement"] for e in latest["sql"]):
+        fail(f"SQL timeline of the rejected request lost: {latest['sql']}", 13)
+    if client.get(f"/api/diag/profiles/{latest['id']}/pstats", headers=DIAG).status_code != 404:
+        fail("empty pstats dump offered for download", 14)
+    print("Capture of a rejected (401) request OK")
+
+    if client.get("/api/diag/profiles").status_code != 403 or client.get("/api/diag/profiles/../../x", headers=DIAG).status_code != 404:
+        fail("profile endpoints not gated / path not validated", 10)
+    print("Profile endpoints OK")
+
+    probe = ("from backend.main import app; from backend import profiling, database; "
+             "from sqlalchemy import event; "
+             "assert not any(m.cls is profiling.ProfilingMiddleware for m in app.user_middleware); "
+             "from backend.main import routers; "
+             "assert not any(getattr(r.endpoint, '_profiled', False) for rt in routers for r in rt.routes); "
+             "assert not event.contains(database.engine, 'before_cursor_execute', profiling._before_cursor_execute)")
+    env = {k: v for k, v in os.environ.items() if k != "PROFILING"}
+    out = subprocess.run([sys.executable, "-c", probe], cwd=str(pathlib.Path(__file__).resolve().parents[1]),
+                         env=env, capture_output=True, text=True)
+    if out.returncode != 0:
+        fail(f"hooks installed with PROFILING off: {out.stderr[-300:]}", 11)
+    print("Disabled = nothing installed OK")
+    print("PROFILING TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
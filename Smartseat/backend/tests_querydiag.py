@@ -0,0 +1,98 @@
+# Query diagnostics test: N+1 detection, /mine query shape, and strict per-route query budgets
+import os
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# Must be set before backend.main is imported: the middleware is only installed when enabled.
+os.environ["QUERY_DIAG"] = "1"
+os.environ["QUERY_DIAG_REPEAT"] = "3"
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from sqlalchemy import event
+from backend import database, models, querydiag
+from backend.database import SessionLocal
+import uuid
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("QUERYDIAG TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def run():
+    email = f"querydiag+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "Diag Tester", "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Book three free seats.
+    db = SessionLocal()
+    try:
+        free = [(s.seat_code, s.room_id) for s in db.query(models.Seat).filter_by(status=models.SeatStatus.available).limit(3)]
+    finally:
+        db.close()
+    booked = []
+    for code, room_id in free:
+        r = client.post("/api/reservations", json={"seat_code": code, "room_id": room_id}, headers=headers)
+        if r.status_code == 200:
+            booked.append(r.json()["id"])
+    if len(booked) < 3:
+        fail(f"could not book 3 seats ({booked})", 2)
+
+    # Per-row lookups inside one request scope are flagged as a repeated shape (N+1).
+    rq = querydiag.RequestQueries(route="GET /n-plus-one")
+    token_ctx = querydiag._current.set(rq)
+    db = SessionLocal()
+    try:
+        for code, room_id in free:
+            db.query(models.Seat).filter_by(seat_code=code, room_id=room_id).first()
+    finally:
+        db.close()
+        querydiag._current.reset(token_ctx)
+    if not rq.repeated(3):
+        fail(f"per-row lookups were not flagged, got {dict(rq.shapes)}", 3)
+    print("N+1 flagged ->", rq.repeated(3))
+
+    # /mine loads reservation + seat columns in one joined select: no repeated shapes.
+    # Drop the pin the bookings left so /mine runs on the read pool, as other callers' reads do.
+    database._pins.clear()
+    read_checkouts = []
+    event.listen(database.read_engine, "checkout", lambda *a: read_checkouts.append(1))
+    r = client.get("/api/reservations/mine", headers=headers)
+    if r.status_code != 200 or len(r.json()) != 3:
+        fail(f"/mine returned {r.status_code}: {r.text}", 4)
+    rq = querydiag.recent[-1]
+    if rq.route != "GET /api/reservations/mine":
+        fail(f"unexpected route key {rq.route}", 5)
+    if rq.repeated(3):
+        fail(f"/mine still has repeated statement shapes: {rq.repeated(3)}", 6)
+    if database.read_engine is not database.engine and not read_checkouts:
+        fail("/mine did not run on the read pool", 8)
+    if not any("FROM reservations" in st.statement for st in rq.statements):
+        fail(f"/mine reservation select not counted: {[st.shape for st in rq.statements]}", 9)
+    print(f"/mine issued {rq.count} statements")
+
+    # Strict mode turns a blown budget into a test failure.
+    querydiag.STRICT = True
+    querydiag.ROUTE_BUDGETS["GET /api/reservations/mine"] = 2
+    try:
+        client.get("/api/reservations/mine", headers=headers)
+    except querydiag.QueryBudgetExceeded as e:
+        print("Budget enforced ->", e)
+    else:
+        fail("budget of 2 statements was not enforced", 7)
+    finally:
+        querydiag.STRICT = False
+        querydiag.ROUTE_BUDGETS.clear()
+
+    for rid in booked:
+        client.delete(f"/api/reservations/{rid}", headers=headers)
+    print("QUERYDIAG TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
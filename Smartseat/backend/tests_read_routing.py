@@ -0,0 +1,111 @@
+# Read/write routing test: GET routes on the read-only pool, writes on the primary, read-your-writes pinning
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import sqlite3
+import tempfile
+import time
+import os
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import OperationalError
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend import cache, database, seatmap
+import uuid
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("READ ROUTING TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def login(tag: str) -> dict:
+    email = f"{tag}+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": tag, "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def run():
+    if not database.DB_URL.startswith("sqlite") or database.read_engine is database.engine:
+        print("READ ROUTING TEST SKIPPED (needs a SQLite file database with READ_ROUTING on)")
+        return
+
+    # The primary runs in WAL mode (sqlite profile; plain leaves it alone) and the read pool refuses writes.
+    with database.engine.connect() as conn:
+        mode = conn.execute(text("PRAGMA journal_mode")).scalar().lower()
+        if (mode == "wal") != (database.engine.storage_profile == "sqlite"):
+            fail(f"primary journal mode {mode} under profile {database.engine.storage_profile}", 2)
+    with database.read_engine.connect() as conn:
+        try:
+            conn.execute(text("CREATE TABLE read_routing_probe (x INTEGER)"))
+            fail("read pool accepted a write", 3)
+        except OperationalError:
+            pass
+    print("WAL primary + read-only pool OK")
+
+    # GETs check out read-pool connections; writes do not.
+    checkouts = {"read": 0}
+    event.listen(database.read_engine, "checkout", lambda *a: checkouts.__setitem__("read", checkouts["read"] + 1))
+    client.get("/api/seats")
+    if checkouts["read"] != 1:
+        fail(f"GET /api/seats did not use the read pool ({checkouts})", 4)
+    alice, bob = login("alice"), login("bob")
+    before = checkouts["read"]
+    seat = next(s for s in client.get("/api/seats", params={"status": "available"}).json())
+    checkouts["read"] = before
+    r = client.post("/api/reservations", json={"seat_code": seat["seat_code"], "room_id": seat["room_id"]}, headers=alice)
+    if r.status_code != 200 or checkouts["read"] != before:
+        fail(f"booking touched the read pool or failed: {r.status_code} {checkouts}", 5)
+    print("GET -> read pool, POST -> primary OK")
+
+    # Stand in a replica that lags: a snapshot taken before the booking.
+    res_id = r.json()["id"]
+    client.delete(f"/api/reservations/{res_id}", headers=alice)
+    snap = os.path.join(tempfile.mkdtemp(prefix="ss-replica-"), "replica.db")
+    src = sqlite3.connect(database.DB_URL.replace("sqlite:///", ""))
+    dst = sqlite3.connect(snap)
+    src.backup(dst)
+    src.close()
+    dst.close()
+    replica = create_engine(f"sqlite:///{snap}", connect_args={"check_same_thread": False})
+    database.ReadSessionLocal.configure(bind=replica)
+    old_pin = database.READ_PIN_S
+    database.READ_PIN_S = 0.5
+    try:
+        r = client.post("/api/reservations", json={"seat_code": seat["seat_code"], "room_id": seat["room_id"]}, headers=alice)
+        new_id = r.json()["id"]
+        mine = [x["id"] for x in client.get("/api/reservations/mine", headers=alice).json()]
+        if new_id not in mine:
+            fail("writer did not read its own booking (not pinned to primary)", 6)
+        seats_for_bob = {s["id"]: s["status"] for s in client.get("/api/seats", headers=bob).json()}
+        if seats_for_bob.get(seat["id"]) != "available":
+            fail("other users' reads did not go to the replica", 7)
+        cache.room_seats.clear()
+        stale = {s["id"]: s["status"] for s in client.get(f"/api/rooms/{seat['room_id']}/seats", headers=bob).json()}
+        if stale.get(seat["id"]) != "available" or cache.room_seats.get(seat["room_id"], ("", "")) is not None:
+            fail("seat map read from the replica was cached", 9)
+        seatmap.invalidate()
+        if client.get(f"/api/rooms/{seat['room_id']}/recommendations", headers=bob).status_code != 200 or seatmap._indexes:
+            fail("seat recommendation index built from the replica was cached", 11)
+        time.sleep(0.6)
+        mine = [x["id"] for x in client.get("/api/reservations/mine", headers=alice).json()]
+        if new_id in mine:
+            fail("pin did not expire", 8)
+        client.delete(f"/api/reservations/{new_id}", headers=alice)
+    finally:
+        database.READ_PIN_S = old_pin
+        database.ReadSessionLocal.configure(bind=database.read_engine)
+        replica.dispose()
+    client.get(f"/api/rooms/{seat['room_id']}/seats")
+    if cache.room_seats.get(seat["room_id"], ("", "")) is None:
+        fail("seat map read from the primary database was not cached", 10)
+    print("Read-your-writes pinning OK")
+    print("READ ROUTING TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,98 @@
+# Seat recommendation test: spatial index vs brute force, incremental updates, and the room endpoint
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend import models, seatmap
+import math
+import random
+import uuid
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("RECOMMEND TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def brute_force(points, row, col, k):
+    ranked = sorted(points, key=lambda p: (math.hypot(p.row - row, p.col - col), p.seat_id))
+    return [p.seat_id for p in ranked[:k]]
+
+
+def run():
+    if seatmap.parse_seat_code("A1") != (0, 1) or seatmap.parse_seat_code("AA3") != (26, 3) or seatmap.parse_seat_code("X-1"):
+        fail("seat code parsing", 2)
+
+    # Random 300-seat hall, mostly booked: index answers must match a full scan.
+    rnd = random.Random(7)
+    idx = seatmap.RoomSeatIndex(room_id=0, built_at=0)
+    free = []
+    seat_id = 0
+    for r in range(15):
+        for c in range(1, 21):
+            seat_id += 1
+            p = seatmap.SeatPoint(seat_id, f"{chr(65 + r)}{c}", "standard", r, c)
+            idx.points[seat_id] = p
+            if rnd.random() < 0.15:
+                idx.mark_available(seat_id)
+                free.append(p)
+    for _ in range(200):
+        row, col, k = rnd.randrange(15), rnd.randrange(1, 21), rnd.randrange(1, 6)
+        got = [rec.seat.seat_id for rec in idx.nearest(row, col, k=k)]
+        if got != brute_force(free, row, col, k):
+            fail(f"nearest({row},{col},{k}) = {got}, expected {brute_force(free, row, col, k)}", 3)
+    # Incremental: booking the best pick removes it from the next answer.
+    top = idx.nearest(7, 10, k=1)[0].seat
+    idx.mark_booked(top.seat_id)
+    if idx.nearest(7, 10, k=1)[0].seat.seat_id == top.seat_id:
+        fail("booked seat still recommended", 4)
+    print("Spatial index matches brute force OK")
+
+    # Endpoint: seats near a friend's booking in the default room.
+    room_id = client.get("/api/campuses/singapore/rooms").json()[0]["id"]
+    headers = {}
+    emails = []
+    for name in ("Rec Tester", "Rec Friend"):
+        email = f"recommend+{uuid.uuid4().hex[:8]}@example.com"
+        client.post("/api/auth/signup", json={"name": name, "email": email, "password": "secret123"})
+        emails.append(email)
+        headers[name] = {"Authorization": "Bearer " + client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]}
+
+    recs = client.get(f"/api/rooms/{room_id}/recommendations", params={"near": "E6", "limit": 3}, headers=headers["Rec Tester"]).json()
+    if len(recs) != 3 or any(r["room_id"] != room_id for r in recs):
+        fail(f"unexpected recommendations {recs}", 5)
+    friend_seat = recs[0]["seat_code"]
+    r = client.post("/api/reservations", json={"seat_code": friend_seat, "room_id": room_id}, headers=headers["Rec Friend"])
+    if r.status_code != 200:
+        fail(f"friend booking failed: {r.text}", 6)
+    # Without the friend's consent their seat stays private.
+    r_denied = client.get(f"/api/rooms/{room_id}/recommendations", params={"friend_email": emails[1]}, headers=headers["Rec Tester"])
+    if r_denied.status_code != 404:
+        fail(f"friend's seat revealed without a share: {r_denied.status_code} {r_denied.text}", 10)
+    share = client.put(f"/api/users/me/seat-shares/{emails[0]}", headers=headers["Rec Friend"])
+    if share.status_code != 200 or client.get("/api/users/me/seat-shares", headers=headers["Rec Friend"]).json() != [emails[0]]:
+        fail(f"seat share not recorded: {share.status_code} {share.text}", 11)
+    recs = client.get(f"/api/rooms/{room_id}/recommendations", params={"friend_email": emails[1]}, headers=headers["Rec Tester"]).json()
+    if not recs or friend_seat in [x["seat_code"] for x in recs]:
+        fail(f"friend's booked seat recommended: {recs}", 7)
+    fr, fc = seatmap.parse_seat_code(friend_seat)
+    if recs[0]["distance"] != round(math.hypot(*(a - b for a, b in zip(seatmap.parse_seat_code(recs[0]["seat_code"]), (fr, fc)))), 3):
+        fail("distance not measured from the friend's seat", 8)
+    # Sharing can be withdrawn.
+    client.delete(f"/api/users/me/seat-shares/{emails[0]}", headers=headers["Rec Friend"])
+    if client.get(f"/api/rooms/{room_id}/recommendations", params={"friend_email": emails[1]}, headers=headers["Rec Tester"]).status_code != 404:
+        fail("friend's seat still visible after the share was removed", 12)
+    quiet = client.get(f"/api/rooms/{room_id}/recommendations", params={"seat_type": "quiet"}, headers=headers["Rec Tester"]).json()
+    if any(x["seat_type"] != "quiet" for x in quiet):
+        fail("seat_type filter ignored", 9)
+    client.delete(f"/api/reservations/{r.json()['id']}", headers=headers["Rec Friend"])
+    print("RECOMMEND TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,100 @@
+# Release scheduler test: ended reservations free their seats in batches, exactly once across workers
+import os
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+# This test books more seats per second than the booking rate limit allows.
+os.environ["RATE_LIMIT"] = "0"
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend import models, release_scheduler
+from datetime import datetime, timedelta, timezone
+import threading
+import uuid
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("RELEASE TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def book(headers, room_id, codes, end):
+    ids = []
+    for code in codes:
+        r = client.post("/api/reservations", json={"seat_code": code, "room_id": room_id, "end_time": end.isoformat()}, headers=headers)
+        if r.status_code != 200:
+            fail(f"booking {code} failed: {r.status_code} {r.text}", 2)
+        ids.append(r.json()["id"])
+    return ids
+
+
+def statuses(ids):
+    db = SessionLocal()
+    try:
+        rows = db.query(models.Reservation).filter(models.Reservation.id.in_(ids)).all()
+        return {r.id: (r.status, r.seat.status) for r in rows}
+    finally:
+        db.close()
+
+
+def run():
+    email = f"release+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "Release Tester", "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    room_id = client.get("/api/campuses/singapore/rooms").json()[0]["id"]
+    free = [s["seat_code"] for s in client.get(f"/api/rooms/{room_id}/seats", params={"status": "available"}).json()][:6]
+
+    # Three already-ended bookings and three that end in an hour.
+    now = datetime.now(timezone.utc)
+    ended = book(headers, room_id, free[:3], now - timedelta(minutes=1))
+    later = book(headers, room_id, free[3:], now + timedelta(hours=1))
+
+    # Two "workers" load the same deadlines after a restart and race on the same batch.
+    workers = [release_scheduler.ReleaseScheduler(batch_size=2) for _ in range(2)]
+    for w in workers:
+        w.load()
+    results = []
+    threads = [threading.Thread(target=lambda w=w: results.append(w.run_due())) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if sum(results) != len(ended):
+        fail(f"workers released {results}, expected {len(ended)} in total", 3)
+    got = statuses(ended + later)
+    for rid in ended:
+        if got[rid] != (models.ReservationStatus.completed, models.SeatStatus.available):
+            fail(f"ended reservation {rid} not released: {got[rid]}", 4)
+    for rid in later:
+        if got[rid] != (models.ReservationStatus.active, models.SeatStatus.booked):
+            fail(f"future reservation {rid} released early: {got[rid]}", 5)
+    mine = {r["id"]: r["status"] for r in client.get("/api/reservations/mine", headers=headers).json()}
+    if any(mine.get(rid) != "completed" for rid in ended):
+        fail("/mine does not report completed reservations", 8)
+    print(f"Released {sum(results)} ended reservations across workers {results}")
+
+    # The same seats can end again (no unique-constraint clash with the earlier completed rows).
+    again = book(headers, room_id, free[:3], now - timedelta(seconds=1))
+    w = release_scheduler.ReleaseScheduler()
+    for rid in again:
+        w.schedule(rid, now - timedelta(seconds=1))
+    if w.run_due() != len(again):
+        fail("second cycle on the same seats was not released", 6)
+
+    # The app-wide scheduler picked up the later bookings when they were created.
+    if not all(rid in release_scheduler.scheduler._due_at for rid in later):
+        fail("new bookings were not scheduled", 7)
+    for rid in later:
+        if client.delete(f"/api/reservations/{rid}", headers=headers).status_code != 200:
+            fail(f"cancel of {rid} failed", 9)
+    print("RELEASE TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
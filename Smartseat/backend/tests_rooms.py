@@ -0,0 +1,108 @@
+# Campus/room hierarchy test: room-scoped seat maps, per-room seat codes and cache invalidation on booking
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend import models
+from sqlalchemy import delete, select
+import uuid
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("ROOMS TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def run():
+    campuses = {c["code"]: c for c in client.get("/api/campuses").json()}
+    if not {"singapore", "townsville", "cairns"} <= set(campuses):
+        fail(f"seeded campuses missing: {sorted(campuses)}", 2)
+    rooms = client.get("/api/campuses/singapore/rooms", params={"block": "A", "floor": 1}).json()
+    if not rooms:
+        fail("default room not seeded", 3)
+    default_room = rooms[0]["id"]
+    free = client.get(f"/api/rooms/{default_room}/seats", params={"status": "available"}).json()
+    if not free:
+        fail("no free seat in the default room", 3)
+    reused = free[0]["seat_code"]
+
+    # Two throwaway rooms: both reuse a free default-room seat code and share a code the default room does not have.
+    # They are removed again at the end so later tests see only the seeded rooms.
+    db = SessionLocal()
+    shared = f"Z{uuid.uuid4().hex[:4]}"
+    try:
+        created = []
+        for block in ("B", "C"):
+            room = models.Room(campus_id=campuses["townsville"]["id"], block=block, floor=2, code=f"T{uuid.uuid4().hex[:4]}")
+            db.add(room)
+            db.flush()
+            for seat_code in (reused, shared):
+                db.add(models.Seat(seat_code=seat_code, room_id=room.id, seat_type=models.SeatType.quiet, status=models.SeatStatus.available))
+            created.append(room.id)
+        db.commit()
+        other_room = created[0]
+    finally:
+        db.close()
+
+    try:
+        check_rooms(default_room, other_room, reused, shared)
+    finally:
+        db = SessionLocal()
+        try:
+            seat_ids = select(models.Seat.id).where(models.Seat.room_id.in_(created))
+            db.execute(delete(models.Reservation).where(models.Reservation.seat_id.in_(seat_ids)))
+            db.execute(delete(models.Seat).where(models.Seat.room_id.in_(created)))
+            db.execute(delete(models.Room).where(models.Room.id.in_(created)))
+            db.commit()
+        finally:
+            db.close()
+    print("ROOMS TEST PASSED")
+
+
+def check_rooms(default_room, other_room, reused, shared):
+    seats = client.get(f"/api/rooms/{other_room}/seats").json()
+    if sorted((s["seat_code"], s["room_id"]) for s in seats) != sorted([(reused, other_room), (shared, other_room)]):
+        fail(f"room seat map leaked other rooms: {seats}", 4)
+    if client.get("/api/rooms/999999/seats").status_code != 404:
+        fail("unknown room did not 404", 5)
+    print("Room-scoped seat map OK")
+
+    email = f"rooms+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "Room Tester", "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+
+    r = client.post("/api/reservations", json={"seat_code": shared}, headers=headers)
+    if r.status_code != 400:
+        fail(f"ambiguous seat code accepted: {r.status_code} {r.text}", 6)
+    # A bare code that the default room has books the default room's seat (older clients).
+    r = client.post("/api/reservations", json={"seat_code": reused}, headers=headers)
+    if r.status_code != 200 or r.json()["room_id"] != default_room:
+        fail(f"bare seat code did not fall back to the default room: {r.status_code} {r.text}", 11)
+    client.delete(f"/api/reservations/{r.json()['id']}", headers=headers)
+
+    # Prime the cache, book through the API, and expect the cached map to be invalidated.
+    before = client.get(f"/api/rooms/{other_room}/seats", params={"status": "available"}).json()
+    r = client.post("/api/reservations", json={"seat_code": reused, "room_id": other_room}, headers=headers)
+    if r.status_code != 200 or r.json()["room_id"] != other_room:
+        fail(f"room-scoped booking failed: {r.status_code} {r.text}", 7)
+    after = client.get(f"/api/rooms/{other_room}/seats", params={"status": "available"}).json()
+    if len(before) != 2 or len(after) != 1:
+        fail(f"cached seat map not invalidated: before={before} after={after}", 8)
+    client.delete(f"/api/reservations/{r.json()['id']}", headers=headers)
+    if client.get(f"/api/rooms/{other_room}/seats", params={"status": "available"}).json() != before:
+        fail("seat map not refreshed after cancel", 9)
+    print("Booking invalidates room cache OK")
+
+    default_seats = client.get(f"/api/rooms/{default_room}/seats").json()
+    if not default_seats or any(s["room_id"] != default_room for s in default_seats):
+        fail("default room seat map wrong", 10)
+
+
+if __name__ == '__main__':
+    run()
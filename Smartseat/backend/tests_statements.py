@@ -0,0 +1,101 @@
+# Pre-built statement test: hot paths run the registered statements, compile cache hits after warmup, diag endpoint gated
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+import threading
+import uuid
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.main import app
+from backend import statements
+from backend.database import SessionLocal
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("STATEMENTS TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def traffic():
+    """One pass over every hot path: signup/login (user by email), token lookup, seat list variants, booking."""
+    email = f"stmt+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "stmt", "email": email, "password": "secret123"})
+    token = client.post("/api/auth/login", json={"email": email, "password": "secret123"}).json()["token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/api/seats")
+    client.get("/api/seats", params={"seat_type": "standard"})
+    client.get("/api/seats", params={"seat_type": "standard", "status": "available"})
+    seat = client.get("/api/seats", params={"status": "available"}).json()[0]
+    r = client.post("/api/reservations", json={"seat_code": seat["seat_code"], "room_id": seat["room_id"]}, headers=headers)
+    if r.status_code != 200:
+        fail(f"booking failed: {r.status_code} {r.text}", 2)
+    client.post("/api/reservations", json={"seat_code": seat["seat_code"]}, headers=headers)  # 400/409: lookup still runs
+    client.delete(f"/api/reservations/{r.json()['id']}", headers=headers)
+
+
+def run():
+    traffic()  # warm the compiled cache
+    statements.reset()
+    for _ in range(3):
+        traffic()
+    report = statements.report(measure=False)
+    for row in report["statements"]:
+        if not row["executions"]:
+            fail(f"{row['name']} never ran: the hot path is not using it", 3)
+        if row["hit_rate"] != 1.0:
+            fail(f"{row['name']} missed the compiled cache after warmup: {row}", 4)
+    print(f"{len(report['statements'])} statements, all cache hits after warmup OK")
+
+    # Counting is attached to the app's engines only, and per-thread counts add up.
+    if event.contains(Engine, "after_cursor_execute", statements._count):
+        fail("statement counter is a global Engine listener", 9)
+    statements.reset()
+
+    def lookups():
+        db = SessionLocal()
+        try:
+            for _ in range(5):
+                db.execute(statements.TOKEN_BY_VALUE, {"value": "no-such-token"}).scalar_one_or_none()
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=lookups) for _ in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    if statements.REGISTRY["token_by_value"].executions != 20:
+        fail(f"threaded lookups miscounted: {statements.REGISTRY['token_by_value'].executions}", 10)
+    print("Per-engine, per-thread counting OK")
+
+    est = statements.estimate_savings("token_by_value", n=50)
+    if est["saved_us"] is None or est["prebuilt_us"] >= est["rebuild_us"]:
+        fail(f"pre-built statement not cheaper than rebuilding: {est}", 5)
+    print(f"token lookup: rebuild {est['rebuild_us']} us vs pre-built {est['prebuilt_us']} us OK")
+
+    old = os.environ.pop("DIAG_TOKEN", None)
+    try:
+        if client.get("/api/diag/statements").status_code != 404:
+            fail("diag endpoint visible without DIAG_TOKEN", 6)
+        os.environ["DIAG_TOKEN"] = "diag-secret"
+        if client.get("/api/diag/statements", headers={"X-Diag-Token": "nope"}).status_code != 403:
+            fail("diag endpoint accepted a wrong token", 7)
+        r = client.get("/api/diag/statements", headers={"X-Diag-Token": "diag-secret"})
+        body = r.json()
+        if r.status_code != 200 or not body["statements"] or "cpu_saved_ms" not in body["statements"][0]:
+            fail(f"diag endpoint response wrong: {r.status_code} {r.text[:200]}", 8)
+    finally:
+        os.environ.pop("DIAG_TOKEN", None)
+        if old is not None:
+            os.environ["DIAG_TOKEN"] = old
+    print("Diag endpoint gating OK")
+    print("STATEMENTS TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,72 @@
+# Storage profile test: profile selection, SQLite pragmas per connection, Postgres pool options, app engine wiring
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import os
+import tempfile
+from sqlalchemy import text
+from backend import database, storage
+
+
+def fail(msg, code):
+    print("STORAGE TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def pragmas(engine) -> dict:
+    with engine.connect() as conn:
+        return {p: conn.execute(text(f"PRAGMA {p}")).scalar()
+                for p in ("journal_mode", "synchronous", "busy_timeout", "cache_size", "mmap_size", "temp_store")}
+
+
+def run():
+    tmp = tempfile.mkdtemp(prefix="ss-storage-")
+    file_url = f"sqlite:///{os.path.join(tmp, 'a.db')}"
+    cases = {
+        (file_url, "auto"): "sqlite",
+        ("sqlite://", "auto"): "plain",
+        ("sqlite:///:memory:", "auto"): "plain",
+        ("postgresql+psycopg://u:p@db/app", "auto"): "postgres",
+        (file_url, "plain"): "plain",
+    }
+    for (url, profile), want in cases.items():
+        if storage.resolve_profile(url, profile) != want:
+            fail(f"{url} / {profile} resolved to {storage.resolve_profile(url, profile)}, want {want}", 2)
+    try:
+        storage.resolve_profile(file_url, "turbo")
+        fail("unknown profile accepted", 3)
+    except ValueError:
+        pass
+    print("Profile selection OK")
+
+    tuned = storage.make_engine(file_url, "sqlite")
+    got = pragmas(tuned)
+    want = {"journal_mode": "wal", "synchronous": 1, "busy_timeout": storage.SQLITE_BUSY_TIMEOUT_MS,
+            "cache_size": -storage.SQLITE_CACHE_MB * 1024, "temp_store": 2}
+    if any(got[k] != v for k, v in want.items()) or got["mmap_size"] <= 0:
+        fail(f"tuned pragmas wrong: {got}", 4)
+    if tuned.pool.size() != storage.POOL_SIZE or tuned.storage_profile != "sqlite":
+        fail(f"tuned pool wrong: size={tuned.pool.size()}", 5)
+    plain = storage.make_engine(f"sqlite:///{os.path.join(tmp, 'b.db')}", "plain")
+    if pragmas(plain)["journal_mode"] != "delete":
+        fail("plain profile changed the journal mode", 6)
+    tuned.dispose()
+    plain.dispose()
+    print("SQLite pragmas OK")
+
+    opts = storage.engine_options("postgresql+psycopg://u:p@db/app", "postgres")
+    if not (opts["pool_pre_ping"] and opts["pool_size"] == storage.POOL_SIZE and opts["max_overflow"] == storage.MAX_OVERFLOW
+            and opts["pool_recycle"] == storage.POOL_RECYCLE_S):
+        fail(f"postgres options wrong: {opts}", 7)
+    print("Postgres pool options OK")
+
+    if storage.is_sqlite_file(database.DB_URL) and storage.PROFILE == "auto":
+        if database.engine.storage_profile != "sqlite" or pragmas(database.engine)["journal_mode"] != "wal":
+            fail("app engine is not on the tuned SQLite profile", 8)
+        print("App engine on tuned SQLite profile OK")
+    print("STORAGE TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
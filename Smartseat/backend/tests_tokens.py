@@ -0,0 +1,88 @@
+# Token lifecycle test: expiry, logout/revoke, per-user cap and batched purge
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal
+from backend import models, tokens
+from datetime import timedelta
+import uuid
+
+client = TestClient(app)
+
+
+def fail(msg, code):
+    print("TOKENS TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def login(email):
+    r = client.post("/api/auth/login", json={"email": email, "password": "secret123"})
+    if r.status_code != 200:
+        fail(f"login returned {r.status_code}: {r.text}", 2)
+    body = r.json()
+    if not body.get("expires_at"):
+        fail("login response has no expires_at", 3)
+    return body["token"]
+
+
+def run():
+    email = f"tokens+{uuid.uuid4().hex[:8]}@example.com"
+    client.post("/api/auth/signup", json={"name": "Token Tester", "email": email, "password": "secret123"})
+
+    # Logout revokes only the presented token.
+    t1, t2 = login(email), login(email)
+    r = client.post("/api/auth/logout", headers={"Authorization": f"Bearer {t1}"})
+    if r.status_code != 200 or r.json().get("revoked") != 1:
+        fail(f"logout returned {r.status_code}: {r.text}", 4)
+    if client.get("/api/auth/me", headers={"Authorization": f"Bearer {t1}"}).status_code != 401:
+        fail("revoked token still accepted", 5)
+    if client.get("/api/auth/me", headers={"Authorization": f"Bearer {t2}"}).status_code != 200:
+        fail("sibling token was revoked too", 6)
+    print("Logout OK")
+
+    # Expired tokens are rejected.
+    db = SessionLocal()
+    try:
+        row = db.query(models.Token).filter_by(token=t2).first()
+        row.expires_at = tokens._utcnow() - timedelta(seconds=1)
+        db.commit()
+    finally:
+        db.close()
+    if client.get("/api/auth/me", headers={"Authorization": f"Bearer {t2}"}).status_code != 401:
+        fail("expired token still accepted", 7)
+    print("Expiry OK")
+
+    # Logging in over and over keeps at most MAX_PER_USER rows.
+    for _ in range(tokens.MAX_PER_USER + 3):
+        last = login(email)
+    db = SessionLocal()
+    try:
+        user = db.query(models.User).filter_by(email=email).first()
+        n = db.query(models.Token).filter_by(user_id=user.id).count()
+        if tokens.MAX_PER_USER and n > tokens.MAX_PER_USER:
+            fail(f"{n} tokens kept, cap is {tokens.MAX_PER_USER}", 8)
+        print(f"Per-user cap OK ({n} tokens)")
+
+        # Expire everything but the latest and purge in small batches.
+        db.query(models.Token).filter(models.Token.user_id == user.id, models.Token.token != last).update(
+            {models.Token.expires_at: tokens._utcnow() - timedelta(minutes=1)}, synchronize_session=False)
+        db.commit()
+        purged = tokens.purge_expired(db, batch_size=2)
+        if purged < n - 1:
+            fail(f"purged {purged}, expected at least {n - 1}", 9)
+        if db.query(models.Token).filter_by(user_id=user.id).count() != 1:
+            fail("purge removed the live token or left expired ones", 10)
+        print(f"Purge OK ({purged} removed)")
+    finally:
+        db.close()
+
+    if client.get("/api/auth/me", headers={"Authorization": f"Bearer {last}"}).status_code != 200:
+        fail("live token rejected after purge", 11)
+    print("TOKENS TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,86 @@
+# Chunked time-series store test: append across chunk boundaries, range reads, append-only rules, aggregator mirror
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from backend.database import SessionLocal, sync_schema
+from backend import aggregator, models, tsstore
+import uuid
+
+
+def fail(msg, code):
+    print("TSSTORE TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def run():
+    sync_schema()
+    tsstore.CHUNK_SIZE = 100  # small chunks so the test crosses several boundaries
+    name = f"test_{uuid.uuid4().hex[:8]}"
+    start = np.datetime64("2025-01-01T00:00:00", "s")
+    ts = start + np.arange(1000) * np.timedelta64(3600, "s")
+    values = np.random.default_rng(7).normal(50, 10, size=1000)
+
+    db = SessionLocal()
+    try:
+        # Uneven batches: fill the tail chunk, spill into new ones.
+        for lo, hi in ((0, 30), (30, 250), (250, 251), (251, 1000)):
+            tsstore.append(db, name, ts[lo:hi], values[lo:hi])
+        db.commit()
+        chunks = db.query(models.SeriesChunk).filter_by(series_name=name).order_by(models.SeriesChunk.chunk_no).all()
+        if [c.count for c in chunks] != [100] * 10:
+            fail(f"chunk layout wrong: {[c.count for c in chunks]}", 2)
+        if tsstore.count(db, name) != 1000:
+            fail("point count wrong", 3)
+
+        got_ts, got_vals = tsstore.read_range(db, name)
+        if not (np.array_equal(got_ts, ts) and np.array_equal(got_vals, values)):
+            fail("full read does not round-trip", 4)
+        lo, hi = ts[123], ts[777]
+        got_ts, got_vals = tsstore.read_range(db, name, lo, hi)
+        if not (np.array_equal(got_ts, ts[123:777]) and np.array_equal(got_vals, values[123:777])):
+            fail("range read wrong", 5)
+        if len(tsstore.read_range(db, name, ts[-1] + np.timedelta64(1, "s"))[0]) != 0:
+            fail("read past the end returned points", 6)
+        s = tsstore.read_series(db, name, start=ts[10].astype(object), end=ts[20].astype(object))
+        if len(s) != 10 or s.iloc[0] != values[10]:
+            fail("pandas view wrong", 7)
+        print("Append + range reads OK")
+
+        # Append-only: earlier or duplicate timestamps are rejected, or skipped on request.
+        for bad in (ts[-1:], ts[:1]):
+            try:
+                tsstore.append(db, name, bad, [1.0])
+                fail("append before the last point accepted", 8)
+            except ValueError:
+                db.rollback()
+        more_ts = ts[-1] + np.arange(1, 6) * np.timedelta64(3600, "s")
+        n = tsstore.append(db, name, np.concatenate((ts[-3:], more_ts)), np.arange(8.0), skip_existing=True)
+        db.commit()
+        if n != 5 or tsstore.last_ts(db, name) != more_ts[-1].astype(object):
+            fail(f"skip_existing appended {n}, last={tsstore.last_ts(db, name)}", 9)
+        print("Append-only rules OK")
+
+        # The aggregator mirrors completed days into the store; a rerun adds nothing twice.
+        daily = f"daily_{uuid.uuid4().hex[:8]}"
+        aggregator.aggregate_daily(db, lookback_days=14, series_name=daily)
+        aggregator.aggregate_daily(db, lookback_days=14, series_name=daily)
+        rows = db.query(models.TimeSeriesPoint).filter_by(series_name=daily).order_by(models.TimeSeriesPoint.ts).all()
+        st_ts, st_vals = tsstore.read_range(db, daily)
+        if [r.ts for r in rows] != list(st_ts.astype(object)) or [r.value for r in rows] != list(st_vals):
+            fail("aggregator rows and chunked store disagree", 10)
+        tsstore.drop(db, daily)
+        if tsstore.backfill_from_rows(db, daily) != 14:
+            fail("backfill from rows wrong", 11)
+        tsstore.drop(db, name)
+        tsstore.drop(db, daily)
+        db.query(models.TimeSeriesPoint).filter_by(series_name=daily).delete()
+        db.commit()
+    finally:
+        db.close()
+    print("TSSTORE TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,167 @@
+# Group commit test: concurrent intents share a transaction, each caller gets its own result/conflict, replay on commit failure
+import sys
+import pathlib
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+
+import threading
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import SessionLocal, engine, sync_schema
+from backend import models, write_batcher
+import uuid
+
+client = TestClient(app)
+
+
+class Conflict(Exception):
+    pass
+
+
+def fail(msg, code):
+    print("WRITE BATCH TEST FAILED:", msg)
+    sys.exit(code)
+
+
+def make_room(n_seats: int):
+    db = SessionLocal()
+    try:
+        campus = db.query(models.Campus).first()
+        room = models.Room(campus_id=campus.id, block="W", floor=1, code=f"W{uuid.uuid4().hex[:4]}")
+        db.add(room)
+        db.flush()
+        seats = [models.Seat(seat_code=f"X{i + 1}", room_id=room.id, status=models.SeatStatus.available) for i in range(n_seats)]
+        user = models.User(name="Batch", email=f"batch+{uuid.uuid4().hex[:8]}@example.com", password_hash="x")
+        db.add_all(seats + [user])
+        db.commit()
+        return room.id, [s.id for s in seats], user.id
+    finally:
+        db.close()
+
+
+def claim(seat_id: int, user_id: int):
+    def intent(db: Session):
+        claimed = db.execute(
+            update(models.Seat)
+            .where(models.Seat.id == seat_id, models.Seat.status == models.SeatStatus.available)
+            .values(status=models.SeatStatus.booked)
+        ).rowcount
+        if not claimed:
+            raise Conflict(seat_id)
+        r = models.Reservation(user_id=user_id, seat_id=seat_id, status=models.ReservationStatus.active)
+        db.add(r)
+        db.flush()
+        return r.id
+    return intent
+
+
+def submit_together(wb, intents):
+    """Submit all intents at (nearly) the same moment from separate threads; returns results/exceptions in order."""
+    out = [None] * len(intents)
+    gate = threading.Barrier(len(intents))
+
+    def worker(i):
+        gate.wait()
+        try:
+            out[i] = wb.submit(intents[i]).result(timeout=10)
+        except Exception as e:
+            out[i] = e
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(intents))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return out
+
+
+def run():
+    sync_schema()
+    room_id, seat_ids, user_id = make_room(5)
+
+    # Two intents per seat: exactly one wins each seat, and the losers do not disturb the winners.
+    wb = write_batcher.WriteBatcher(SessionLocal, window_ms=100, max_batch=64)
+    out = submit_together(wb, [claim(sid, user_id) for sid in seat_ids * 2])
+    wins = [o for o in out if isinstance(o, int)]
+    conflicts = [o for o in out if isinstance(o, Conflict)]
+    if len(wins) != 5 or len(conflicts) != 5:
+        fail(f"expected 5 wins + 5 conflicts, got {out}", 2)
+    if wb.stats["batches"] > 3 or wb.stats["intents"] != 10:
+        fail(f"intents were not grouped: {wb.stats}", 3)
+    db = SessionLocal()
+    try:
+        booked = db.execute(select(models.Reservation.seat_id).where(models.Reservation.id.in_(wins))).scalars().all()
+        if sorted(booked) != sorted(seat_ids):
+            fail(f"winning reservations not committed: {booked}", 4)
+    finally:
+        db.close()
+    print(f"Grouped intents with per-caller conflicts OK ({wb.stats['batches']} transaction(s) for 10 intents)")
+
+    # An intent that raises after writing is rolled back to its savepoint; its neighbours commit.
+    room_id, seat_ids, user_id = make_room(3)
+
+    def half_then_fail(db: Session):
+        claim(seat_ids[1], user_id)(db)
+        raise ValueError("boom")
+    out = submit_together(wb, [claim(seat_ids[0], user_id), half_then_fail, claim(seat_ids[2], user_id)])
+    if not (isinstance(out[0], int) and isinstance(out[1], ValueError) and isinstance(out[2], int)):
+        fail(f"failure not isolated: {out}", 5)
+    db = SessionLocal()
+    try:
+        statuses = [db.get(models.Seat, sid).status for sid in seat_ids]
+        if statuses != [models.SeatStatus.booked, models.SeatStatus.available, models.SeatStatus.booked]:
+            fail(f"failed intent leaked writes: {statuses}", 6)
+    finally:
+        db.close()
+    wb.stop()
+    print("Savepoint isolation OK")
+
+    # A failed COMMIT replays every intent of the batch on its own.
+    class FlakyCommit(Session):
+        failures = [RuntimeError("disk I/O error")]
+
+        def commit(self):
+            if self.failures:
+                raise self.failures.pop()
+            super().commit()
+
+    room_id, seat_ids, user_id = make_room(2)
+    flaky = write_batcher.WriteBatcher(sessionmaker(bind=engine, class_=FlakyCommit), window_ms=100)
+    out = submit_together(flaky, [claim(sid, user_id) for sid in seat_ids])
+    flaky.stop()
+    if not all(isinstance(o, int) for o in out) or flaky.stats["replayed_batches"] != 1:
+        fail(f"replay after commit failure wrong: {out} {flaky.stats}", 7)
+    print("Replay after failed group commit OK")
+
+    # The API goes through the app's batcher when a window is set.
+    write_batcher.batcher.window_ms = 5
+    try:
+        email = f"batchapi+{uuid.uuid4().hex[:8]}@example.com"
+        client.post("/api/auth/signup", json={"name": "Batch API", "email": email, "password": "secret123"})
+        r = client.post("/api/auth/login", json={"email": email, "password": "secret123"})
+        if r.status_code != 200 or not r.json().get("token"):
+            fail(f"batched login failed: {r.status_code} {r.text}", 8)
+        headers = {"Authorization": f"Bearer {r.json()['token']}"}
+        room_id, _, _ = make_room(1)
+        r = client.post("/api/reservations", json={"seat_code": "X1", "room_id": room_id}, headers=headers)
+        if r.status_code != 200 or r.json()["room_id"] != room_id or not r.json()["created_at"]:
+            fail(f"batched booking failed: {r.status_code} {r.text}", 9)
+        again = client.post("/api/reservations", json={"seat_code": "X1", "room_id": room_id}, headers=headers)
+        if again.status_code != 409:
+            fail(f"double booking not rejected: {again.status_code}", 10)
+        if client.delete(f"/api/reservations/{r.json()['id']}", headers=headers).status_code != 200:
+            fail("batched cancel failed", 11)
+        seats = client.get(f"/api/rooms/{room_id}/seats").json()
+        if [s["status"] for s in seats] != ["available"]:
+            fail(f"seat not freed after batched cancel: {seats}", 12)
+        if write_batcher.batcher.stats["intents"] < 3:
+            fail(f"API writes bypassed the batcher: {write_batcher.batcher.stats}", 13)
+    finally:
+        write_batcher.batcher.stop()
+        write_batcher.batcher.window_ms = 0
+    print("Batched login/book/cancel through the API OK")
+    print("WRITE BATCH TEST PASSED")
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,158 @@
+"""Bearer token lifecycle: expiry, sliding refresh, revocation, per-user cap and purge.
+
+Environment:
+  TOKEN_TTL_MINUTES=10080        lifetime of a new token (default 7 days)
+  TOKEN_SLIDING=1                extend a token on use once less than half its lifetime remains
+  TOKEN_MAX_PER_USER=10          active tokens kept per user; the oldest are dropped on login (0 = no cap)
+  TOKEN_PURGE_INTERVAL_S=600     how often the background purger runs (0 = disabled)
+  TOKEN_PURGE_BATCH=500          rows deleted per purge transaction
+"""
+from __future__ import annotations
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.orm import Session
+
+from . import models, statements
+from .utils import new_token
+
+log = logging.getLogger("smartseat.tokens")
+
+TOKEN_TTL = timedelta(minutes=int(os.getenv("TOKEN_TTL_MINUTES", str(7 * 24 * 60))))
+SLIDING = os.getenv("TOKEN_SLIDING", "1").strip().lower() in ("1", "true", "yes", "on")
+MAX_PER_USER = int(os.getenv("TOKEN_MAX_PER_USER", "10"))
+PURGE_INTERVAL_S = float(os.getenv("TOKEN_PURGE_INTERVAL_S", "600"))
+PURGE_BATCH = int(os.getenv("TOKEN_PURGE_BATCH", "500"))
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # SQLite hands DateTime(timezone=True) back naive; values are written as UTC.
+    return dt if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+
+
+def effective_expiry(token: models.Token) -> datetime:
+    if token.expires_at is not None:
+        return _as_utc(token.expires_at)
+    return _as_utc(token.created_at or _utcnow()) + TOKEN_TTL
+
+
+def _expired_clause(now: datetime):
+    return or_(
+        models.Token.expires_at <= now,
+        and_(models.Token.expires_at.is_(None), models.Token.created_at <= now - TOKEN_TTL),
+    )
+
+
+def issue_token(db: Session, user: models.User) -> models.Token:
+    """Create a token for `user`, trimming their oldest tokens beyond MAX_PER_USER. Caller commits."""
+    now = _utcnow()
+    if MAX_PER_USER > 0:
+        keep = MAX_PER_USER - 1  # leave room for the one being issued
+        stale_ids = db.execute(
+            select(models.Token.id)
+            .where(models.Token.user_id == user.id)
+            .order_by(models.Token.id.desc())
+            .offset(keep)
+        ).scalars().all()
+        if stale_ids:
+            db.execute(delete(models.Token).where(models.Token.id.in_(stale_ids)))
+    token = models.Token(user_id=user.id, token=new_token(), expires_at=now + TOKEN_TTL)
+    db.add(token)
+    return token
+
+
+def resolve(db: Session, value: str) -> Optional[models.Token]:
+    """Return the live token row for `value`, or None if unknown/expired. Applies sliding refresh."""
+    token = db.execute(statements.TOKEN_BY_VALUE, {"value": value}).scalar_one_or_none()
+    if token is None:
+        return None
+    now = _utcnow()
+    expiry = effective_expiry(token)
+    if expiry <= now:
+        return None
+    if SLIDING and expiry - now < TOKEN_TTL / 2:
+        # Only write once per half-lifetime so hot polling doesn't turn reads into writes.
+        token.expires_at = now + TOKEN_TTL
+        try:
+            db.commit()
+        except Exception:
+            db.rollback()
+            log.exception("Failed to refresh token expiry")
+    return token
+
+
+def revoke(db: Session, value: str) -> bool:
+    deleted = db.execute(delete(models.Token).where(models.Token.token == value)).rowcount
+    db.commit()
+    return bool(deleted)
+
+
+def revoke_all(db: Session, user_id: int) -> int:
+    deleted = db.execute(delete(models.Token).where(models.Token.user_id == user_id)).rowcount
+    db.commit()
+    return deleted
+
+
+def purge_expired(db: Session, batch_size: int = PURGE_BATCH, max_batches: Optional[int] = None) -> int:
+    """Delete expired tokens in bounded batches, committing after each so the writer lock is held briefly."""
+    total = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        now = _utcnow()
+        ids = db.execute(select(models.Token.id).where(_expired_clause(now)).limit(batch_size)).scalars().all()
+        if not ids:
+            break
+        db.execute(delete(models.Token).where(models.Token.id.in_(ids)))
+        db.commit()
+        total += len(ids)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+    return total
+
+
+class TokenPurger:
+    """Daemon thread that runs purge_expired every `interval` seconds."""
+
+    def __init__(self, session_factory, interval: float = PURGE_INTERVAL_S, batch_size: int = PURGE_BATCH):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        db = self.session_factory()
+        try:
+            return purge_expired(db, batch_size=self.batch_size)
+        finally:
+            db.close()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                n = self.run_once()
+                if n:
+                    log.info("purged %d expired tokens", n)
+            except Exception:
+                log.exception("token purge failed")
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="token-purger", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
@@ -8,6 +8,11 @@ import numpy as np
 import pandas as pd
 from statsmodels.tsa.statespace.sarimax import SARIMAX, SARIMAXResults
 
+try:
+    from . import order_search  # imported as backend.train_dummy_sarimax
+except ImportError:
+    import order_search  # run as a script from backend/
+
 
 # Utilities
 
@@ -79,12 +84,12 @@ def _read_exog_csv(path: str, freq: str, idx_like: pd.DatetimeIndex, date_col: O
 
 
 # Portable save / load
-def portable_save(series: pd.Series, results: SARIMAXResults, portable_json_path: str) -> None:
+def portable_save(series: pd.Series, results: SARIMAXResults, portable_json_path: str, extra: Optional[dict] = None) -> None:
     """
     Save a portable bundle (JSON + NPZ) that allows reconstructing a SARIMAXResults
     without relying on pickle or exact statsmodels/python versions.
 
-    JSON contains: order, seasonal_order, flags, freq, start, nobs, params
+    JSON contains: order, seasonal_order, flags, freq, start, nobs, params (+ `extra`, e.g. order selection info)
     NPZ contains:  y (the training endog values)
     """
     meta = {
@@ -97,6 +102,8 @@ def portable_save(series: pd.Series, results: SARIMAXResults, portable_json_path
         "nobs": int(series.shape[0]),
         "params": results.params.tolist(),
     }
+    if extra:
+        meta.update(extra)
 
     _ensure_dir(portable_json_path)
     base, _ = os.path.splitext(portable_json_path)
@@ -107,32 +114,62 @@ def portable_save(series: pd.Series, results: SARIMAXResults, portable_json_path
     np.savez(npz_path, y=series.values)
 
 
-def portable_load(portable_json_path: str) -> SARIMAXResults:
+DELTA_PREFIX = "y_delta_"
+
+
+def delta_number(name: str) -> Optional[int]:
+    """Update number of an NPZ delta member ('y_delta_0012' or 'y_delta_0012.npy' -> 12), else None.
+
+    Deltas must be ordered by this number, not by name: past 9999 the zero padding runs out.
     """
-    Reconstruct a SARIMAXResults object from a portable bundle (JSON + NPZ).
-    We rebuild the model on the original endog and apply the saved params via model.filter(...).
+    if not name.startswith(DELTA_PREFIX):
+        return None
+    digits = name[len(DELTA_PREFIX):].removesuffix(".npy")
+    return int(digits) if digits.isdigit() else None
+
+
+def portable_read(portable_json_path: str) -> Tuple[pd.Series, dict]:
+    """Read a portable bundle's series and JSON metadata without building a model.
+
+    The series is the training `y` followed by any `y_delta_*` members that
+    online_update.py appended since the last fit.
     """
     with open(portable_json_path, "r", encoding="utf-8") as f:
         meta = json.load(f)
     base, _ = os.path.splitext(portable_json_path)
     npz_path = base + ".npz"
     arr = np.load(npz_path)
-    y = arr["y"]
+    parts = [np.asarray(arr["y"], dtype=float).ravel()]  # older bundles stored y as an (n, 1) column
+    deltas = sorted((delta_number(name), name) for name in arr.files if delta_number(name) is not None)
+    parts += [np.asarray(arr[name], dtype=float).ravel() for _, name in deltas]
+    y = np.concatenate(parts)
 
     idx = pd.date_range(
         start=pd.to_datetime(meta["start"]),
-        periods=meta["nobs"],
+        periods=len(y),
         freq=meta["freq"]
     )
-    series = pd.Series(y, index=idx)
+    return pd.Series(y, index=idx), meta
+
 
-    model = SARIMAX(
-        series,
+def portable_model(endog, meta: dict) -> SARIMAX:
+    """An unfitted SARIMAX with the bundle's specification on `endog` (series or plain array)."""
+    return SARIMAX(
+        endog,
         order=tuple(meta["order"]),
         seasonal_order=tuple(meta["seasonal_order"]),
         enforce_stationarity=meta["enforce_stationarity"],
         enforce_invertibility=meta["enforce_invertibility"],
     )
+
+
+def portable_load(portable_json_path: str) -> SARIMAXResults:
+    """
+    Reconstruct a SARIMAXResults object from a portable bundle (JSON + NPZ).
+    We rebuild the model on the original endog and apply the saved params via model.filter(...).
+    """
+    series, meta = portable_read(portable_json_path)
+    model = portable_model(series, meta)
     # Use filter with fixed params to avoid re-optimization
     res = model.filter(np.asarray(meta["params"]))
     return res
@@ -152,11 +189,20 @@ def train_and_save(
     random_seed: int = 0,
     n: int = 120,
     forecast_steps: int = 0,
+    auto_order: bool = False,
+    grid: Optional[str] = None,
+    criterion: str = "aic",
+    workers: Optional[int] = None,
+    candidate_budget_s: Optional[float] = 30.0,
 ) -> str:
     """
     Train a small SARIMAX on synthetic seasonal-trend data and save both:
       1) Pickled SARIMAXResults (.pkl)
       2) A portable bundle (.json + .npz) for cross-version reconstruction
+
+    With auto_order=True, `order`/`seasonal_order` are replaced by the best candidate
+    of a parallel grid search (see order_search.py); the seasonal period m of the
+    grid defaults to seasonal_order[3].
     """
     # Resolve output path robustly to Jupyter/REPL
     if model_path is None:
@@ -181,18 +227,39 @@ def train_and_save(
         if len(exog) != len(series):
             raise ValueError(f"exog length {len(exog)} != series length {len(series)} after alignment")
 
-    #  fit SARIMAX
-    with warnings.catch_warnings():
-        warnings.simplefilter('default' if show_warnings else 'ignore')  # show warnings by default
-        model = SARIMAX(
-            series,
-            exog=exog,
-            order=order,
-            seasonal_order=seasonal_order,
-            enforce_stationarity=False,
-            enforce_invertibility=False,
+    selection = None
+    results = None
+    if auto_order:
+        candidates = order_search.parse_grid(grid or order_search.DEFAULT_GRID, m=seasonal_order[3])
+        found = order_search.search(
+            series, candidates, series_name=os.path.basename(os.path.splitext(model_path)[0]),
+            criterion=criterion, workers=workers, candidate_budget_s=candidate_budget_s, exog=exog,
         )
-        results = model.fit(disp=False)
+        print(order_search.summary(found))
+        if found.best is None:
+            raise RuntimeError("auto order search found no converging candidate")
+        order, seasonal_order = found.best.order, found.best.seasonal_order
+        results = order_search.winner_results(series, found.best, exog)  # params already fitted in the search
+        selection = {"selection": {
+            "criterion": criterion,
+            "score": getattr(found.best, criterion),
+            "data_version": found.data_version,
+            "candidates": len(found.ranked) + len(found.pruned),
+        }}
+
+    #  fit SARIMAX
+    if results is None:
+        with warnings.catch_warnings():
+            warnings.simplefilter('default' if show_warnings else 'ignore')  # show warnings by default
+            model = SARIMAX(
+                series,
+                exog=exog,
+                order=order,
+                seasonal_order=seasonal_order,
+                enforce_stationarity=False,
+                enforce_invertibility=False,
+            )
+            results = model.fit(disp=False)
 
     # save (pickle + portable)
     _ensure_dir(model_path)
@@ -200,7 +267,7 @@ def train_and_save(
 
     base, _ = os.path.splitext(model_path)
     portable_json_path = base + ".portable.json"
-    portable_save(series, results, portable_json_path)
+    portable_save(series, results, portable_json_path, extra=selection)
 
     print(f"[OK] Pickle saved to: {model_path}")
     print(f"[OK] Portable bundle saved to: {portable_json_path} (+ .npz)")
@@ -241,6 +308,16 @@ def main():
     parser.add_argument('--seed', type=int, default=0, help='Random seed for synthetic data (default: 0)')
     parser.add_argument('--n', type=int, default=120, help='Number of periods to simulate (default: 120)')
     parser.add_argument('--forecast', type=int, default=0, help='Immediately forecast N steps after training (default: 0)')
+    parser.add_argument('--auto-order', action='store_true',
+                        help='Pick (p,d,q)(P,D,Q,m) by parallel grid search instead of --order/--seasonal-order')
+    parser.add_argument('--grid', default=None,
+                        help=f'Search grid for --auto-order, e.g. "p=0-2,d=1,q=0-2,P=0-1,D=0,Q=0-1" (default: "{order_search.DEFAULT_GRID}", m from --seasonal-order)')
+    parser.add_argument('--criterion', default="aic", choices=list(order_search.CRITERIA),
+                        help='Ranking criterion for --auto-order (default: aic)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processes for --auto-order (default: ORDER_SEARCH_WORKERS or CPU count)')
+    parser.add_argument('--candidate-budget', type=float, default=30.0,
+                        help='Seconds before a single candidate fit is abandoned (default: 30)')
 
     args = parser.parse_args()
 
@@ -258,6 +335,11 @@ def main():
             random_seed=args.seed,
             n=args.n,
             forecast_steps=args.forecast,
+            auto_order=args.auto_order,
+            grid=args.grid,
+            criterion=args.criterion,
+            workers=args.workers,
+            candidate_budget_s=args.candidate_budget,
         )
     except Exception as e:
         print('Failed to train/save SARIMAX model:', e)
@@ -0,0 +1,173 @@
+"""Chunked columnar storage for time series (aggregated usage, forecasts).
+
+A series is stored as fixed-size chunks of CHUNK_SIZE points in ts_chunks
+(models.SeriesChunk). Each chunk holds two zlib-compressed little-endian arrays:
+timestamps as int64 epoch seconds, delta-encoded so regular spacing compresses to
+almost nothing, and values as float64. Reads select only the chunks overlapping
+the requested range and decode them straight into NumPy arrays, so no per-point
+Python objects are created. Writes are append-only: new points must be later than
+the last stored one, only the tail chunk is ever rewritten, and full chunks are
+immutable.
+
+Naive datetimes are taken as UTC, matching the rest of the backend.
+
+Environment:
+  TSSTORE_CHUNK=4096    points per chunk for newly created chunks
+"""
+from __future__ import annotations
+import os
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from .models import SeriesChunk, TimeSeriesPoint
+
+CHUNK_SIZE = int(os.getenv("TSSTORE_CHUNK", "4096"))
+
+
+class ConcurrentAppend(RuntimeError):
+    """Another writer extended the same series between our read of the tail and our write."""
+
+
+def to_epoch_s(ts) -> np.ndarray:
+    """Datetimes / datetime64 / pandas index / epoch seconds -> int64 epoch seconds (UTC)."""
+    arr = np.asarray(ts)
+    if arr.dtype.kind == "M":
+        return arr.astype("datetime64[s]").astype(np.int64)
+    if arr.dtype.kind in "iu":
+        return arr.astype(np.int64)
+    if arr.size == 0:
+        return np.empty(0, dtype=np.int64)
+    utc = pd.to_datetime(arr.ravel(), utc=True).tz_convert(None)
+    return utc.values.astype("datetime64[s]").astype(np.int64)
+
+
+def _one_epoch_s(ts) -> int:
+    return int(to_epoch_s([ts])[0])
+
+
+def _encode(ts: np.ndarray, values: np.ndarray) -> tuple[bytes, bytes]:
+    deltas = np.diff(ts, prepend=np.int64(0)).astype("<i8")
+    return zlib.compress(deltas.tobytes(), 6), zlib.compress(values.astype("<f8").tobytes(), 6)
+
+
+def _decode(ts_data: bytes, value_data: bytes) -> tuple[np.ndarray, np.ndarray]:
+    ts = np.cumsum(np.frombuffer(zlib.decompress(ts_data), dtype="<i8"))
+    return ts, np.frombuffer(zlib.decompress(value_data), dtype="<f8")
+
+
+def append(db: Session, series_name: str, ts, values, skip_existing: bool = False) -> int:
+    """Append points to a series; returns how many were written. The caller commits.
+
+    Timestamps must be strictly increasing and later than the series' last point.
+    With skip_existing=True, points at or before the last stored timestamp are
+    dropped instead of raising, which lets a job re-offer an overlapping window.
+    """
+    ts = to_epoch_s(ts)
+    values = np.asarray(values, dtype=np.float64).ravel()
+    if ts.shape != values.shape:
+        raise ValueError(f"{len(ts)} timestamps but {len(values)} values")
+    if len(ts) > 1 and not np.all(np.diff(ts) > 0):
+        raise ValueError("timestamps must be strictly increasing")
+
+    tail = db.execute(
+        select(SeriesChunk).where(SeriesChunk.series_name == series_name)
+        .order_by(SeriesChunk.chunk_no.desc()).limit(1)
+        .execution_options(populate_existing=True)  # the tail may be stale in this session
+    ).scalar_one_or_none()
+    if tail is not None and len(ts):
+        if skip_existing:
+            keep = ts > tail.end_ts
+            ts, values = ts[keep], values[keep]
+        elif ts[0] <= tail.end_ts:
+            raise ValueError(f"{series_name}: append at {ts[0]} is not after last stored point {tail.end_ts}")
+    if not len(ts):
+        return 0
+
+    written = 0
+    next_no = 0
+    if tail is not None:
+        next_no = tail.chunk_no + 1
+        room = max(CHUNK_SIZE - tail.count, 0)
+        if room:
+            old_ts, old_vals = _decode(tail.ts_data, tail.value_data)
+            new_ts = np.concatenate((old_ts, ts[:room]))
+            new_vals = np.concatenate((old_vals, values[:room]))
+            ts_data, value_data = _encode(new_ts, new_vals)
+            res = db.execute(
+                update(SeriesChunk)
+                .where(SeriesChunk.id == tail.id, SeriesChunk.count == tail.count)
+                .values(end_ts=int(new_ts[-1]), count=len(new_ts), ts_data=ts_data, value_data=value_data)
+                .execution_options(synchronize_session=False)
+            )
+            if res.rowcount != 1:
+                raise ConcurrentAppend(series_name)
+            written = min(room, len(ts))
+    for lo in range(written, len(ts), CHUNK_SIZE):
+        part_ts, part_vals = ts[lo:lo + CHUNK_SIZE], values[lo:lo + CHUNK_SIZE]
+        ts_data, value_data = _encode(part_ts, part_vals)
+        db.add(SeriesChunk(
+            series_name=series_name, chunk_no=next_no, start_ts=int(part_ts[0]), end_ts=int(part_ts[-1]),
+            count=len(part_ts), ts_data=ts_data, value_data=value_data,
+        ))
+        next_no += 1
+    db.flush()  # a racing writer's chunk_no collides on uq_ts_chunk here
+    return len(ts)
+
+
+def read_range(db: Session, series_name: str, start=None, end=None) -> tuple[np.ndarray, np.ndarray]:
+    """Points with start <= ts < end as (datetime64[s] array, float64 array)."""
+    q = select(SeriesChunk.ts_data, SeriesChunk.value_data).where(SeriesChunk.series_name == series_name)
+    lo = hi = None
+    if start is not None:
+        lo = _one_epoch_s(start)
+        q = q.where(SeriesChunk.end_ts >= lo)
+    if end is not None:
+        hi = _one_epoch_s(end)
+        q = q.where(SeriesChunk.start_ts < hi)
+    chunks = [_decode(t, v) for t, v in db.execute(q.order_by(SeriesChunk.chunk_no))]
+    if not chunks:
+        return np.empty(0, dtype="datetime64[s]"), np.empty(0, dtype=np.float64)
+    ts = np.concatenate([c[0] for c in chunks])
+    values = np.concatenate([c[1] for c in chunks])
+    i = 0 if lo is None else int(np.searchsorted(ts, lo, side="left"))
+    j = len(ts) if hi is None else int(np.searchsorted(ts, hi, side="left"))
+    return ts[i:j].astype("datetime64[s]"), values[i:j]
+
+
+def read_series(db: Session, series_name: str, start=None, end=None) -> pd.Series:
+    """read_range as a pandas Series indexed by naive UTC timestamps (what the forecasters take)."""
+    ts, values = read_range(db, series_name, start, end)
+    return pd.Series(values, index=pd.DatetimeIndex(ts.astype("datetime64[ns]")), name=series_name)
+
+
+def last_ts(db: Session, series_name: str) -> Optional[datetime]:
+    end = db.execute(select(func.max(SeriesChunk.end_ts)).where(SeriesChunk.series_name == series_name)).scalar()
+    return None if end is None else datetime.fromtimestamp(end, tz=timezone.utc).replace(tzinfo=None)
+
+
+def count(db: Session, series_name: str) -> int:
+    return db.execute(select(func.coalesce(func.sum(SeriesChunk.count), 0)).where(SeriesChunk.series_name == series_name)).scalar()
+
+
+def drop(db: Session, series_name: str) -> int:
+    """Delete a whole series (the only way to rewrite history). The caller commits."""
+    return db.execute(delete(SeriesChunk).where(SeriesChunk.series_name == series_name)).rowcount
+
+
+def backfill_from_rows(db: Session, series_name: str) -> int:
+    """Copy timeseries rows later than the store's last point into the store. The caller commits."""
+    q = select(TimeSeriesPoint.ts, TimeSeriesPoint.value).where(TimeSeriesPoint.series_name == series_name)
+    last = last_ts(db, series_name)
+    if last is not None:
+        q = q.where(TimeSeriesPoint.ts > last)
+    rows = db.execute(q.order_by(TimeSeriesPoint.ts)).all()
+    if not rows:
+        return 0
+    ts, values = zip(*rows)
+    return append(db, series_name, ts, values, skip_existing=True)
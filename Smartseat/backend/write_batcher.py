@@ -0,0 +1,215 @@
+"""Group commit: coalesce concurrent write intents into one transaction.
+
+A write intent is a function fn(db) that does its writes on the given session and
+returns a result; it must not commit. With batching off (the default) execute()
+just runs fn on the caller's session and commits, exactly as before. With
+WRITE_BATCH_MS > 0 intents are handed to a writer thread that waits up to that
+many milliseconds for more (or until WRITE_BATCH_MAX are queued) and runs them
+all in one transaction, each inside its own SAVEPOINT:
+
+    BEGIN IMMEDIATE                 (SQLite: take the writer lock once, up front)
+      SAVEPOINT  intent 1  RELEASE  -> result
+      SAVEPOINT  intent 2  ROLLBACK -> HTTPException(409) for that caller only
+      ...
+    COMMIT                          (one fsync for the whole batch)
+
+Each caller gets its own result or exception: an intent that raises is rolled
+back to its savepoint and nothing else in the batch is affected. If the COMMIT
+itself fails, every intent of the batch is replayed in its own transaction, so
+one bad batch does not fail callers whose writes were fine.
+
+Durability: a caller is only answered after the COMMIT that contains its write
+has returned, so an acknowledged write is exactly as durable as an unbatched one.
+With the default DB_PROFILE=sqlite pragmas (WAL, synchronous=NORMAL, see
+storage.py) that means it survives a process crash, but an OS crash or power
+loss can drop commits not yet synced by a WAL checkpoint; set
+SQLITE_SYNCHRONOUS=FULL to fsync every commit. Intents still
+waiting in the window when the process dies were never acknowledged and are
+lost, like requests that had not reached the DB yet. Batching trades up to
+WRITE_BATCH_MS of extra latency per write for fewer fsyncs and writer-lock
+handoffs; it does not weaken isolation (the batch is one serialized transaction).
+
+Environment:
+  WRITE_BATCH_MS=0        batch window in milliseconds (0 = off: commit per request)
+  WRITE_BATCH_MAX=64      intents per transaction at most
+"""
+from __future__ import annotations
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+log = logging.getLogger("smartseat.write_batcher")
+
+WINDOW_MS = float(os.getenv("WRITE_BATCH_MS", "0"))
+MAX_BATCH = int(os.getenv("WRITE_BATCH_MAX", "64"))
+
+Intent = Callable[[Session], Any]
+
+
+class WriteBatcher:
+    """Writer thread that runs queued intents in shared transactions."""
+
+    def __init__(self, session_factory, window_ms: float = WINDOW_MS, max_batch: int = MAX_BATCH):
+        self.session_factory = session_factory
+        self.window_ms = window_ms
+        self.max_batch = max(1, max_batch)
+        self.stats = {"batches": 0, "intents": 0, "failed_intents": 0, "replayed_batches": 0}
+        self._queue: "queue.Queue[Optional[tuple[Intent, Future]]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.window_ms > 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="write-batcher", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)  # drains what is already queued, then exits
+            thread.join(timeout=5)
+
+    def submit(self, fn: Intent) -> Future:
+        if self._thread is None:
+            self.start()
+        fut: Future = Future()
+        self._queue.put((fn, fut))
+        return fut
+
+    def _collect(self, first) -> tuple[list, bool]:
+        batch, stop = [first], False
+        deadline = time.monotonic() + self.window_ms / 1000.0
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            try:
+                self.run_batch(batch)
+            except Exception:  # run_batch resolves every future itself; this is a last resort
+                log.exception("write batch crashed")
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(RuntimeError("write batch failed"))
+            if stop:
+                return
+
+    def _begin(self, db: Session):
+        if db.get_bind().dialect.name == "sqlite":
+            # Take the writer lock before the first SAVEPOINT; otherwise the SAVEPOINT would open
+            # the transaction and releasing it would commit on its own.
+            db.execute(text("BEGIN IMMEDIATE"))
+
+    def run_batch(self, batch: list[tuple[Intent, Future]]):
+        """Run intents in one transaction, one savepoint each; resolve their futures after COMMIT."""
+        db = self.session_factory(expire_on_commit=False)
+        outcomes: list[tuple[bool, Any]] = []
+        try:
+            self._begin(db)
+            for fn, _ in batch:
+                try:
+                    with db.begin_nested():
+                        result = fn(db)
+                        db.flush()
+                    outcomes.append((True, result))
+                except Exception as e:
+                    outcomes.append((False, e))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            db.close()
+            log.warning("group commit of %d intents failed (%s); replaying them one by one", len(batch), e)
+            self.stats["replayed_batches"] += 1
+            for item in batch:
+                self._run_alone(*item)
+            return
+        db.close()
+        self.stats["batches"] += 1
+        self.stats["intents"] += len(batch)
+        for (_, fut), (ok, value) in zip(batch, outcomes):
+            if ok:
+                fut.set_result(value)
+            else:
+                self.stats["failed_intents"] += 1
+                fut.set_exception(value)
+
+    def _run_alone(self, fn: Intent, fut: Future):
+        db = self.session_factory(expire_on_commit=False)
+        try:
+            result = fn(db)
+            db.commit()
+            fut.set_result(result)
+        except Exception as e:
+            db.rollback()
+            self.stats["failed_intents"] += 1
+            fut.set_exception(e)
+        finally:
+            db.close()
+
+
+def dedicated_session_factory(engine):
+    """Sessions on a one-connection engine of their own for the writer thread.
+
+    Request threads hold pooled connections while they wait for their batch; if the
+    writer had to check one out of the same pool, a burst could exhaust it and deadlock.
+    """
+    from . import statements
+    from .storage import make_engine
+    own = make_engine(engine.url, getattr(engine, "storage_profile", None), pool_size=1, max_overflow=0)
+    statements.instrument(own)  # batched logins/bookings still show up in /api/diag/statements
+    return sessionmaker(bind=own, autoflush=False, future=True)
+
+
+def _default_batcher() -> WriteBatcher:
+    from .database import engine
+    return WriteBatcher(dedicated_session_factory(engine))
+
+
+batcher = _default_batcher()
+
+
+def execute(db: Session, fn: Intent, wb: Optional[WriteBatcher] = None):
+    """Run the write intent `fn` and commit it; returns its result or raises its exception.
+
+    Batching off: fn runs on the caller's session `db`, which is committed (rolled back on error).
+    Batching on: fn runs on the writer thread's session; returned ORM objects are detached
+    but keep their loaded attributes, so load what the caller needs (e.g. db.refresh) inside fn.
+    """
+    wb = wb or batcher
+    if not wb.enabled:
+        try:
+            result = fn(db)
+            db.commit()
+            return result
+        except Exception:
+            db.rollback()
+            raise
+    return wb.submit(fn).result()
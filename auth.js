@@ -31,6 +31,13 @@
   }
 
   function logout(){
+    const token = getToken();
+    if(token){
+      // revoke server-side; keepalive lets the request finish across the redirect
+      try {
+        fetch(API_BASE + '/api/auth/logout', { method: 'POST', keepalive: true, headers: { 'Authorization': 'Bearer ' + token } });
+      } catch(_){}
+    }
     localStorage.removeItem('demo_token');
     window.location.href = 'A01_signin_credentials.html';
   }
@@ -58,5 +65,14 @@
     return null;
   }
 
-  window.Auth = { API_BASE, getToken, requireAuth, apiFetch, logout, formatDate, fetchCurrentUser };
+  // Several API calls in one round trip: [{id, path, method?, body?}] -> {id: {status, body}}
+  async function batch(requests){
+    const res = await apiFetch('/api/batch', { method: 'POST', body: JSON.stringify({ requests }) });
+    const data = await res.json();
+    const out = {};
+    (data.responses || []).forEach((r, i) => { out[r.id ?? i] = r; });
+    return out;
+  }
+
+  window.Auth = { API_BASE, getToken, requireAuth, apiFetch, logout, formatDate, fetchCurrentUser, batch };
 })();